@@ -4,6 +4,8 @@ const helmet = require('helmet');
 const morgan = require('morgan');
 const rateLimit = require('express-rate-limit');
 require('dotenv').config();
+const { requestTiming } = require('./utils/requestTiming');
+const { trafficCapture } = require('./middleware/trafficCapture');
 
 const app = express();
 
@@ -32,9 +34,15 @@ app.use(cors({
     return callback(new Error('Not allowed by CORS'));
   },
   methods: ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-  allowedHeaders: ['Content-Type', 'Authorization']
+  allowedHeaders: ['Content-Type', 'Authorization', 'X-Request-ID'],
+  exposedHeaders: ['Server-Timing', 'X-Request-ID', 'ETag']
 }));
-app.use(morgan('combined'));
+// İstek kimliği ve Server-Timing (db, db-wait, render, pdf, app)
+app.use(requestTiming);
+// TRAFFIC_CAPTURE_PATH ile istek kaydı (scripts/replay_traffic.py)
+app.use(trafficCapture());
+morgan.token('id', (req) => req.id);
+app.use(morgan(':remote-addr - :remote-user [:date[clf]] ":method :url HTTP/:http-version" :status :res[content-length] ":referrer" ":user-agent" :id'));
 
 const authLimiter = rateLimit({
   windowMs: 1 * 60 * 1000,
@@ -90,7 +98,7 @@ app.get('/api/health', (req, res) => {
 });
 
 app.use((err, req, res, next) => {
-  console.error(err.stack);
+  console.error(`[${req.id}]`, err.stack);
   res.status(500).json({
     success: false,
     error: {
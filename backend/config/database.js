@@ -1,4 +1,5 @@
 const { Pool } = require('pg');
+const { instrumentPool } = require('../utils/requestTiming');
 // Ensure environment variables from .env are loaded for any consumer of the pool
 // This prevents tools like utils/migrate.js from missing DB_* vars
 require('dotenv').config();
@@ -22,4 +23,7 @@ pool.on('error', (err) => {
   console.error('Database connection error:', err);
 });
 
+// İstek içindeki sorgu ve bağlantı bekleme süreleri Server-Timing'e yazılır
+instrumentPool(pool);
+
 module.exports = pool;
@@ -18,6 +18,8 @@ const {
 const MAX_BASE64_REPAIR_BYTES = parseInt(process.env.PDF_BASE64_REPAIR_MAX_BYTES || '31457280', 10);
 const ALLOWED_REPORT_SCALES = ['small', 'medium', 'large'];
 const REPORT_PUBLIC_BASE_URL = process.env.REPORT_PUBLIC_BASE_URL || 'http://localhost:5173/reports/public';
+// İmzalı rapor değişmez; QR ile açılan public uç noktalar ETag ile yeniden doğrulanır
+const PUBLIC_REPORT_CACHE_CONTROL = process.env.PUBLIC_REPORT_CACHE_CONTROL || 'public, max-age=300, must-revalidate';
 
 // Legacy base64 alanları kaldırıldı; normalize/backfill artık kullanılmıyor
 
@@ -54,6 +56,31 @@ const attachReportQrCode = async (report) => {
   return report;
 };
 
+// Koşullu GET için hafif sorgu: 7 tablolu JOIN ve dosya okuması yerine yalnızca rapor satırı
+const getPublicReportVersion = async (qrToken) => {
+  const result = await pool.query(
+    'SELECT id, is_signed, signed_at, updated_at, signed_pdf_path FROM reports WHERE qr_token = $1',
+    [qrToken]
+  );
+  return result.rows[0] || null;
+};
+
+const toStamp = (value) => (value ? new Date(value).getTime() : 0);
+
+// If-None-Match karşılaştırması zayıftır (W/ öneki yok sayılır)
+const matchesIfNoneMatch = (req, etag) => {
+  const header = req.headers['if-none-match'];
+  if (!header) return false;
+  if (header.trim() === '*') return true;
+  const bare = etag.replace(/^W\//, '');
+  return header.split(',').some((tag) => tag.trim().replace(/^W\//, '') === bare);
+};
+
+const setPublicCacheHeaders = (res, etag) => {
+  res.setHeader('ETag', etag);
+  res.setHeader('Cache-Control', PUBLIC_REPORT_CACHE_CONTROL);
+};
+
 const resolvePdfPath = async (report, preferSigned, htmlCache = null) => {
   const attempts = [];
   if (preferSigned) {
@@ -551,6 +578,26 @@ const getPublicReport = async (req, res) => {
   try {
     const { qrToken } = req.params;
 
+    const version = await getPublicReportVersion(qrToken);
+    if (!version) {
+      return res.status(404).json({
+        success: false,
+        error: {
+          code: 'NOT_FOUND',
+          message: 'Rapor bulunamadı veya henüz imzalanmamış'
+        }
+      });
+    }
+
+    // İmzalı rapor: satır sürümünden ETag; eşleşirse JOIN ve QR üretimi yapılmadan 304
+    if (version.is_signed) {
+      const etag = `W/"report-${version.id}-${toStamp(version.signed_at)}-${toStamp(version.updated_at)}"`;
+      setPublicCacheHeaders(res, etag);
+      if (matchesIfNoneMatch(req, etag)) {
+        return res.status(304).end();
+      }
+    }
+
     const result = await pool.query(
       `SELECT r.*, i.inspection_data, i.inspection_date, i.start_time, i.end_time, i.photo_urls,
               e.name as equipment_name, e.type as equipment_type,
@@ -604,6 +651,25 @@ const downloadPublicReport = async (req, res) => {
     const { signed = 'true' } = req.query;
     const preferSigned = signed !== 'false';
 
+    // İmzalı PDF: boyut + mtime'dan ETag; eşleşirse JOIN, QR üretimi ve dosya doğrulaması atlanır
+    let signedEtag = null;
+    if (preferSigned) {
+      const version = await getPublicReportVersion(qrToken);
+      if (!version) {
+        return res.status(404).json({ success: false, error: { code: 'NOT_FOUND', message: 'Rapor bulunamadı' } });
+      }
+      const stat = version.is_signed && version.signed_pdf_path
+        ? await fsp.stat(version.signed_pdf_path).catch(() => null)
+        : null;
+      if (stat) {
+        signedEtag = `"report-${version.id}-signed-${stat.size}-${Math.floor(stat.mtimeMs)}"`;
+        if (matchesIfNoneMatch(req, signedEtag)) {
+          setPublicCacheHeaders(res, signedEtag);
+          return res.status(304).end();
+        }
+      }
+    }
+
     const result = await pool.query(
       `SELECT r.*, i.inspection_data, i.inspection_date, i.start_time, i.end_time, i.photo_urls,
               e.name as equipment_name, e.type as equipment_type, e.template,
@@ -694,6 +760,10 @@ const downloadPublicReport = async (req, res) => {
 
     res.setHeader('Content-Type', 'application/pdf');
     res.setHeader('Content-Disposition', buildContentDisposition(rawFilename));
+    if (deliveredSigned && signedEtag && finalPath === report.signed_pdf_path) {
+      // sendFile mevcut ETag/Cache-Control başlıklarını korur
+      setPublicCacheHeaders(res, signedEtag);
+    }
     return res.sendFile(path.resolve(finalPath));
   } catch (error) {
     console.error('Download public report error:', error);
@@ -753,7 +823,8 @@ const getSigningData = async (req, res) => {
 
 // Helper function to generate HTML from inspection data (typed sections + legacy)
 const { buildHTML } = require('../utils/reportRenderer');
-const generateReportHTML = (report) => buildHTML(report);
+const { measure } = require('../utils/requestTiming');
+const generateReportHTML = (report) => measure('render', () => buildHTML(report));
 
 // Helper function to convert HTML to PDF
 const generatePDFFromHTML = (html) => generatePDFFromHTMLPuppeteer(html);
@@ -0,0 +1,127 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+
+// TRAFFIC_CAPTURE_PATH ayarlıysa her API isteği JSONL olarak kaydedilir (scripts/replay_traffic.py ile tekrar oynatılır).
+// Gövdeler yalnızca "şekil" olarak tutulur: ID/tarih/sayı/kısa enum değerleri korunur, serbest metin ve gizli alanlar uzunluğa indirgenir.
+// Erişim veren token'lar (tracking_token, qr_token, :token, :qrToken) yalnızca özet (sha256) olarak yazılır; JWT ("token") hiç yazılmaz.
+const CAPTURE_PATH = process.env.TRAFFIC_CAPTURE_PATH;
+const MAX_DEPTH = 6;
+const MAX_ARRAY = 200;
+const MAX_IDS = 200;
+
+const ID_KEY = /(^id$|_id$|Id$|_token$|Token$)/;
+const TOKEN_KEY = /(_token$|Token$)/;
+const TOKEN_PARAM = /^(token|qrToken)$/;
+const SECRET_KEY = /(password|pin$|secret|^token$)/i;
+const BASE64_KEY = /base64$/i;
+const SAFE_STRING = /^[a-z0-9_.-]{1,32}$/;
+const DATE_STRING = /^\d{4}-\d{2}-\d{2}([T ][0-9:.]+(Z|[+-]\d{2}:?\d{2})?)?$/;
+
+// Aynı token her yerde aynı özete dönüşür; replay_traffic.py yanıt ve path eşleştirmesini bununla yapar
+function digestToken(value) {
+  return 'sha256:' + crypto.createHash('sha256').update(String(value)).digest('hex').slice(0, 16);
+}
+
+function shape(value, key = '', depth = 0) {
+  if (value === null || value === undefined || typeof value === 'boolean' || typeof value === 'number') {
+    return value === undefined ? null : value;
+  }
+  if (typeof value === 'string') {
+    if (BASE64_KEY.test(key)) return { $base64: value.length };
+    if (SECRET_KEY.test(key)) return { $str: value.length };
+    if (TOKEN_KEY.test(key)) return digestToken(value);
+    if (ID_KEY.test(key) || SAFE_STRING.test(value) || DATE_STRING.test(value)) return value;
+    return { $str: value.length };
+  }
+  if (Array.isArray(value)) {
+    if (depth >= MAX_DEPTH) return { $array: value.length };
+    return value.slice(0, MAX_ARRAY).map((v) => shape(v, key, depth + 1));
+  }
+  if (typeof value === 'object') {
+    if (depth >= MAX_DEPTH) return { $object: Object.keys(value).length };
+    const out = {};
+    for (const [k, v] of Object.entries(value)) out[k] = shape(v, k, depth + 1);
+    return out;
+  }
+  return null;
+}
+
+// Yanıttaki kimlikler [anahtar, değer] çiftleri olarak; "id" anahtarı üst anahtarın adını alır ("" = kök)
+function collectIds(value, parentKey = '', out = [], depth = 0) {
+  if (out.length >= MAX_IDS || depth > MAX_DEPTH || value === null || typeof value !== 'object') return out;
+  if (Array.isArray(value)) {
+    for (const v of value) collectIds(v, parentKey, out, depth + 1);
+    return out;
+  }
+  for (const [k, v] of Object.entries(value)) {
+    if (out.length >= MAX_IDS) break;
+    if (v !== null && typeof v === 'object') {
+      collectIds(v, k, out, depth + 1);
+    } else if (k === 'id') {
+      out.push([parentKey, v]);
+    } else if (ID_KEY.test(k) && v !== null && v !== undefined) {
+      out.push([k, TOKEN_KEY.test(k) ? digestToken(v) : v]);
+    }
+  }
+  return out;
+}
+
+function shapeParams(params) {
+  const out = {};
+  for (const [k, v] of Object.entries(params || {})) out[k] = TOKEN_PARAM.test(k) ? digestToken(v) : v;
+  return out;
+}
+
+function uploadedFiles(req) {
+  const files = req.files ? (Array.isArray(req.files) ? req.files : Object.values(req.files).flat()) : (req.file ? [req.file] : []);
+  return files.map((f) => ({ field: f.fieldname, size: f.size, type: f.mimetype }));
+}
+
+function trafficCapture() {
+  if (!CAPTURE_PATH) return (req, res, next) => next();
+  fs.mkdirSync(path.dirname(path.resolve(CAPTURE_PATH)), { recursive: true });
+  const out = fs.createWriteStream(CAPTURE_PATH, { flags: 'a' });
+  out.on('error', (err) => console.error('Traffic capture error:', err.message));
+  console.log('Capturing API traffic to', CAPTURE_PATH);
+
+  return (req, res, next) => {
+    if (req.method === 'OPTIONS') return next();
+    const ts = Date.now();
+    const t0 = process.hrtime.bigint();
+    let ids = [];
+    const json = res.json;
+    res.json = function (body) {
+      if (body && body.data !== undefined) ids = collectIds(body.data);
+      return json.call(this, body);
+    };
+    res.on('finish', () => {
+      if (!req.route) return; // eşleşmeyen (404) istekler kaydedilmez
+      const route = (req.baseUrl + req.route.path).replace(/\/$/, '') || '/';
+      if (route === '/api/health') return;
+      const entry = {
+        ts,
+        method: req.method,
+        route,
+        params: shapeParams(req.params),
+        query: shape(req.query),
+        body: req.is('application/json') ? shape(req.body) : null,
+        files: uploadedFiles(req),
+        form: req.is('multipart/form-data') ? shape(req.body) : null,
+        auth: Boolean(req.headers.authorization),
+        status: res.statusCode,
+        ms: Math.round(Number(process.hrtime.bigint() - t0) / 1e4) / 100,
+        ids,
+      };
+      out.write(JSON.stringify(entry) + '\n');
+    });
+    next();
+  };
+}
+
+module.exports = {
+  trafficCapture,
+  shape,
+  collectIds,
+  digestToken,
+};
@@ -1,4 +1,5 @@
 const puppeteer = require('puppeteer');
+const { measure } = require('./requestTiming');
 
 const getLaunchOptions = () => {
   const noSandbox = process.env.PUPPETEER_NO_SANDBOX === 'true';
@@ -27,7 +28,11 @@ async function getBrowser() {
   return browserPromise;
 }
 
-async function generatePDFBufferFromHTML(html) {
+function generatePDFBufferFromHTML(html) {
+  return measure('pdf', () => renderPDFBuffer(html));
+}
+
+async function renderPDFBuffer(html) {
   const browser = await getBrowser();
   const page = await browser.newPage();
   try {
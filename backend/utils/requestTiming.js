@@ -0,0 +1,134 @@
+const { AsyncLocalStorage } = require('async_hooks');
+const crypto = require('crypto');
+
+// Her isteğe ait süre sayaçları (db, render, pdf); Server-Timing başlığına yazılır
+const storage = new AsyncLocalStorage();
+const SERVER_TIMING_ENABLED = process.env.SERVER_TIMING !== 'false';
+const REQUEST_ID_PATTERN = /^[A-Za-z0-9._-]{1,64}$/;
+const CLIENT_TIMING = Symbol('requestTiming');
+const CLIENT_PATCHED = Symbol('requestTimingPatched');
+
+const now = () => Number(process.hrtime.bigint()) / 1e6;
+
+class RequestTiming {
+  constructor(id) {
+    this.id = id;
+    this.start = now();
+    this.metrics = new Map();
+  }
+
+  add(name, ms) {
+    const m = this.metrics.get(name) || { ms: 0, count: 0 };
+    m.ms += ms;
+    m.count += 1;
+    this.metrics.set(name, m);
+  }
+
+  header() {
+    const parts = [];
+    for (const [name, m] of this.metrics) {
+      parts.push(`${name};dur=${m.ms.toFixed(1)};desc="${m.count}"`);
+    }
+    parts.push(`app;dur=${(now() - this.start).toFixed(1)}`);
+    return parts.join(', ');
+  }
+}
+
+const current = () => storage.getStore();
+
+// Süreyi aktif isteğe yazar; istek dışında (ör. reportWorker) sadece fn'i çalıştırır
+function measure(name, fn) {
+  const timing = current();
+  if (!timing) return fn();
+  const t0 = now();
+  let result;
+  try {
+    result = fn();
+  } catch (err) {
+    timing.add(name, now() - t0);
+    throw err;
+  }
+  if (result && typeof result.then === 'function') {
+    return result.then(
+      (value) => { timing.add(name, now() - t0); return value; },
+      (err) => { timing.add(name, now() - t0); throw err; }
+    );
+  }
+  timing.add(name, now() - t0);
+  return result;
+}
+
+function requestTiming(req, res, next) {
+  const incoming = req.get('X-Request-ID');
+  const id = incoming && REQUEST_ID_PATTERN.test(incoming) ? incoming : crypto.randomUUID();
+  const timing = new RequestTiming(id);
+  req.id = id;
+  res.setHeader('X-Request-ID', id);
+  if (SERVER_TIMING_ENABLED) {
+    // Başlıklar gönderilmeden hemen önce o ana kadarki süreleri ekle
+    const writeHead = res.writeHead;
+    res.writeHead = function (...args) {
+      if (!res.headersSent) res.setHeader('Server-Timing', timing.header());
+      return writeHead.apply(this, args);
+    };
+  }
+  storage.run(timing, next);
+}
+
+function instrumentClient(client, timing) {
+  client[CLIENT_TIMING] = timing;
+  if (!client[CLIENT_PATCHED]) {
+    const query = client.query;
+    client.query = function (...args) {
+      const t = this[CLIENT_TIMING];
+      // Cursor/stream gibi submittable sorgular olduğu gibi geçer
+      if (!t || (args[0] && typeof args[0].submit === 'function')) return query.apply(this, args);
+      const t0 = now();
+      const done = () => t.add('db', now() - t0);
+      const last = args.length - 1;
+      if (typeof args[last] === 'function') {
+        const cb = args[last];
+        args[last] = function (...res) { done(); return cb.apply(this, res); };
+        return query.apply(this, args);
+      }
+      const p = query.apply(this, args);
+      if (p && typeof p.then === 'function') p.then(done, done);
+      return p;
+    };
+    client[CLIENT_PATCHED] = true;
+  }
+  const release = client.release;
+  client.release = function (...args) {
+    client[CLIENT_TIMING] = null;
+    return release.apply(this, args);
+  };
+}
+
+// pool.query da bağlantıyı pool.connect ile aldığı için tek noktadan ölçülür:
+// bağlantı bekleme "db-wait", sorgu süreleri "db" olarak yazılır
+function instrumentPool(pool) {
+  const connect = pool.connect.bind(pool);
+  pool.connect = (cb) => {
+    const timing = current();
+    if (!timing) return connect(cb);
+    const t0 = now();
+    const attach = (client) => {
+      timing.add('db-wait', now() - t0);
+      instrumentClient(client, timing);
+    };
+    if (typeof cb === 'function') {
+      return connect((err, client, done) => {
+        if (!err && client) attach(client);
+        cb(err, client, done);
+      });
+    }
+    return connect().then((client) => { attach(client); return client; });
+  };
+  return pool;
+}
+
+module.exports = {
+  requestTiming,
+  measure,
+  instrumentPool,
+};
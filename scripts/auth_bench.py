@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Login (bcrypt) throughput and its effect on the rest of the API.
+
+authController.login checks the password with bcryptjs, a pure JavaScript
+bcrypt whose work runs on the Node event loop, and step_sign_report_with_technician
+logs in again for every signing. This benchmark measures, for each login
+concurrency level:
+
+  * logins/s and login latency (POST /auth/login with a valid password);
+  * the latency of probe requests sent at a fixed rate while the logins run:
+    GET /health (no DB, so its delay is almost pure event-loop wait) and
+    GET /auth/profile (JWT verify + one query). Probes are timed from their
+    scheduled send time, so a stalled loop is not hidden by the probe
+    waiting for the previous answer;
+
+and, as the token-reuse comparison, authenticated GET /auth/profile
+throughput when every request logs in first ("fresh") versus when the
+token comes from test_backend.TokenCache ("cached"). The load tools take
+--token-cache to run whole flows the second way.
+
+Usage:
+  python scripts/auth_bench.py --concurrency 1,4,16 --duration 15
+  python scripts/auth_bench.py --probe-rps 50 --out auth.json
+
+Requires: pip install requests
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from load_backend import percentile
+from test_backend import BackendTester, TokenCache
+
+
+def _r(v: Optional[float]) -> Optional[float]:
+    return round(v, 2) if v is not None else None
+
+
+class Prober:
+    """Open-loop probe: one request per 1/rps seconds, latency measured from the scheduled time."""
+
+    def __init__(self, api: str, token: str, rps: float):
+        self.api = api
+        self.token = token
+        self.interval = 1.0 / rps
+        self.latencies: Dict[str, List[float]] = {"health": [], "profile": []}
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self):
+        t = BackendTester(self.api, "", "")
+        targets = [("health", "/health", None), ("profile", "/auth/profile", self.token)]
+        due = time.perf_counter()
+        k = 0
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if due > now:
+                self._stop.wait(due - now)
+                continue
+            name, path, token = targets[k % 2]
+            k += 1
+            try:
+                r = t.request("GET", path, token=token)
+                ok = r.status_code == 200
+            except Exception:
+                ok = False
+            t.drain_calls()
+            if ok:
+                self.latencies[name].append((time.perf_counter() - due) * 1000.0)
+            else:
+                self.errors += 1
+            due += self.interval
+
+    def start(self) -> "Prober":
+        self._thread = threading.Thread(target=self._loop, name="auth-prober", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        out: Dict[str, Any] = {"probe_errors": self.errors}
+        for name, lat in self.latencies.items():
+            out[f"{name}_p50_ms"] = _r(percentile(lat, 50))
+            out[f"{name}_p99_ms"] = _r(percentile(lat, 99))
+            out[f"{name}_max_ms"] = _r(max(lat) if lat else None)
+        return out
+
+
+def hammer(api: str, concurrency: int, duration: float, action) -> Dict[str, Any]:
+    """Run ``action(tester) -> bool`` in ``concurrency`` closed loops for ``duration`` seconds."""
+    lat: List[float] = []
+    failed = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(_):
+        t = BackendTester(api, "", "")
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                ok = action(t)
+            except Exception:
+                ok = False
+            ms = (time.perf_counter() - t0) * 1000.0
+            t.drain_calls()
+            with lock:
+                if ok:
+                    lat.append(ms)
+                else:
+                    failed[0] += 1
+
+    t0 = time.perf_counter()
+    if concurrency > 0:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, range(concurrency)))
+    else:
+        time.sleep(duration)
+    wall = time.perf_counter() - t0
+    return {
+        "ops": len(lat), "failed": failed[0],
+        "ops_per_s": round(len(lat) / wall, 2) if wall > 0 else None,
+        "p50_ms": _r(percentile(lat, 50)), "p95_ms": _r(percentile(lat, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput, event-loop impact and token reuse benchmark")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent login loops (0 is added as the baseline)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--probe-rps", type=float, default=20.0, help="Probe requests per second during each level")
+    parser.add_argument("--out", help="Write all results as JSON")
+    args = parser.parse_args()
+    levels = sorted({0, *[int(x) for x in args.concurrency.split(",") if x]})
+
+    cache = TokenCache()
+    admin = BackendTester(args.api, args.email, args.password, token_cache=cache)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+    token = admin.token_admin
+
+    def login(t: BackendTester) -> bool:
+        r = t.request("POST", "/auth/login", json={"email": args.email, "password": args.password})
+        return r.status_code == 200
+
+    rows = []
+    print(f"{'logins':>6} {'login/s':>8} {'p50':>8} {'p95':>8} {'fail':>5} | {'health50':>9} {'health99':>9} {'prof50':>9} {'prof99':>9}")
+    for conc in levels:
+        prober = Prober(args.api, token, args.probe_rps).start()
+        res = hammer(args.api, conc, args.duration, login)
+        row = {"login_concurrency": conc, **{f"login_{k}": v for k, v in res.items()}, **prober.stop()}
+        rows.append(row)
+        print(f"{conc:>6} {row['login_ops_per_s'] or 0:>8} {row['login_p50_ms'] or 0:>8} {row['login_p95_ms'] or 0:>8} "
+              f"{row['login_failed']:>5} | {row['health_p50_ms'] or 0:>9} {row['health_p99_ms'] or 0:>9} "
+              f"{row['profile_p50_ms'] or 0:>9} {row['profile_p99_ms'] or 0:>9}")
+
+    # Same authenticated request, with and without a login in front of it
+    def fresh(t: BackendTester) -> bool:
+        r = t.request("POST", "/auth/login", json={"email": args.email, "password": args.password})
+        if r.status_code != 200:
+            return False
+        return t.request("GET", "/auth/profile", token=r.json()["data"]["token"]).status_code == 200
+
+    def cached(t: BackendTester) -> bool:
+        _, tok = cache.login(t, args.email, args.password)
+        return bool(tok) and t.request("GET", "/auth/profile", token=tok).status_code == 200
+
+    reuse_conc = max(levels)
+    reuse = {}
+    print(f"\nGET /auth/profile with {reuse_conc} clients:")
+    for name, action in (("fresh", fresh), ("cached", cached)):
+        reuse[name] = hammer(args.api, reuse_conc, args.duration, action)
+        r = reuse[name]
+        print(f"  {name:<7} {r['ops_per_s'] or 0:>8} req/s  p50 {r['p50_ms'] or 0:>8} ms  p95 {r['p95_ms'] or 0:>8} ms  failed {r['failed']}")
+    if reuse["fresh"]["ops_per_s"] and reuse["cached"]["ops_per_s"]:
+        print(f"  token reuse: {reuse['cached']['ops_per_s'] / reuse['fresh']['ops_per_s']:.1f}x throughput")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps({"levels": rows, "token_reuse": reuse, "token_cache": cache.stats()}, indent=2, ensure_ascii=False))
+    failed = any(r["login_failed"] or r["probe_errors"] for r in rows)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Named performance baselines for the E2E flow and a regression gate.
+
+A baseline is the median of one or more BackendTester runs: per-step wall
+time, response bytes (the downloaded PDF sizes live here) and the report job
+queue wait / run time. It is stored as JSON under BASELINE_DIR
+(default: scripts/baselines/<name>.json). Comparing a fresh run against it
+flags every metric that grew by more than the relative threshold *and* by
+more than the absolute floor, so sub-millisecond jitter on fast steps does
+not fail the gate.
+
+Usage (through scripts/test_backend.py):
+  python scripts/test_backend.py --repeat 5 --save-baseline main
+  python scripts/test_backend.py --repeat 5 --compare main --threshold 0.25
+
+  # compare two stored baselines without hitting the API
+  python scripts/baseline.py main feature-x --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_DIR = os.environ.get("BASELINE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines"))
+
+# Metrics pulled out of step data; everything else is per-step time and bytes.
+JOB_METRICS = ("queue_wait_ms", "job_run_ms")
+
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return f"{self.metric}: {self.baseline:.1f} -> {self.current:.1f} (x{self.ratio:.2f})"
+
+
+def _median(values: Iterable[Optional[float]]) -> Optional[float]:
+    vals = [v for v in values if v is not None]
+    return statistics.median(vals) if vals else None
+
+
+def snapshot(runs: List[List[Any]], name: str, api: str) -> Dict[str, Any]:
+    """Reduce the StepResult lists of several runs to one baseline document."""
+    per_step: Dict[str, Dict[str, List[float]]] = {}
+    order: List[str] = []
+    for results in runs:
+        for r in results:
+            if r.name not in per_step:
+                per_step[r.name] = {"elapsed_ms": [], "response_bytes": [], **{k: [] for k in JOB_METRICS}}
+                order.append(r.name)
+            bucket = per_step[r.name]
+            bucket["elapsed_ms"].append(r.elapsed_ms)
+            bucket["response_bytes"].append(r.response_bytes)
+            for k in JOB_METRICS:
+                bucket[k].append(r.data.get(k))
+
+    steps: Dict[str, Dict[str, Any]] = {}
+    for step in order:
+        entry = {k: _median(v) for k, v in per_step[step].items()}
+        steps[step] = {k: v for k, v in entry.items() if v is not None}
+    return {
+        "name": name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "api": api,
+        "runs": len(runs),
+        "steps": steps,
+    }
+
+
+def baseline_path(name: str, directory: str = DEFAULT_DIR) -> str:
+    return os.path.join(directory, f"{name}.json")
+
+
+def save_baseline(doc: Dict[str, Any], directory: str = DEFAULT_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = baseline_path(doc["name"], directory)
+    with open(path, "w", encoding="utf_8") as f:
+        f.write(json.dumps(doc, indent=2, ensure_ascii=False))
+    return path
+
+
+def load_baseline(name: str, directory: str = DEFAULT_DIR) -> Dict[str, Any]:
+    with open(baseline_path(name, directory), "r", encoding="utf_8") as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_delta_ms: float = 20.0, min_delta_bytes: int = 1024,
+            steps: Optional[List[str]] = None) -> List[Regression]:
+    """Return metrics of ``current`` that are worse than ``baseline`` by more than ``threshold`` (0.2 = +20%)."""
+    regressions: List[Regression] = []
+    for step, base_metrics in baseline.get("steps", {}).items():
+        if steps and step not in steps:
+            continue
+        cur_metrics = current.get("steps", {}).get(step)
+        if not cur_metrics:
+            continue
+        for metric, base_val in base_metrics.items():
+            cur_val = cur_metrics.get(metric)
+            if cur_val is None or base_val is None:
+                continue
+            floor = min_delta_bytes if metric.endswith("_bytes") else min_delta_ms
+            if cur_val - base_val > floor and cur_val > base_val * (1.0 + threshold):
+                regressions.append(Regression(f"{step}.{metric}", base_val, cur_val))
+    return regressions
+
+
+def format_comparison(current: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    header = f"{'step':<30} {'metric':<15} {'baseline':>12} {'current':>12} {'change':>8}"
+    lines = [header, "-" * len(header)]
+    for step, base_metrics in baseline.get("steps", {}).items():
+        cur_metrics = current.get("steps", {}).get(step, {})
+        for metric, base_val in base_metrics.items():
+            cur_val = cur_metrics.get(metric)
+            if cur_val is None:
+                change = "-"
+            elif base_val:
+                change = f"{(cur_val / base_val - 1.0) * 100:+.0f}%"
+            else:
+                change = "new"
+            cur_txt = f"{cur_val:12.1f}" if cur_val is not None else f"{'-':>12}"
+            lines.append(f"{step:<30} {metric:<15} {base_val:12.1f} {cur_txt} {change:>8}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two stored E2E baselines")
+    parser.add_argument("baseline", help="Reference baseline name")
+    parser.add_argument("current", help="Baseline name to check against the reference")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="Baseline directory")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative growth (0.2 = +20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0)
+    parser.add_argument("--steps", help="Comma-separated steps to gate on (default: all)")
+    args = parser.parse_args()
+
+    base = load_baseline(args.baseline, args.dir)
+    cur = load_baseline(args.current, args.dir)
+    print(format_comparison(cur, base))
+    steps = args.steps.split(",") if args.steps else None
+    regressions = compare(cur, base, args.threshold, args.min_delta_ms, steps=steps)
+    for reg in regressions:
+        print(f"REGRESSION {reg}", file=sys.stderr)
+    sys.exit(2 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,23 @@ Usage:
     --email admin@abc.com --password password \
     --name "Kule Vinç - Örnek" --type "Kule Vinç"
 
+  # Bulk mode: thousands of equipment with randomized (valid) templates
+  python scripts/create_example_equipment.py --bulk 5000 --concurrency 16 --seed 42
+
 Requires: pip install requests
 """
 
 import argparse
 import os
+import random
 import sys
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 
 
 def build_template():
@@ -93,8 +102,61 @@ def build_template():
     }
 
 
-def login(api, email, password):
-    r = requests.post(f"{api}/auth/login", json={"email": email, "password": password})
+EQUIPMENT_TYPES = [
+    "Kule Vinç", "Mobil Vinç", "Forklift", "Asansör", "Yük Asansörü",
+    "Kompresör", "Basınçlı Kap", "Kazan", "İskele", "Caraskal",
+]
+CHECK_OPTIONS = ["Uygun", "Uygun Değil", "N/A"]
+VALUE_TYPES = ["text", "number", "date", "select"]
+
+
+def build_random_template(rng, max_sections=12, max_questions=60, max_columns=10, max_photos=24):
+    """Return a randomized template built from the same section types as build_template().
+
+    Section counts, checklist sizes, table widths and photo limits vary so the
+    generated data covers small to very large templates.
+    """
+    sections = []
+    for si in range(rng.randint(2, max_sections)):
+        st = rng.choice(["key_value", "key_value", "checklist", "checklist", "table", "photos", "notes"])
+        title = f"Bölüm {si + 1}"
+        if st == "key_value":
+            items = []
+            for i in range(rng.randint(2, 20)):
+                vt = rng.choice(VALUE_TYPES)
+                it = {"name": f"alan_{si}_{i}", "label": f"Alan {si}.{i}", "valueType": vt}
+                if vt == "select":
+                    it["options"] = [{"label": f"Seçenek {k}", "value": f"s{k}"} for k in range(rng.randint(2, 6))]
+                items.append(it)
+            sections.append({"title": title, "type": st, "items": items})
+        elif st == "checklist":
+            questions = [
+                {"name": f"soru_{si}_{i}", "label": f"Kontrol {si}.{i}", "options": CHECK_OPTIONS}
+                for i in range(rng.randint(3, max_questions))
+            ]
+            sections.append({"title": title, "type": st, "questions": questions})
+        elif st == "table":
+            columns = [{"name": f"kolon_{i}", "label": f"Kolon {i}"} for i in range(rng.randint(2, max_columns))]
+            sections.append({"title": title, "type": st, "field": f"tablo_{si}", "columns": columns})
+        elif st == "photos":
+            sections.append({"title": title, "type": st, "field": f"foto_{si}", "display": "grid",
+                             "maxCount": rng.randint(1, max_photos)})
+        else:
+            sections.append({"title": title, "type": st, "field": f"not_{si}"})
+    return {"sections": sections}
+
+
+def pooled_session(pool_size):
+    """Keep-alive session sized for ``pool_size`` concurrent requests to one host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def login(api, email, password, session=None):
+    r = (session or requests).post(f"{api}/auth/login", json={"email": email, "password": password})
     r.raise_for_status()
     js = r.json()
     if not js.get("success"):
@@ -106,10 +168,10 @@ def login(api, email, password):
     return token
 
 
-def create_equipment(api, token, name, typ, template):
+def create_equipment(api, token, name, typ, template, session=None):
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     payload = {"name": name, "type": typ, "template": template}
-    r = requests.post(f"{api}/equipment", headers=headers, data=json.dumps(payload))
+    r = (session or requests).post(f"{api}/equipment", headers=headers, data=json.dumps(payload))
     r.raise_for_status()
     js = r.json()
     if not js.get("success"):
@@ -117,6 +179,75 @@ def create_equipment(api, token, name, typ, template):
     return js["data"]
 
 
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_with_retry(api, token, name, typ, template, session, retries):
+    """create_equipment with exponential backoff on connection errors and retryable statuses."""
+    delay = 0.2
+    for attempt in range(retries + 1):
+        try:
+            return create_equipment(api, token, name, typ, template, session=session)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status not in RETRY_STATUSES or attempt == retries:
+                raise
+        except requests.ConnectionError:
+            if attempt == retries:
+                raise
+        time.sleep(delay * random.uniform(0.5, 1.5))
+        delay = min(delay * 2, 5.0)
+
+
+def bulk_create(api, token, count, concurrency=8, retries=3, seed=None, prefix="Yük Testi"):
+    """Create ``count`` equipment with random templates; returns a stats dict."""
+    rng = random.Random(seed)
+    run_tag = f"{int(time.time())}"
+    # Generate up front so a seed reproduces the same data regardless of thread scheduling
+    jobs = [
+        (f"{prefix} {run_tag}-{i:06d}", rng.choice(EQUIPMENT_TYPES), build_random_template(rng))
+        for i in range(count)
+    ]
+    session = pooled_session(concurrency)
+    lock = threading.Lock()
+    stats = {"created": 0, "failed": 0, "errors": {}, "latencies_ms": []}
+
+    def one(job):
+        name, typ, template = job
+        t0 = time.perf_counter()
+        try:
+            create_with_retry(api, token, name, typ, template, session, retries)
+            ok, err = True, None
+        except requests.HTTPError as e:
+            ok, err = False, f"HTTP {e.response.status_code if e.response is not None else '?'}"
+        except Exception as e:
+            ok, err = False, type(e).__name__
+        ms = (time.perf_counter() - t0) * 1000.0
+        with lock:
+            stats["latencies_ms"].append(ms)
+            if ok:
+                stats["created"] += 1
+            else:
+                stats["failed"] += 1
+                stats["errors"][err] = stats["errors"].get(err, 0) + 1
+            done = stats["created"] + stats["failed"]
+            if done % 500 == 0:
+                print(f"  {done}/{count}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, jobs))
+    wall = time.perf_counter() - t0
+
+    lat = sorted(stats.pop("latencies_ms"))
+    stats["wall_s"] = round(wall, 3)
+    stats["records_per_s"] = round(stats["created"] / wall, 2) if wall > 0 else None
+    if lat:
+        stats["p50_ms"] = round(lat[len(lat) // 2], 2)
+        stats["p95_ms"] = round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 2)
+    return stats
+
+
 def main():
     parser = argparse.ArgumentParser(description="Create sample equipment with a rich template")
     parser.add_argument("--api", default=os.getenv("API", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
@@ -124,11 +255,19 @@ def main():
     parser.add_argument("--password", default=os.getenv("PASSWORD", "password"))
     parser.add_argument("--name", default="Örnek Ekipman — Kule Vinç")
     parser.add_argument("--type", dest="etype", default="Kule Vinç")
+    parser.add_argument("--bulk", type=int, help="Create this many equipment with randomized templates")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel requests in bulk mode")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per record on connection errors / 5xx / 429")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible bulk data")
     args = parser.parse_args()
 
     tpl = build_template()
     try:
         token = login(args.api, args.email, args.password)
+        if args.bulk:
+            stats = bulk_create(args.api, token, args.bulk, args.concurrency, args.retries, args.seed)
+            print(json.dumps(stats, ensure_ascii=False, indent=2))
+            sys.exit(0 if stats["failed"] == 0 else 1)
         data = create_equipment(args.api, token, args.name, args.etype, tpl)
         print("Success: equipment created.")
         print(json.dumps(data, ensure_ascii=False, indent=2))
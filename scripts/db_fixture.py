@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Per-run PostgreSQL fixtures cloned from a template database.
+
+test_backend.py and the load tools mutate the shared database (customers,
+equipment, offers, work orders, inspections), which is why the
+convert_to_work_order step has to pick random future dates. Re-creating the
+database from muayenedb.sql or utils/migrate.js for every run is slow.
+Instead this tool:
+
+  build   creates the template database once: runs the migrations in
+          backend/config/migrations in file order (what utils/migrate.js
+          does, including 002_seed_data) or a dump (--dump muayenedb.sql),
+          plus optional --extra files such as a generate_tenant.py sql
+          dump; then ANALYZEs it and marks it IS_TEMPLATE with connections
+          disabled, so nothing can block cloning;
+  ensure  rebuilds the template only if the migration/dump files changed
+          (their hash is kept in the template's COMMENT);
+  clone   CREATE DATABASE ... TEMPLATE, a file-level copy that takes well
+          under a second for a database of this size (STRATEGY FILE_COPY
+          on PostgreSQL 15+, which is the faster strategy for small ones);
+  drop    removes clones (by name, or every clone of the template);
+  run     clones one database per worker, starts the --server commands
+          (backend, report worker) for each with DB_NAME, PORT and a
+          separate REPORTS_PATH, waits for /api/health, runs the client
+          command with BASE and TASK_DATE set, then stops everything and
+          drops the clones. Workers run in parallel and never see each
+          other's rows, so test_backend.py can use a fixed --task-date.
+
+Usage:
+  python scripts/db_fixture.py build
+  python scripts/db_fixture.py build --dump muayenedb.sql --extra tenant.sql
+  python scripts/db_fixture.py clone --count 4
+  python scripts/db_fixture.py drop --all
+  python scripts/db_fixture.py run --workers 4 \
+    --server "node app.js" --server "node utils/reportWorker.js" \
+    -- python scripts/test_backend.py --report run.json
+
+Requires: psql on PATH (connection from DB_HOST/DB_PORT/DB_USER/DB_PASSWORD;
+the user needs CREATEDB)
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from query_plans import Psql
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, "config", "migrations")
+COMMENT_PREFIX = "muayene-fixture"
+
+
+def ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def fingerprint(files: List[str]) -> str:
+    h = hashlib.sha256()
+    for path in files:
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class FixtureManager:
+    def __init__(self, host: str, port: str, user: str, password: str, template: str, maintenance_db: str = "postgres"):
+        self.conn = (host, port, user, password)
+        self.template = template
+        self.admin = Psql(host, port, maintenance_db, user, password)
+        self._version: Optional[int] = None
+
+    def db(self, name: str) -> Psql:
+        host, port, user, password = self.conn
+        return Psql(host, port, name, user, password)
+
+    @property
+    def server_version(self) -> int:
+        if self._version is None:
+            self._version = int(self.admin.value("SHOW server_version_num") or 0)
+        return self._version
+
+    def comment(self, name: str) -> Optional[str]:
+        return self.admin.value(
+            f"SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = {literal(name)}")
+
+    def exists(self, name: str) -> bool:
+        return self.admin.value(f"SELECT 1 FROM pg_database WHERE datname = {literal(name)}") == "1"
+
+    def drop(self, name: str):
+        if self.exists(name):
+            self.admin.run(f"ALTER DATABASE {ident(name)} IS_TEMPLATE false;\n")
+            # FORCE (PostgreSQL 13+) disconnects a backend that is still attached
+            self.admin.run(f"DROP DATABASE {ident(name)} WITH (FORCE);\n")
+
+    def build(self, files: List[str]) -> float:
+        t0 = time.perf_counter()
+        self.drop(self.template)
+        self.admin.run(f"CREATE DATABASE {ident(self.template)} ENCODING 'UTF8';\n")
+        db = self.db(self.template)
+        for path in files:
+            print(f"  {os.path.relpath(path, ROOT)}", file=sys.stderr)
+            db.run_file(path)
+        db.run("ANALYZE;\n")
+        self.admin.run(
+            f"COMMENT ON DATABASE {ident(self.template)} IS {literal(f'{COMMENT_PREFIX} template {fingerprint(files)}')};\n"
+            f"ALTER DATABASE {ident(self.template)} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false;\n")
+        return time.perf_counter() - t0
+
+    def is_current(self, files: List[str]) -> bool:
+        return self.comment(self.template) == f"{COMMENT_PREFIX} template {fingerprint(files)}"
+
+    def clone(self, name: str) -> float:
+        if not self.exists(self.template):
+            raise RuntimeError(f"template database {self.template} does not exist, run build first")
+        strategy = " STRATEGY FILE_COPY" if self.server_version >= 150000 else ""
+        t0 = time.perf_counter()
+        self.admin.run(
+            f"CREATE DATABASE {ident(name)} TEMPLATE {ident(self.template)}{strategy};\n"
+            f"COMMENT ON DATABASE {ident(name)} IS {literal(f'{COMMENT_PREFIX} clone of {self.template}')};\n")
+        return time.perf_counter() - t0
+
+    def clones(self) -> List[str]:
+        out = self.admin.run(
+            "SELECT datname FROM pg_database "
+            f"WHERE shobj_description(oid, 'pg_database') = {literal(f'{COMMENT_PREFIX} clone of {self.template}')} "
+            "ORDER BY datname;\n")
+        return [line for line in out.splitlines() if line]
+
+    @contextlib.contextmanager
+    def fixture(self, name: str) -> Iterator[str]:
+        """A fresh clone for the duration of the block."""
+        self.clone(name)
+        try:
+            yield name
+        finally:
+            self.drop(name)
+
+
+def source_files(args) -> List[str]:
+    files = [args.dump] if args.dump else sorted(glob.glob(os.path.join(args.migrations, "*.sql")))
+    files += args.extra or []
+    if not files:
+        raise SystemExit(f"no SQL files found in {args.migrations}")
+    return [os.path.abspath(f) for f in files]
+
+
+def wait_healthy(url: str, timeout: float, proc: subprocess.Popen) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=2) as r:
+                if r.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def stop(procs: List[subprocess.Popen]):
+    for p in procs:
+        if p.poll() is None:
+            os.killpg(p.pid, signal.SIGTERM)
+    for p in procs:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(p.pid, signal.SIGKILL)
+
+
+def run_worker(fm: FixtureManager, args, index: int, workdir: str) -> Dict[str, object]:
+    name = f"{fm.template}_{os.getpid()}_{index}"
+    port = args.base_port + index
+    reports = os.path.join(workdir, name, "reports")
+    os.makedirs(reports, exist_ok=True)
+    env = {
+        **os.environ,
+        "DB_NAME": name,
+        "PORT": str(port),
+        "REPORTS_PATH": reports,
+        "BASE": f"http://localhost:{port}/api",
+        "TASK_DATE": args.task_date,
+        "FIXTURE_WORKER": str(index),
+    }
+    result: Dict[str, object] = {"worker": index, "database": name, "port": port}
+    result["clone_ms"] = round(fm.clone(name) * 1000)
+    procs: List[subprocess.Popen] = []
+    try:
+        with open(os.path.join(workdir, name, "server.log"), "w", encoding="utf_8") as log:
+            for cmd in args.server:
+                procs.append(subprocess.Popen(shlex.split(cmd), cwd=args.server_cwd, env=env, stdout=log,
+                                              stderr=subprocess.STDOUT, start_new_session=True))
+            if procs and not wait_healthy(f"http://localhost:{port}/api/health", args.start_timeout, procs[0]):
+                result["error"] = f"server did not become healthy, see {log.name}"
+                return result
+            t0 = time.perf_counter()
+            p = subprocess.run(args.command, env=env)
+            result["exit"] = p.returncode
+            result["run_s"] = round(time.perf_counter() - t0, 1)
+    finally:
+        stop(procs)
+        if not args.keep:
+            fm.drop(name)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template-database fixtures for isolated test and benchmark runs")
+    parser.add_argument("--db-host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--db-port", default=os.getenv("DB_PORT", "5432"))
+    parser.add_argument("--db-user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--db-password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--maintenance-db", default="postgres", help="Database to connect to for CREATE/DROP DATABASE")
+    parser.add_argument("--template", default=os.getenv("FIXTURE_TEMPLATE", "muayene_template"), help="Template database name")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    for name in ("build", "ensure"):
+        p = sub.add_parser(name, help="Build the template" if name == "build" else "Build the template if the SQL files changed")
+        p.add_argument("--migrations", default=MIGRATIONS_DIR, help="Directory of migration files, run in name order")
+        p.add_argument("--dump", help="Load this dump (e.g. muayenedb.sql) instead of the migrations")
+        p.add_argument("--extra", action="append", metavar="SQL", help="Run after the schema, e.g. a generate_tenant.py sql dump (repeatable)")
+
+    p = sub.add_parser("clone", help="Create clones of the template")
+    p.add_argument("names", nargs="*", help="Clone names (default: <template>_<n>)")
+    p.add_argument("--count", type=int, default=1)
+
+    p = sub.add_parser("drop", help="Drop clones")
+    p.add_argument("names", nargs="*")
+    p.add_argument("--all", action="store_true", help="Drop every clone of the template")
+
+    sub.add_parser("list", help="List clones of the template")
+
+    p = sub.add_parser("run", help="Run a command against per-worker clones and backends")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--server", action="append", default=[], help="Command started per worker in --server-cwd, e.g. \"node app.js\" (repeatable)")
+    p.add_argument("--server-cwd", default=BACKEND_DIR)
+    p.add_argument("--base-port", type=int, default=3100, help="Worker n listens on base-port + n")
+    p.add_argument("--start-timeout", type=float, default=30.0)
+    p.add_argument("--task-date", default=(date.today() + timedelta(days=1)).isoformat(), help="TASK_DATE passed to the command (test_backend.py --task-date)")
+    p.add_argument("--keep", action="store_true", help="Keep the clones and server logs")
+    p.add_argument("command", nargs=argparse.REMAINDER, help="Client command after --")
+    args = parser.parse_args()
+
+    fm = FixtureManager(args.db_host, args.db_port, args.db_user, args.db_password, args.template, args.maintenance_db)
+    try:
+        if args.cmd in ("build", "ensure"):
+            files = source_files(args)
+            if args.cmd == "ensure" and fm.is_current(files):
+                print(f"{args.template} is up to date")
+            else:
+                print(f"Building {args.template} from {len(files)} files", file=sys.stderr)
+                print(f"{args.template} built in {fm.build(files):.1f}s")
+        elif args.cmd == "clone":
+            names = args.names or [f"{args.template}_{i}" for i in range(1, args.count + 1)]
+            for name in names:
+                print(f"{name} {fm.clone(name) * 1000:.0f} ms")
+        elif args.cmd == "drop":
+            names = fm.clones() if args.all else args.names
+            for name in names:
+                fm.drop(name)
+                print(f"dropped {name}")
+        elif args.cmd == "list":
+            for name in fm.clones():
+                print(name)
+        elif args.cmd == "run":
+            if args.command and args.command[0] == "--":
+                args.command = args.command[1:]
+            if not args.command:
+                parser.error("run needs a command after --")
+            workdir = tempfile.mkdtemp(prefix="muayene-fixture-")
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                results = list(pool.map(lambda i: run_worker(fm, args, i, workdir), range(args.workers)))
+            for r in results:
+                print(f"worker {r['worker']} {r['database']} (cloned in {r['clone_ms']} ms) port {r['port']}: "
+                      + (f"exit {r['exit']} in {r['run_s']}s" if r.get("exit") is not None else r.get("error", "failed")))
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+            else:
+                print(f"Logs and reports kept in {workdir}")
+            sys.exit(0 if all(r.get("exit") == 0 for r in results) else 1)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"psql failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
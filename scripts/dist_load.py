@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Multi-process (and multi-machine) load runner for the BackendTester flow.
+
+One Python process stops scaling long before the Express API does: the GIL
+and per-process socket handling cap how many virtual users a thread pool can
+drive. This runner splits the virtual users across worker processes on every
+core, and optionally across agents on other machines, so the numbers reflect
+the server rather than the load generator.
+
+Every worker is a load_backend.LoadRunner whose per-step latencies go into a
+histogram.LatencyHistogram instead of a list. When the run ends the workers
+ship their histograms (a few hundred integers per step) to the coordinator,
+which adds them up and prints the same table as load_backend.py. All workers
+start at one wall-clock instant chosen by the coordinator, so keep the
+machines' clocks in sync (NTP) when using agents.
+
+Agents listen on plain TCP with no encryption, so only run them on a trusted
+LAN. Both sides need the same --secret (or DIST_LOAD_SECRET); an agent will
+not start without one. The secret itself is never sent: each connection
+starts with a fresh nonce from the agent, and the coordinator signs the job
+with HMAC-SHA256 over that nonce. The coordinator refuses agents that do not
+ask for this signature.
+
+Usage:
+  python scripts/dist_load.py --users 200 --duration 120
+  DIST_LOAD_SECRET=... python scripts/dist_load.py --users 400 --duration 300 --procs 8 \
+    --remote 10.0.0.21:7700,10.0.0.22:7700 --out dist.json
+
+  # on each load machine
+  DIST_LOAD_SECRET=... python scripts/dist_load.py --listen 0.0.0.0:7700 --procs 16
+
+Requires: pip install requests
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from histogram import LatencyHistogram
+from load_backend import LoadRunner, format_table
+from test_backend import StepResult, TokenCache
+
+
+class HistogramStepStats:
+    """Drop-in for load_backend.StepStats that keeps a histogram instead of every sample."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.failed = 0
+        self.hist = LatencyHistogram()
+
+    def add(self, result: StepResult):
+        self.count += 1
+        if not result.success:
+            self.failed += 1
+        if result.elapsed_ms is not None:
+            self.hist.record_ms(result.elapsed_ms)
+
+    def merge(self, other: "HistogramStepStats"):
+        self.count += other.count
+        self.failed += other.failed
+        self.hist.merge(other.hist)
+
+    def summary(self, wall_s: float) -> Dict[str, Any]:
+        h = self.hist
+
+        def r(v):
+            return round(v, 2) if v is not None else None
+
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "throughput_rps": round(self.count / wall_s, 3) if wall_s > 0 else None,
+            "mean_ms": r(h.mean_ms()),
+            "p50_ms": r(h.percentile_ms(50)),
+            "p95_ms": r(h.percentile_ms(95)),
+            "p99_ms": r(h.percentile_ms(99)),
+            "max_ms": r(h.percentile_ms(100)),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "failed": self.failed, "histogram": self.hist.to_dict()}
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "HistogramStepStats":
+        st = cls(name)
+        st.count = data["count"]
+        st.failed = data["failed"]
+        st.hist = LatencyHistogram.from_dict(data["histogram"])
+        return st
+
+
+class HistogramLoadRunner(LoadRunner):
+    stats_class = HistogramStepStats
+
+    def snapshot(self, wall_s: float) -> Dict[str, Any]:
+        """Everything the coordinator needs to merge this worker into the global report."""
+        return {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "users": self.users,
+            "wall_s": round(wall_s, 3),
+            "iterations": self.iterations_done,
+            "iterations_failed": self.iterations_failed,
+            "step_order": self.step_order,
+            "steps": {name: self.stats[name].to_dict() for name in self.step_order},
+            **(self.token_cache.stats() if self.token_cache is not None else {}),
+        }
+
+
+def run_worker(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker process entry point: wait for the shared start instant, run, return a snapshot."""
+    delay = job["start_at"] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    runner = HistogramLoadRunner(job["api"], job["email"], job["password"], job["users"],
+                                 iterations=job.get("iterations"), duration=job.get("duration"),
+                                 ramp_up=job.get("ramp_up", 0.0), continue_on_error=job.get("continue_on_error", False),
+                                 token_cache=TokenCache() if job.get("token_cache") else None)
+    t0 = time.perf_counter()
+    runner.run()
+    return runner.snapshot(time.perf_counter() - t0)
+
+
+def split(total: int, weights: List[int]) -> List[int]:
+    """Distribute ``total`` users proportionally to ``weights`` (largest remainder)."""
+    wsum = sum(weights)
+    exact = [total * w / wsum for w in weights]
+    shares = [int(x) for x in exact]
+    for i in sorted(range(len(weights)), key=lambda i: exact[i] - shares[i], reverse=True)[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def run_local(job: Dict[str, Any], procs: int) -> List[Dict[str, Any]]:
+    """Spread job["users"] over up to ``procs`` worker processes on this machine."""
+    shares = [n for n in split(job["users"], [1] * max(procs, 1)) if n > 0]
+    if not shares:
+        return []
+    with ProcessPoolExecutor(max_workers=len(shares)) as pool:
+        return list(pool.map(run_worker, [{**job, "users": n} for n in shares]))
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine worker snapshots into a load_backend-style report plus merged histograms."""
+    stats: Dict[str, HistogramStepStats] = {}
+    order: List[str] = []
+    for snap in snapshots:
+        for name in snap["step_order"]:
+            st = HistogramStepStats.from_dict(name, snap["steps"][name])
+            if name in stats:
+                stats[name].merge(st)
+            else:
+                stats[name] = st
+                order.append(name)
+    # Workers start together, so the slowest one bounds the run
+    wall_s = max((s["wall_s"] for s in snapshots), default=0.0)
+    iterations = sum(s["iterations"] for s in snapshots)
+    # Token caches are per worker process, so every worker logs in at least once
+    cache = {k: sum(s.get(k, 0) for s in snapshots) for k in ("logins", "token_cache_hits") if any(k in s for s in snapshots)}
+    return {
+        "users": sum(s["users"] for s in snapshots),
+        "wall_s": wall_s,
+        "iterations": iterations,
+        "iterations_failed": sum(s["iterations_failed"] for s in snapshots),
+        "iterations_per_s": round(iterations / wall_s, 3) if wall_s > 0 else None,
+        "steps": {name: stats[name].summary(wall_s) for name in order},
+        "workers": [{k: s[k] for k in ("host", "pid", "users", "wall_s", "iterations", "iterations_failed")} for s in snapshots],
+        "histograms": {name: stats[name].hist.to_dict() for name in order},
+        **cache,
+    }
+
+
+def _parse_addr(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+
+def _send(fp, obj: Dict[str, Any]):
+    fp.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+    fp.flush()
+
+
+def _recv(fp) -> Dict[str, Any]:
+    line = fp.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    return json.loads(line)
+
+
+def _sign(secret: str, nonce: str, job: Dict[str, Any]) -> str:
+    payload = nonce.encode("utf-8") + json.dumps(job, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+
+
+class AgentHandler(socketserver.StreamRequestHandler):
+    """Protocol: agent sends {"procs", "nonce"}, coordinator sends {"job", "mac"}, agent replies {"workers": [...]}."""
+
+    def handle(self):
+        nonce = secrets.token_hex(16)
+        _send(self.wfile, {"procs": self.server.procs, "host": socket.gethostname(), "nonce": nonce})
+        msg = _recv(self.rfile)
+        job = msg.get("job")
+        if not isinstance(job, dict) or not hmac.compare_digest(str(msg.get("mac", "")), _sign(self.server.secret, nonce, job)):
+            print(f"{self.client_address[0]}: rejected (bad signature)", file=sys.stderr)
+            _send(self.wfile, {"error": "invalid secret"})
+            return
+        print(f"{self.client_address[0]}: {job['users']} users", file=sys.stderr)
+        try:
+            _send(self.wfile, {"workers": run_local(job, self.server.procs)})
+        except Exception as e:
+            _send(self.wfile, {"error": str(e)})
+
+
+def serve_agent(listen: str, procs: int, secret: str):
+    server = socketserver.ThreadingTCPServer(_parse_addr(listen), AgentHandler)
+    server.daemon_threads = True
+    server.procs = procs
+    server.secret = secret
+    print(f"Agent listening on {listen} with {procs} worker processes", file=sys.stderr)
+    server.serve_forever()
+
+
+class RemoteAgent:
+    def __init__(self, addr: str, secret: str, connect_timeout: float = 10.0):
+        self.addr = addr
+        self.secret = secret
+        self.sock = socket.create_connection(_parse_addr(addr), timeout=connect_timeout)
+        self.sock.settimeout(None)
+        self.fp = self.sock.makefile("rwb")
+        hello = _recv(self.fp)
+        if not hello.get("nonce"):
+            self.sock.close()
+            raise RuntimeError(f"{addr}: agent does not require a secret, refusing to send it a job")
+        self.nonce = hello["nonce"]
+        self.procs = int(hello["procs"])
+
+    def run(self, job: Dict[str, Any]) -> List[Dict[str, Any]]:
+        try:
+            _send(self.fp, {"job": job, "mac": _sign(self.secret, self.nonce, job)})
+            reply = _recv(self.fp)
+        finally:
+            self.sock.close()
+        if "error" in reply:
+            raise RuntimeError(f"{self.addr}: {reply['error']}")
+        return reply["workers"]
+
+
+def coordinate(args) -> Dict[str, Any]:
+    agents = [RemoteAgent(a, args.secret) for a in args.remote.split(",") if a] if args.remote else []
+    weights = [args.procs] + [a.procs for a in agents]
+    shares = split(args.users, weights)
+    base = {
+        "api": args.api, "email": args.email, "password": args.password,
+        "iterations": args.iterations, "duration": args.duration,
+        "ramp_up": args.ramp_up, "continue_on_error": args.continue_on_error,
+        "token_cache": args.token_cache,
+        "start_at": time.time() + args.start_delay,
+    }
+    print(f"Load testing {args.api} with {args.users} users: local={shares[0]} "
+          + " ".join(f"{a.addr}={n}" for a, n in zip(agents, shares[1:])), file=sys.stderr)
+
+    snapshots: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=len(agents) + 1) as pool:
+        futures = [pool.submit(run_local, {**base, "users": shares[0]}, args.procs)]
+        futures += [pool.submit(a.run, {**base, "users": n}) for a, n in zip(agents, shares[1:])]
+        for f in futures:
+            snapshots.extend(f.result())
+    return merge_snapshots(snapshots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed load generator for the backend E2E flow")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--users", type=int, default=10, help="Total concurrent virtual users across all workers")
+    parser.add_argument("--iterations", type=int, help="Flow iterations per virtual user")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds (iterations in flight are finished)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which each worker starts its virtual users")
+    parser.add_argument("--continue-on-error", action="store_true", help="Keep running the remaining steps of an iteration after a failure")
+    parser.add_argument("--token-cache", action="store_true", help="Reuse JWTs across iterations and users of each worker process")
+    parser.add_argument("--procs", type=int, default=os.cpu_count() or 1, help="Worker processes on this machine")
+    parser.add_argument("--remote", help="Comma-separated agent addresses host:port")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="Run as an agent for a remote coordinator")
+    parser.add_argument("--secret", default=os.getenv("DIST_LOAD_SECRET", ""), help="Shared secret between coordinator and agents")
+    parser.add_argument("--start-delay", type=float, default=2.0, help="Seconds between dispatch and the common start instant")
+    parser.add_argument("--out", help="Write the JSON report (with merged histograms) to this file")
+    args = parser.parse_args()
+    if (args.listen or args.remote) and not args.secret:
+        parser.error("--listen and --remote need --secret (or DIST_LOAD_SECRET)")
+
+    if args.listen:
+        serve_agent(args.listen, args.procs, args.secret)
+        return
+    if args.iterations is None and args.duration is None:
+        args.iterations = 1
+
+    report = coordinate(args)
+    print(format_table(report))
+    print(f"workers={len(report['workers'])} hosts={len({w['host'] for w in report['workers']})}")
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["iterations_failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
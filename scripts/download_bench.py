@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Verify and benchmark report PDF downloads, including HTTP Range requests.
+
+For every report the authenticated (/reports/{id}/download?signed=true)
+and public (/reports/public/{qrToken}/download) URLs are checked first:
+
+  * full download, streamed in chunks and hashed as it arrives, with the
+    size checked against Content-Length and the hash of each of --parts
+    equal slices kept on the side;
+  * the same slices fetched concurrently with Range headers, each of which
+    must come back 206 with a matching Content-Range, length and hash;
+  * a suffix range (last 1 KB) and an unsatisfiable range (expects 416);
+  * both URLs must deliver the same bytes.
+
+Then every URL is downloaded by --concurrency clients in a loop for
+--duration seconds, each client on its own keep-alive session, and the
+aggregate MB/s plus TTFB and total time percentiles are reported per level.
+This is the number to size bandwidth for customers pulling signed reports
+at month end.
+
+Usage:
+  python scripts/download_bench.py --reports 5 --concurrency 1,8,32 --duration 20
+  python scripts/download_bench.py --report-ids 12,13 --parts 8 --out downloads.json
+
+Requires: pip install requests
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from load_backend import percentile
+from test_backend import BackendTester
+
+
+class PartHasher:
+    """Hash a stream in fixed-size slices by offset, so Range responses can be checked later."""
+
+    def __init__(self, part_size: int):
+        self.part_size = part_size
+        self.digests: List[str] = []
+        self._cur = hashlib.sha256()
+        self._fill = 0
+
+    def __call__(self, chunk: bytes):
+        view = memoryview(chunk)
+        while view:
+            take = min(len(view), self.part_size - self._fill)
+            self._cur.update(view[:take])
+            self._fill += take
+            view = view[take:]
+            if self._fill == self.part_size:
+                self.digests.append(self._cur.hexdigest())
+                self._cur = hashlib.sha256()
+                self._fill = 0
+
+    def finish(self) -> List[str]:
+        if self._fill:
+            self.digests.append(self._cur.hexdigest())
+            self._fill = 0
+        return self.digests
+
+
+def build_signed_reports(api: str, email: str, password: str, count: int, concurrency: int) -> List[int]:
+    def one(_):
+        t = BackendTester(api, email, password)
+        return t.report_id if t.run_through(t.step_sign_report_with_technician) else None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [i for i in pool.map(one, range(count)) if i]
+
+
+def targets_for(t: BackendTester, token: str, report_ids: List[int]) -> List[Dict[str, Any]]:
+    """The authenticated and public download URL of every report."""
+    out = []
+    for rid in report_ids:
+        out.append({"name": f"report_{rid}", "path": f"/reports/{rid}/download", "params": {"signed": "true"}, "token": token})
+        r = t.request("GET", f"/reports/{rid}", token=token)
+        qr = r.json()["data"].get("qr_token") if r.status_code == 200 else None
+        if qr:
+            out.append({"name": f"public_{rid}", "path": f"/reports/public/{qr}/download", "params": {}, "token": None})
+    t.drain_calls()
+    return out
+
+
+def _ranged(t: BackendTester, target: Dict[str, Any], spec: str):
+    return t.download(target["path"], token=target["token"], params=target["params"], headers={"Range": f"bytes={spec}"})
+
+
+def verify(api: str, target: Dict[str, Any], parts: int) -> Dict[str, Any]:
+    t = BackendTester(api, "", "")
+    problems: List[str] = []
+    # Size first, so slice boundaries are known while the full body streams by
+    _, probe = _ranged(t, target, "0-0")
+    size = int(probe.content_range.rsplit("/", 1)[1]) if probe.status == 206 and probe.content_range else None
+    if size is None:
+        problems.append(f"range probe: HTTP {probe.status}, Content-Range {probe.content_range!r}")
+    part_size = max(1, -(-(size or 1) // parts))
+    hasher = PartHasher(part_size)
+    _, full = t.download(target["path"], token=target["token"], params=target["params"], on_chunk=hasher)
+    part_hashes = hasher.finish()
+    if full.status != 200 or not full.head.startswith(b"%PDF"):
+        problems.append(f"full download: HTTP {full.status}, head {full.head!r}")
+    if not full.complete:
+        problems.append(f"full download: {full.bytes} bytes, Content-Length {full.content_length}")
+    if size is not None and size != full.bytes:
+        problems.append(f"range total {size} != downloaded {full.bytes}")
+
+    if size:
+        spans = [(i, i * part_size, min(size, (i + 1) * part_size) - 1) for i in range(len(part_hashes))]
+
+        def fetch(span: Tuple[int, int, int]):
+            i, a, b = span
+            _, dl = _ranged(BackendTester(api, "", ""), target, f"{a}-{b}")
+            expected_range = f"bytes {a}-{b}/{size}"
+            if dl.status != 206 or dl.content_range != expected_range or dl.bytes != b - a + 1:
+                return f"part {i}: HTTP {dl.status}, {dl.content_range!r}, {dl.bytes} bytes"
+            if dl.sha256 != part_hashes[i]:
+                return f"part {i}: hash mismatch"
+            return None
+
+        with ThreadPoolExecutor(max_workers=len(spans)) as pool:
+            problems += [p for p in pool.map(fetch, spans) if p]
+
+        _, tail = _ranged(t, target, "-1024")
+        if tail.status != 206 or tail.bytes != min(1024, size):
+            problems.append(f"suffix range: HTTP {tail.status}, {tail.bytes} bytes")
+        _, beyond = _ranged(t, target, f"{size}-")
+        if beyond.status != 416:
+            problems.append(f"unsatisfiable range: HTTP {beyond.status} (expected 416)")
+    return {"target": target["name"], "bytes": full.bytes, "sha256": full.sha256, "parts": len(part_hashes), "problems": problems}
+
+
+def bench_level(api: str, targets: List[Dict[str, Any]], concurrency: int, duration: float) -> Dict[str, Any]:
+    ttfb: List[float] = []
+    total: List[float] = []
+    moved = [0]
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        t = BackendTester(api, "", "")
+        k = index
+        while time.perf_counter() < deadline:
+            target = targets[k % len(targets)]
+            k += 1
+            try:
+                _, dl = t.download(target["path"], token=target["token"], params=target["params"])
+                ok = dl.status == 200 and dl.complete
+            except Exception:
+                ok = False
+            calls = t.drain_calls()
+            with lock:
+                if not ok:
+                    errors[0] += 1
+                    continue
+                c = calls[-1]
+                ttfb.append(c.ttfb_ms)
+                total.append(c.total_ms)
+                moved[0] += c.response_bytes
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    def r(v: Optional[float]) -> Optional[float]:
+        return round(v, 2) if v is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "downloads": len(total),
+        "errors": errors[0],
+        "wall_s": round(wall, 3),
+        "mb_per_s": round(moved[0] / 2**20 / wall, 2) if wall > 0 else None,
+        "downloads_per_s": round(len(total) / wall, 2) if wall > 0 else None,
+        "ttfb_p50_ms": r(percentile(ttfb, 50)),
+        "ttfb_p95_ms": r(percentile(ttfb, 95)),
+        "total_p50_ms": r(percentile(total, 50)),
+        "total_p95_ms": r(percentile(total, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamed, range-aware report download verification and benchmark")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--reports", type=int, default=3, help="Signed reports to build when --report-ids is not given")
+    parser.add_argument("--report-ids", help="Comma-separated existing (signed) report IDs")
+    parser.add_argument("--parts", type=int, default=4, help="Slices fetched concurrently with Range during verification")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent download clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--no-bench", action="store_true", help="Only run the verification")
+    parser.add_argument("--out", help="Write verification and benchmark results as JSON")
+    args = parser.parse_args()
+
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+    if args.report_ids:
+        report_ids = [int(x) for x in args.report_ids.split(",") if x.strip()]
+    else:
+        print(f"Building {args.reports} signed reports...", file=sys.stderr)
+        report_ids = build_signed_reports(args.api, args.email, args.password, args.reports, min(args.reports, 4))
+    targets = targets_for(admin, admin.token_admin, report_ids)
+    if not targets:
+        print("No reports to download", file=sys.stderr)
+        sys.exit(1)
+
+    checks = [verify(args.api, target, args.parts) for target in targets]
+    by_report: Dict[str, set] = {}
+    for c in checks:
+        by_report.setdefault(c["target"].split("_", 1)[1], set()).add(c["sha256"])
+    for rid, hashes in by_report.items():
+        if len(hashes) > 1:
+            next(c for c in checks if c["target"] == f"public_{rid}")["problems"].append("public and authenticated downloads differ")
+    for c in checks:
+        status = "OK" if not c["problems"] else "FAIL"
+        print(f"{status:<4} {c['target']:<16} {c['bytes']:>10} bytes  {c['sha256'][:16]}  " + "; ".join(c["problems"]))
+
+    levels = []
+    if not args.no_bench:
+        print(f"\n{'conc':>5} {'dl':>7} {'err':>5} {'MB/s':>8} {'dl/s':>8} {'ttfb50':>8} {'ttfb95':>8} {'tot50':>8} {'tot95':>8}")
+        for conc in [int(x) for x in args.concurrency.split(",") if x]:
+            row = bench_level(args.api, targets, conc, args.duration)
+            levels.append(row)
+            print(f"{row['concurrency']:>5} {row['downloads']:>7} {row['errors']:>5} {row['mb_per_s'] or 0:>8} {row['downloads_per_s'] or 0:>8} "
+                  f"{row['ttfb_p50_ms'] or 0:>8} {row['ttfb_p95_ms'] or 0:>8} {row['total_p50_ms'] or 0:>8} {row['total_p95_ms'] or 0:>8}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps({"verification": checks, "benchmark": levels}, indent=2, ensure_ascii=False))
+    failed = any(c["problems"] for c in checks) or any(r["errors"] for r in levels)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic tenant (customers, equipment, offers, work orders,
+inspections, photos, reports) for scale testing the list endpoints.
+
+Two modes:
+
+  api  Drives the same REST calls BackendTester uses (customer-companies,
+       equipment, offers → approve → convert-to-work-order, inspections,
+       photo upload) at a configurable rate. Realistic but slow, and bounded
+       by convert-to-work-order's 120-day slot search for the creating user,
+       so keep it to thousands of inspections.
+
+  sql  Writes a psql script of COPY blocks for the schema in
+       backend/config/migrations (001 + 003/005/007/008/009). Loading it is
+       orders of magnitude faster than the REST path and scales to
+       50k customers / 500k inspections. Rows get explicit IDs starting at
+       --id-offset and the sequences are moved past them at the end. Extra
+       technicians are generated so every inspection gets a free
+       (technician, date, start, end) slot; they log in with "password".
+       Photo URLs are references only, no image files are written.
+
+Usage:
+  python scripts/generate_tenant.py sql --customers 50000 --inspections 500000 \
+    --out tenant.sql && psql -d muayenedb -f tenant.sql
+  python scripts/generate_tenant.py api --customers 200 --inspections 2000 --rate 20
+
+Requires: pip install requests (api mode only)
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List
+
+from create_example_equipment import EQUIPMENT_TYPES, build_random_template
+
+# bcrypt hash of "password", same as the seed users in 002_seed_data.sql
+SEED_PASSWORD_HASH = "$2a$10$92IXUNpkjO0rOQ5byMi.Ye4oKoEa3Ro9llC/.og/at2.uheWG/igi"
+TECHNICIAN_PERMISSIONS = [
+    "viewMyWorkOrders", "viewMyInspections", "viewInspections", "editInspection",
+    "saveInspection", "completeInspection", "uploadPhotos", "viewReports",
+    "downloadReports", "signReports",
+]
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Kocaeli", "Antalya", "Konya", "Adana"]
+SECTORS = ["İnşaat", "Lojistik", "Gıda", "Otomotiv", "Tekstil", "Enerji", "Metal", "Kimya"]
+STATUS_WEIGHTS = [("completed", 0.6), ("in_progress", 0.15), ("not_started", 0.25)]
+SLOT_HOURS = list(range(9, 17))  # one-hour slots 09:00-17:00
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads; rate <= 0 disables it."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.perf_counter()
+
+    def wait(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.perf_counter()
+            slot = max(self._next, now)
+            self._next = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _pick_status(rng: random.Random) -> str:
+    x = rng.random()
+    for status, weight in STATUS_WEIGHTS:
+        if x < weight:
+            return status
+        x -= weight
+    return STATUS_WEIGHTS[-1][0]
+
+
+def _photo_fields(template: Dict[str, Any]) -> List[str]:
+    return [s["field"] for s in template.get("sections", []) if s.get("type") == "photos"]
+
+
+def _inspection_data(template: Dict[str, Any], rng: random.Random, photos: List[str]) -> Dict[str, Any]:
+    """Plausible answers for every template field, with photo URLs under the photo fields."""
+    data: Dict[str, Any] = {}
+    for s in template.get("sections", []):
+        st = s.get("type")
+        if st == "key_value":
+            for it in s["items"]:
+                vt = it.get("valueType", "text")
+                if vt == "number":
+                    data[it["name"]] = rng.randint(1, 500)
+                elif vt == "date":
+                    data[it["name"]] = (date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))).isoformat()
+                elif vt == "select":
+                    data[it["name"]] = rng.choice(it["options"])["value"]
+                else:
+                    data[it["name"]] = f"Değer {rng.randint(1, 9999)}"
+        elif st == "checklist":
+            for q in s["questions"]:
+                data[q["name"]] = rng.choice(q["options"])
+        elif st == "table":
+            data[s["field"]] = [
+                {c["name"]: f"{c['label']} {r}" for c in s["columns"]} for r in range(rng.randint(0, 5))
+            ]
+        elif st == "notes":
+            data[s["field"]] = "Otomatik üretilmiş not"
+    fields = _photo_fields(template)
+    if fields and photos:
+        data[fields[0]] = photos
+    return data
+
+
+# ---------- SQL (COPY) mode ----------
+
+def _copy_value(v: Any) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    if isinstance(v, (dict, list)):
+        v = json.dumps(v, ensure_ascii=False)
+    s = str(v)
+    return s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class CopyWriter:
+    def __init__(self, fp):
+        self.fp = fp
+        self.counts: Dict[str, int] = {}
+
+    def table(self, name: str, columns: List[str], rows: Iterable[List[Any]]):
+        self.fp.write(f"COPY {name} ({', '.join(columns)}) FROM stdin;\n")
+        n = 0
+        for row in rows:
+            self.fp.write("\t".join(_copy_value(v) for v in row))
+            self.fp.write("\n")
+            n += 1
+        self.fp.write("\\.\n\n")
+        self.counts[name] = self.counts.get(name, 0) + n
+
+
+def write_sql(fp, args) -> Dict[str, int]:
+    rng = random.Random(args.seed)
+    off = args.id_offset
+    company = args.company_id
+    creator = args.created_by
+    n_cust, n_eq, n_insp = args.customers, args.equipment, args.inspections
+    per_wo = max(1, args.inspections_per_work_order)
+    n_wo = math.ceil(n_insp / per_wo)
+    start_day = date.fromisoformat(args.start_date)
+    slots_per_tech = args.days * len(SLOT_HOURS)
+    n_tech = max(1, args.technicians, math.ceil(n_insp / slots_per_tech))
+    tag = args.tag
+
+    w = CopyWriter(fp)
+    fp.write("-- Synthetic tenant generated by scripts/generate_tenant.py\n")
+    fp.write(f"-- seed={args.seed} customers={n_cust} equipment={n_eq} inspections={n_insp}\n")
+    fp.write("BEGIN;\n\n")
+
+    w.table("technicians", ["id", "company_id", "name", "surname", "email", "phone", "password_hash", "e_signature_pin", "permissions", "is_active"], (
+        [off + t, company, "Teknisyen", f"{tag}-{t}", f"tech{t}.{tag}@example.com", f"+90 555 {t:07d}",
+         SEED_PASSWORD_HASH, "123456", TECHNICIAN_PERMISSIONS, True]
+        for t in range(n_tech)
+    ))
+
+    w.table("customer_companies", ["id", "company_id", "name", "tax_number", "address", "contact", "email", "authorized_person"], (
+        [off + c, company, f"{rng.choice(SECTORS)} {rng.choice(CITIES)} A.Ş. {tag}-{c}", f"8{tag}{c:09d}",
+         f"{rng.choice(CITIES)} OSB {c} Sk.", f"+90 212 {c:07d}", f"musteri{c}.{tag}@example.com", f"Yetkili {c}"]
+        for c in range(n_cust)
+    ))
+
+    templates: List[Dict[str, Any]] = []
+    eq_rows = []
+    for e in range(n_eq):
+        tpl = build_random_template(rng)
+        templates.append(tpl)
+        eq_rows.append([off + e, company, f"Ekipman {tag}-{e:06d}", rng.choice(EQUIPMENT_TYPES), tpl, True])
+    w.table("equipment", ["id", "company_id", "name", "type", "template", "is_active"], eq_rows)
+
+    # One offer per work order; the offer's items are exactly that work order's inspections
+    wo_equipment: List[List[int]] = []
+    wo_customer: List[int] = []
+
+    def offers():
+        for o in range(n_wo):
+            cust = rng.randrange(n_cust)
+            eqs = [rng.randrange(n_eq) for _ in range(min(per_wo, n_insp - o * per_wo))]
+            wo_equipment.append(eqs)
+            wo_customer.append(cust)
+            items = [{"equipmentId": off + e, "equipmentName": f"Ekipman {tag}-{e:06d}", "quantity": 1, "unitPrice": 1000} for e in eqs]
+            yield [off + o, company, f"OFFER-{tag}-{o:07d}", off + cust, "approved", items, None,
+                   1000 * len(eqs), f"{tag}{o:056x}", creator, creator]
+
+    w.table("offers", ["id", "company_id", "offer_number", "customer_company_id", "status", "items", "notes",
+                       "total_amount", "tracking_token", "created_by", "approved_by"], offers())
+
+    def wo_day(o: int) -> date:
+        return start_day + timedelta(days=(o * per_wo // n_tech) // len(SLOT_HOURS))
+
+    w.table("work_orders", ["id", "company_id", "work_order_number", "customer_company_id", "offer_id", "status",
+                            "notes", "created_by", "opening_date", "task_start_date", "task_end_date"], (
+        [off + o, company, f"WO-{tag}-{o:07d}", off + wo_customer[o], off + o, rng.choice(["not_started", "in_progress", "completed"]),
+         None, creator, (wo_day(o) - timedelta(days=7)).isoformat(), wo_day(o).isoformat(), (wo_day(o) + timedelta(days=1)).isoformat()]
+        for o in range(n_wo)
+    ))
+
+    completed: List[int] = []
+
+    def inspections():
+        j = 0
+        for o, eqs in enumerate(wo_equipment):
+            for e in eqs:
+                tech = j % n_tech
+                slot = j // n_tech
+                day = start_day + timedelta(days=slot // len(SLOT_HOURS))
+                hour = SLOT_HOURS[slot % len(SLOT_HOURS)]
+                status = _pick_status(rng)
+                photos = []
+                if status != "not_started":
+                    photos = [f"/uploads/inspections/{off + j}/gen_{p}.jpg" for p in range(rng.randint(0, args.max_photos))]
+                data = _inspection_data(templates[e], rng, photos) if status != "not_started" else {}
+                if status == "completed":
+                    completed.append(j)
+                yield [off + j, off + o, off + e, off + tech, day.isoformat(), f"{hour:02d}:00", f"{hour + 1:02d}:00",
+                       status, data, photos, f"INSP-{tag}-{j:09d}"]
+                j += 1
+
+    w.table("inspections", ["id", "work_order_id", "equipment_id", "technician_id", "inspection_date", "start_time",
+                            "end_time", "status", "inspection_data", "photo_urls", "inspection_number"], inspections())
+
+    w.table("reports", ["id", "inspection_id", "is_signed", "qr_token", "report_style"], (
+        [off + k, off + j, False, f"{tag}{j:024x}", {"scale": "medium"}]
+        for k, j in enumerate(completed)
+    ))
+
+    for table in ("technicians", "customer_companies", "equipment", "offers", "work_orders", "inspections", "reports"):
+        fp.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}));\n")
+    fp.write("\nCOMMIT;\nANALYZE;\n")
+    return w.counts
+
+
+# ---------- API mode ----------
+
+def run_api(args) -> Dict[str, Any]:
+    from test_backend import BackendTester, tiny_png_bytes, unique_suffix
+
+    rng = random.Random(args.seed)
+    limiter = RateLimiter(args.rate)
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    token = admin.token_admin
+    if not token:
+        raise RuntimeError("admin login failed")
+
+    local = threading.local()
+    lock = threading.Lock()
+    stats: Dict[str, Any] = {"customers": 0, "equipment": 0, "work_orders": 0, "inspections": 0, "photos": 0, "errors": {}}
+
+    def tester() -> BackendTester:
+        # One session per worker thread, all sharing the admin token
+        t = getattr(local, "tester", None)
+        if t is None:
+            t = local.tester = BackendTester(args.api, args.email, args.password)
+        return t
+
+    def call(method: str, path: str, **kwargs):
+        limiter.wait()
+        t = tester()
+        r = t.request(method, path, token=token, **kwargs)
+        t.drain_calls()
+        if r.status_code // 100 != 2:
+            with lock:
+                key = f"{method} {path.split('/')[1]} {r.status_code}"
+                stats["errors"][key] = stats["errors"].get(key, 0) + 1
+            return None
+        return r.json().get("data")
+
+    def bump(key: str, n: int = 1):
+        with lock:
+            stats[key] += n
+
+    def make_customer(_):
+        uniq = unique_suffix()
+        d = call("POST", "/customer-companies", json={
+            "name": f"{rng.choice(SECTORS)} {rng.choice(CITIES)} {uniq}", "email": f"gen{uniq}@example.com",
+            "taxNumber": f"8{uniq}", "address": "", "contact": "", "authorizedPerson": "",
+        })
+        if d:
+            bump("customers")
+            return d["id"]
+        return None
+
+    def make_equipment(_):
+        tpl = build_random_template(random.Random(rng.random()))
+        d = call("POST", "/equipment", json={"name": f"Ekipman {unique_suffix()}", "type": rng.choice(EQUIPMENT_TYPES), "template": tpl})
+        if d:
+            bump("equipment")
+            return d["id"], tpl
+        return None
+
+    per_wo = max(1, args.inspections_per_work_order)
+    start = date.fromisoformat(args.start_date)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        customers = [c for c in pool.map(make_customer, range(args.customers)) if c]
+        equipment = [e for e in pool.map(make_equipment, range(args.equipment)) if e]
+        if not customers or not equipment:
+            raise RuntimeError("could not create customers/equipment")
+
+        def make_work_order(o: int):
+            eqs = [rng.choice(equipment) for _ in range(per_wo)]
+            offer = call("POST", "/offers", json={
+                "customerCompanyId": rng.choice(customers),
+                "items": [{"equipmentId": e[0], "quantity": 1, "unitPrice": 1000} for e in eqs],
+                "notes": "Üretilmiş teklif",
+            })
+            if not offer or call("POST", f"/offers/{offer['id']}/approve") is None:
+                return
+            # Spread preferred dates so the backend's free-slot search rarely has to walk far
+            day = start + timedelta(days=rng.randrange(args.days))
+            wo = call("POST", f"/offers/{offer['id']}/convert-to-work-order", json={
+                "openingDate": date.today().isoformat(), "taskStartDate": day.isoformat(),
+                "taskEndDate": (day + timedelta(days=1)).isoformat(), "notes": "Üretilmiş iş emri",
+            })
+            if not wo:
+                return
+            bump("work_orders")
+            listing = call("GET", "/inspections", params={"workOrderId": wo["id"]}) or {}
+            for insp, (_, tpl) in zip(listing.get("inspections", []), eqs):
+                bump("inspections")
+                fields = _photo_fields(tpl)
+                n_photos = rng.randint(0, args.max_photos) if fields else 0
+                for p in range(n_photos):
+                    files = {"photos": (f"gen_{p}.png", tiny_png_bytes(), "image/png")}
+                    if call("POST", f"/inspections/{insp['id']}/photos", headers={"Content-Type": None},
+                            files=files, data={"fieldName": fields[0]}) is not None:
+                        bump("photos")
+                call("PUT", f"/inspections/{insp['id']}", json={
+                    "inspectionData": _inspection_data(tpl, rng, []), "status": "in_progress",
+                })
+
+        t0 = time.perf_counter()
+        list(pool.map(make_work_order, range(math.ceil(args.inspections / per_wo))))
+        stats["wall_s"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic tenant for scale testing")
+    parser.add_argument("mode", choices=["api", "sql"])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--equipment", type=int, default=200)
+    parser.add_argument("--inspections", type=int, default=10000)
+    parser.add_argument("--inspections-per-work-order", type=int, default=3)
+    parser.add_argument("--max-photos", type=int, default=6, help="Upper bound of photos per inspection")
+    parser.add_argument("--days", type=int, default=3 * 365, help="Scheduling window in days")
+    parser.add_argument("--start-date", default=date.today().isoformat())
+    parser.add_argument("--seed", type=int, default=1)
+    # sql mode
+    parser.add_argument("--out", default="tenant.sql", help="sql mode: output file ('-' for stdout)")
+    parser.add_argument("--company-id", type=int, default=1, help="sql mode: owning companies.id")
+    parser.add_argument("--technicians", type=int, default=0, help="sql mode: spread inspections over at least this many technicians (schedules stay fully packed)")
+    parser.add_argument("--created-by", type=int, default=2, help="sql mode: technicians.id used as creator/approver")
+    parser.add_argument("--id-offset", type=int, default=1_000_000, help="sql mode: first explicit row id")
+    parser.add_argument("--tag", default=None, help="sql mode: short unique tag for numbers/emails (default: seed)")
+    # api mode
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="api mode: max requests per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    if args.mode == "sql":
+        args.tag = args.tag or f"g{args.seed}"
+        t0 = time.perf_counter()
+        if args.out == "-":
+            counts = write_sql(sys.stdout, args)
+        else:
+            with open(args.out, "w", encoding="utf_8") as f:
+                counts = write_sql(f, args)
+        print(json.dumps({"rows": counts, "wall_s": round(time.perf_counter() - t0, 3)}, indent=2), file=sys.stderr)
+    else:
+        try:
+            print(json.dumps(run_api(args), ensure_ascii=False, indent=2))
+        except RuntimeError as e:
+            print("Error:", e, file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
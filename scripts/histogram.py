@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Compact, mergeable latency histogram (HDR-style log-linear buckets).
+
+Values are recorded in whole microseconds. Below 2**SUB_BUCKET_BITS each
+microsecond has its own bucket; above that every power of two is split into
+2**(SUB_BUCKET_BITS - 1) linear buckets, so any recorded value is reported
+within ~0.8% of its true value whatever its magnitude. Only non-empty
+buckets are stored, which keeps a step with millions of samples to a few
+hundred integers, and two histograms merge by adding counts — so load
+workers can ship them to a coordinator instead of raw latency lists.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+SUB_BUCKET_BITS = 7
+_SUB = 1 << SUB_BUCKET_BITS
+_HALF = _SUB >> 1
+
+
+def bucket_index(value: int) -> int:
+    if value < _SUB:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return _SUB + (shift - 1) * _HALF + ((value >> shift) - _HALF)
+
+
+def bucket_value(index: int) -> float:
+    """Midpoint of the value range covered by bucket ``index``."""
+    if index < _SUB:
+        return float(index)
+    shift = (index - _SUB) // _HALF + 1
+    mantissa = (index - _SUB) % _HALF + _HALF
+    return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) / 2.0
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def record_us(self, value: int, count: int = 1):
+        value = max(int(value), 0)
+        idx = bucket_index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += count
+        self.sum_us += value * count
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+        self.max_us = value if self.max_us is None else max(self.max_us, value)
+
+    def record_ms(self, value: float):
+        self.record_us(round(value * 1000.0))
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.total += other.total
+        self.sum_us += other.sum_us
+        for attr, pick in (("min_us", min), ("max_us", max)):
+            a, b = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, b if a is None else a if b is None else pick(a, b))
+        return self
+
+    def percentile_ms(self, pct: float) -> Optional[float]:
+        """Value at ``pct`` (0..100) in ms; exact at 0 and 100, within one bucket otherwise."""
+        if not self.total:
+            return None
+        if pct <= 0:
+            return self.min_us / 1000.0
+        if pct >= 100:
+            return self.max_us / 1000.0
+        rank = pct / 100.0 * self.total
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                # Never report outside the observed range
+                return min(max(bucket_value(idx), self.min_us), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def mean_ms(self) -> Optional[float]:
+        return self.sum_us / self.total / 1000.0 if self.total else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "counts": [[idx, self.counts[idx]] for idx in sorted(self.counts)],
+            "total": self.total,
+            "sum_us": self.sum_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        h = cls()
+        h.counts = {int(idx): int(n) for idx, n in data.get("counts", [])}
+        h.total = int(data.get("total", 0))
+        h.sum_us = int(data.get("sum_us", 0))
+        h.min_us = data.get("min_us")
+        h.max_us = data.get("max_us")
+        return h
+
+    @classmethod
+    def from_values_ms(cls, values: Iterable[float]) -> "LatencyHistogram":
+        h = cls()
+        for v in values:
+            h.record_ms(v)
+        return h
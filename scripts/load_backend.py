@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Run the BackendTester flow with many concurrent virtual users.
+
+Each virtual user owns a BackendTester (its own requests.Session, token and
+customer/offer/work order/inspection/report IDs) and walks the same step
+sequence as scripts/test_backend.py, repeatedly, until the iteration count or
+the duration is reached. The report gives per-step throughput and
+p50/p95/p99 latency, which is what shows where the Express API and its pg
+pool (max 20 connections) saturate.
+
+Usage:
+  python scripts/load_backend.py --users 20 --duration 120
+  python scripts/load_backend.py --users 10 --iterations 5 --out load.json
+
+Requires: pip install requests
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from test_backend import BackendTester, StepResult, TokenCache
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile of ``values`` (pct in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    lo = math.floor(rank)
+    hi = math.ceil(rank)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+@dataclass
+class StepStats:
+    name: str
+    count: int = 0
+    failed: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def add(self, result: StepResult):
+        self.count += 1
+        if not result.success:
+            self.failed += 1
+        if result.elapsed_ms is not None:
+            self.latencies_ms.append(result.elapsed_ms)
+
+    def summary(self, wall_s: float) -> Dict[str, Any]:
+        lat = self.latencies_ms
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "throughput_rps": round(self.count / wall_s, 3) if wall_s > 0 else None,
+            "mean_ms": round(sum(lat) / len(lat), 2) if lat else None,
+            "p50_ms": _round(percentile(lat, 50)),
+            "p95_ms": _round(percentile(lat, 95)),
+            "p99_ms": _round(percentile(lat, 99)),
+            "max_ms": _round(max(lat) if lat else None),
+        }
+
+
+def _round(v: Optional[float]) -> Optional[float]:
+    return round(v, 2) if v is not None else None
+
+
+class LoadRunner:
+    # Per-step aggregator; needs add(StepResult) and summary(wall_s)
+    stats_class = StepStats
+
+    def __init__(self, base_url: str, email: str, password: str, users: int,
+                 iterations: Optional[int] = None, duration: Optional[float] = None,
+                 ramp_up: float = 0.0, continue_on_error: bool = False, token_cache: Optional[TokenCache] = None):
+        if iterations is None and duration is None:
+            raise ValueError("Either iterations or duration is required")
+        self.base = base_url
+        self.email = email
+        self.password = password
+        self.users = users
+        self.iterations = iterations
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.continue_on_error = continue_on_error
+        # Shared by all virtual users: one login per account instead of one per iteration
+        self.token_cache = token_cache
+
+        self.stats: Dict[str, StepStats] = {}
+        self.step_order: List[str] = []
+        self.iterations_done = 0
+        self.iterations_failed = 0
+        self._lock = threading.Lock()
+        self._deadline: Optional[float] = None
+        self._started: Optional[float] = None
+
+    def _collect(self, results: List[StepResult], failed: bool):
+        with self._lock:
+            for r in results:
+                st = self.stats.get(r.name)
+                if st is None:
+                    st = self.stats[r.name] = self.stats_class(r.name)
+                    self.step_order.append(r.name)
+                st.add(r)
+            self.iterations_done += 1
+            if failed:
+                self.iterations_failed += 1
+
+    def _should_stop(self, done: int) -> bool:
+        if self.iterations is not None and done >= self.iterations:
+            return True
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            return True
+        return False
+
+    def _run_iteration(self, tester: BackendTester) -> bool:
+        """Walk the flow once; returns True if every step succeeded."""
+        tester.reset()
+        for step in tester.steps():
+            recorded = tester.run_step(step)
+            if not all(r.success for r in recorded) and not self.continue_on_error:
+                # Later steps depend on IDs this one should have produced
+                return False
+        return all(r.success for r in tester.results)
+
+    def _virtual_user(self, index: int):
+        if self.ramp_up > 0 and self.users > 1:
+            time.sleep(self.ramp_up * index / self.users)
+        tester = BackendTester(self.base, self.email, self.password, token_cache=self.token_cache)
+        done = 0
+        while not self._should_stop(done):
+            ok = self._run_iteration(tester)
+            self._collect(tester.results, failed=not ok)
+            done += 1
+
+    def run(self) -> Dict[str, Any]:
+        self._started = time.perf_counter()
+        if self.duration is not None:
+            self._deadline = self._started + self.duration
+        with ThreadPoolExecutor(max_workers=self.users) as pool:
+            futures = [pool.submit(self._virtual_user, i) for i in range(self.users)]
+            for f in futures:
+                f.result()
+        return self.summary(time.perf_counter() - self._started)
+
+    def summary(self, wall_s: float) -> Dict[str, Any]:
+        report = {
+            "users": self.users,
+            "wall_s": round(wall_s, 3),
+            "iterations": self.iterations_done,
+            "iterations_failed": self.iterations_failed,
+            "iterations_per_s": round(self.iterations_done / wall_s, 3) if wall_s > 0 else None,
+            "steps": {name: self.stats[name].summary(wall_s) for name in self.step_order},
+        }
+        if self.token_cache is not None:
+            report.update(self.token_cache.stats())
+        return report
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    header = f"{'step':<30} {'count':>7} {'fail':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    lines = [header, "-" * len(header)]
+
+    def ms(v):
+        return f"{v:9.1f}" if v is not None else f"{'-':>9}"
+
+    for name, st in report["steps"].items():
+        rps = st["throughput_rps"]
+        lines.append(
+            f"{name:<30} {st['count']:>7} {st['failed']:>5} {rps if rps is not None else '-':>8} "
+            f"{ms(st['p50_ms'])} {ms(st['p95_ms'])} {ms(st['p99_ms'])} {ms(st['max_ms'])}"
+        )
+    lines.append("-" * len(header))
+    lines.append(
+        f"users={report['users']} iterations={report['iterations']} "
+        f"failed={report['iterations_failed']} wall={report['wall_s']}s "
+        f"iter/s={report['iterations_per_s']}"
+        + (f" logins={report['logins']} token_cache_hits={report['token_cache_hits']}" if "logins" in report else "")
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load generator for the backend E2E flow")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent virtual users")
+    parser.add_argument("--iterations", type=int, help="Flow iterations per virtual user")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds (iterations in flight are finished)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which virtual users are started")
+    parser.add_argument("--continue-on-error", action="store_true", help="Keep running the remaining steps of an iteration after a failure")
+    parser.add_argument("--token-cache", action="store_true", help="Reuse JWTs across iterations and users instead of logging in every flow")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.iterations is None and args.duration is None:
+        args.iterations = 1
+
+    print(f"Load testing {args.api} with {args.users} users", file=sys.stderr)
+    runner = LoadRunner(args.api, args.email, args.password, args.users,
+                        iterations=args.iterations, duration=args.duration,
+                        ramp_up=args.ramp_up, continue_on_error=args.continue_on_error,
+                        token_cache=TokenCache() if args.token_cache else None)
+    report = runner.run()
+    print(format_table(report))
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["iterations_failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Sweep page depth, page size and search term across the list endpoints.
+
+Every list controller pages with LIMIT/OFFSET and runs a second COUNT(*)
+with the same filter, so latency grows with the offset and with how
+selective the search is. For each endpoint this benchmark reads the total
+from page 1, then requests geometrically spaced pages (1, 2, 5, 10, 20, ...,
+last) for every page size and search term, repeating each point and keeping
+the median. Results go to CSV, a per-endpoint slope summary is printed, and
+latency-vs-offset charts are drawn when matplotlib is installed.
+
+Keyset pagination can be checked with the same tool once an endpoint
+returns a cursor: --cursor-field names the pagination field holding the
+next cursor and --cursor-param the query parameter that takes it; the
+benchmark then walks pages sequentially and records them as mode=keyset.
+
+Use scripts/generate_tenant.py to get realistic row counts first.
+
+Usage:
+  python scripts/pagination_bench.py --out pagination.csv --plot pagination
+  python scripts/pagination_bench.py --endpoints customers,equipment \
+    --limits 20,100 --search ",a,Vinç" --repeat 5
+
+Requires: pip install requests (matplotlib optional, for --plot)
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from test_backend import BackendTester
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+# name -> (path, key of the rows array in data, query parameter for free-text search)
+ENDPOINTS = {
+    "customers": ("/customer-companies", "customers", "search"),
+    "equipment": ("/equipment", "equipment", "search"),
+    "offers": ("/offers", "offers", "search"),
+    "work_orders": ("/work-orders", "workOrders", "search"),
+    # inspections have no free-text search; the term is used as equipmentType (exact match)
+    "inspections": ("/inspections", "inspections", "equipmentType"),
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    mode: str  # offset | keyset
+    limit: int
+    page: int
+    offset: int
+    search: str
+    rows: Optional[int]
+    total_count: Optional[int]
+    status: Optional[int]
+    median_ms: Optional[float]
+    min_ms: Optional[float]
+    ttfb_ms: Optional[float]
+    response_bytes: Optional[int]
+
+
+def page_numbers(total_pages: int) -> List[int]:
+    """1, 2, 5, 10, 20, 50, ... up to and including the last page."""
+    pages = []
+    base = 1
+    while base <= total_pages:
+        for m in (1, 2, 5):
+            p = base * m
+            if p <= total_pages:
+                pages.append(p)
+        base *= 10
+    if total_pages not in pages and total_pages > 0:
+        pages.append(total_pages)
+    return pages
+
+
+class PaginationBench:
+    def __init__(self, tester: BackendTester, repeat: int = 3, max_pages: Optional[int] = None):
+        self.t = tester
+        self.repeat = repeat
+        self.max_pages = max_pages
+        self.samples: List[Sample] = []
+
+    def _measure(self, path: str, params: Dict[str, Any]):
+        """Request one page ``repeat`` times; returns (last response, total_ms list, ttfb_ms list, bytes)."""
+        totals, ttfbs = [], []
+        resp = None
+        size = None
+        for _ in range(self.repeat):
+            resp = self.t.request("GET", path, token=self.t.token_admin, params=params)
+            for c in self.t.drain_calls():
+                totals.append(c.total_ms)
+                ttfbs.append(c.ttfb_ms)
+                size = c.response_bytes
+        return resp, totals, ttfbs, size
+
+    def _sample(self, name: str, mode: str, limit: int, page: int, search: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        path, key, _ = ENDPOINTS[name]
+        resp, totals, ttfbs, size = self._measure(path, params)
+        data = None
+        try:
+            data = resp.json().get("data") if resp is not None else None
+        except ValueError:
+            pass
+        rows = len(data.get(key, [])) if data else None
+        pagination = (data or {}).get("pagination", {})
+        self.samples.append(Sample(
+            endpoint=name, mode=mode, limit=limit, page=page, offset=(page - 1) * limit, search=search,
+            rows=rows, total_count=pagination.get("totalCount"), status=resp.status_code if resp is not None else None,
+            median_ms=statistics.median(totals) if totals else None, min_ms=min(totals) if totals else None,
+            ttfb_ms=statistics.median(ttfbs) if ttfbs else None, response_bytes=size,
+        ))
+        return data
+
+    def sweep_offset(self, name: str, limit: int, search: str):
+        _, _, search_param = ENDPOINTS[name]
+        base = {"limit": limit}
+        if search:
+            base[search_param] = search
+        first = self._sample(name, "offset", limit, 1, search, {**base, "page": 1})
+        if not first:
+            return
+        total_pages = first.get("pagination", {}).get("totalPages") or 1
+        if self.max_pages:
+            total_pages = min(total_pages, self.max_pages)
+        for page in page_numbers(total_pages)[1:]:
+            self._sample(name, "offset", limit, page, search, {**base, "page": page})
+
+    def sweep_keyset(self, name: str, limit: int, search: str, cursor_param: str, cursor_field: str, max_pages: int):
+        _, _, search_param = ENDPOINTS[name]
+        params: Dict[str, Any] = {"limit": limit}
+        if search:
+            params[search_param] = search
+        for page in range(1, max_pages + 1):
+            data = self._sample(name, "keyset", limit, page, search, params)
+            cursor = (data or {}).get("pagination", {}).get(cursor_field)
+            if not cursor:
+                return
+            params = {**params, cursor_param: cursor}
+
+
+def slope_summary(samples: List[Sample]) -> Dict[str, Dict[str, Any]]:
+    """Least-squares ms per 10k rows of offset, per endpoint (offset mode, no search)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for name in ENDPOINTS:
+        pts = [(s.offset, s.median_ms) for s in samples
+               if s.endpoint == name and s.mode == "offset" and not s.search and s.median_ms is not None]
+        if len(pts) < 2:
+            continue
+        mx = sum(x for x, _ in pts) / len(pts)
+        my = sum(y for _, y in pts) / len(pts)
+        var = sum((x - mx) ** 2 for x, _ in pts)
+        slope = sum((x - mx) * (y - my) for x, y in pts) / var if var else 0.0
+        first = min(pts)[1]
+        deepest = max(pts)
+        out[name] = {
+            "ms_per_10k_offset": round(slope * 10000, 2),
+            "first_page_ms": round(first, 2),
+            "deepest_offset": deepest[0],
+            "deepest_ms": round(deepest[1], 2),
+        }
+    return out
+
+
+def write_csv(samples: List[Sample], path: str):
+    with open(path, "w", encoding="utf_8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(Sample.__dataclass_fields__))
+        w.writeheader()
+        for s in samples:
+            w.writerow(asdict(s))
+
+
+def plot(samples: List[Sample], prefix: str):
+    for name in ENDPOINTS:
+        rows = [s for s in samples if s.endpoint == name and s.median_ms is not None]
+        if not rows:
+            continue
+        fig, ax = plt.subplots(figsize=(8, 5))
+        series: Dict[tuple, List[Sample]] = {}
+        for s in rows:
+            series.setdefault((s.mode, s.limit, s.search), []).append(s)
+        for (mode, limit, search), pts in sorted(series.items()):
+            pts.sort(key=lambda s: s.offset)
+            label = f"{mode} limit={limit}" + (f" search={search!r}" if search else "")
+            ax.plot([s.offset for s in pts], [s.median_ms for s in pts], marker="o", label=label)
+        ax.set_title(f"{ENDPOINTS[name][0]} latency vs offset")
+        ax.set_xlabel("offset (rows)")
+        ax.set_ylabel("median latency (ms)")
+        ax.legend(fontsize="small")
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(f"{prefix}_{name}.png")
+        plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency vs page depth for the list endpoints")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--limits", default="20,50,100", help="Comma-separated page sizes")
+    parser.add_argument("--search", default="", help="Comma-separated search terms; an empty item means no filter")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per point (median is reported)")
+    parser.add_argument("--max-pages", type=int, help="Do not go deeper than this page")
+    parser.add_argument("--cursor-param", help="Keyset mode: query parameter carrying the cursor")
+    parser.add_argument("--cursor-field", help="Keyset mode: pagination field holding the next cursor")
+    parser.add_argument("--keyset-pages", type=int, default=50, help="Keyset mode: pages to walk")
+    parser.add_argument("--out", default="pagination.csv", help="CSV output")
+    parser.add_argument("--plot", metavar="PREFIX", help="Write PREFIX_<endpoint>.png charts (needs matplotlib)")
+    args = parser.parse_args()
+
+    names = [n for n in args.endpoints.split(",") if n]
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    limits = [int(x) for x in args.limits.split(",") if x]
+    terms = args.search.split(",") if args.search else [""]
+
+    t = BackendTester(args.api, args.email, args.password)
+    t.step_login_admin()
+    if not t.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    bench = PaginationBench(t, repeat=args.repeat, max_pages=args.max_pages)
+    for name in names:
+        for limit in limits:
+            for term in terms:
+                print(f"{name} limit={limit} search={term!r}", file=sys.stderr)
+                bench.sweep_offset(name, limit, term)
+                if args.cursor_param and args.cursor_field:
+                    bench.sweep_keyset(name, limit, term, args.cursor_param, args.cursor_field, args.keyset_pages)
+
+    write_csv(bench.samples, args.out)
+    for name, row in slope_summary(bench.samples).items():
+        print(f"{name:<12} first={row['first_page_ms']:.1f}ms deepest(offset {row['deepest_offset']})={row['deepest_ms']:.1f}ms "
+              f"slope={row['ms_per_10k_offset']:.1f}ms/10k rows")
+    if args.plot:
+        if plt is None:
+            print("matplotlib is not installed; skipping charts (pip install matplotlib)", file=sys.stderr)
+        else:
+            plot(bench.samples, args.plot)
+    failed = [s for s in bench.samples if s.status != 200]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Report PDF generation throughput benchmark with Chrome/Node resource sampling.
+
+For every (photo count, template size) cell the benchmark builds fresh
+reports through the BackendTester flow, swaps the equipment template for a
+generated one of the requested size (plus a photos section) and uploads
+synthetic photos. It then prepares the PDFs through POST /reports/{id}/prepare
+(sync: a page in the API's shared Puppeteer browser) and/or
+prepare-async (the report worker), at each requested concurrency level, and
+records latency, PDF bytes and pdfs/s. While it runs, /proc is sampled for
+the Chrome and Node processes, so each cell also gets peak/mean RSS and CPU;
+the full time series is written with the results to show memory growth.
+
+Run it on the backend host (process sampling is local and Linux-only).
+
+Usage:
+  python scripts/pdf_bench.py --photos 0,5,20 --sizes small,large --concurrency 1,2,4
+  python scripts/pdf_bench.py --mode async --concurrency 1,3,6 --out pdf_bench.json
+
+Requires: pip install requests
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from create_example_equipment import build_random_template
+from load_backend import percentile
+from proc_sampler import ProcessSampler, proc_available
+from test_backend import BackendTester, synthetic_png
+
+# build_random_template limits per size class
+TEMPLATE_SIZES = {
+    "small": {"max_sections": 3, "max_questions": 10, "max_columns": 4},
+    "medium": {"max_sections": 8, "max_questions": 30, "max_columns": 8},
+    "large": {"max_sections": 16, "max_questions": 80, "max_columns": 12},
+}
+PHOTO_FIELD = "bench_fotolar"
+
+
+def bench_template(size: str, photos: int, seed: int) -> Dict[str, Any]:
+    tpl = build_random_template(random.Random(seed), **TEMPLATE_SIZES[size])
+    tpl["sections"].append({"title": "Fotoğraflar", "type": "photos", "field": PHOTO_FIELD,
+                            "display": "grid", "maxCount": max(photos, 1)})
+    return tpl
+
+
+def build_fixture(args, size: str, photos: int, photo_bytes: bytes, seed: int) -> Optional[int]:
+    """Create one report whose equipment has a ``size`` template and ``photos`` uploaded photos."""
+    t = BackendTester(args.api, args.email, args.password)
+    if not t.run_through(t.step_create_equipment_with_template):
+        return None
+    r = t.request("PUT", f"/equipment/{t.equipment_id}/template", token=t.token_admin,
+                  json={"template": bench_template(size, photos, seed)})
+    if r.status_code != 200:
+        print(f"template update failed: HTTP {r.status_code}", file=sys.stderr)
+        return None
+    if not t.run_through(t.step_save_inspection, start=t.step_create_offer):
+        return None
+    for i in range(photos):
+        r = t.request("POST", f"/inspections/{t.inspection_id}/photos", token=t.token_admin,
+                      headers={"Content-Type": None}, data={"fieldName": PHOTO_FIELD},
+                      files={"photos": (f"bench_{i}.png", photo_bytes, "image/png")})
+        if r.status_code != 200:
+            print(f"photo upload failed: HTTP {r.status_code} {r.text[:200]}", file=sys.stderr)
+            return None
+    t.drain_calls()
+    return t.report_id
+
+
+class PdfBench:
+    def __init__(self, args, token: str, sampler: Optional[ProcessSampler]):
+        self.args = args
+        self.token = token
+        self.sampler = sampler
+        self.rows: List[Dict[str, Any]] = []
+        self._local = threading.local()
+
+    def _tester(self) -> BackendTester:
+        t = getattr(self._local, "tester", None)
+        if t is None:
+            t = self._local.tester = BackendTester(self.args.api, "", "", job_timeout=self.args.timeout)
+        return t
+
+    def _prepare(self, mode: str, report_id: int) -> Dict[str, Any]:
+        t = self._tester()
+        t0 = time.perf_counter()
+        if mode == "sync":
+            r = t.request("POST", f"/reports/{report_id}/prepare", token=self.token)
+            ok = r.status_code == 200
+            extra: Dict[str, Any] = {}
+        else:
+            r = t.request("POST", f"/reports/{report_id}/prepare-async", token=self.token)
+            ok = r.status_code in (200, 202)
+            extra = {}
+            if ok:
+                wait = t.wait_for_report_job(r.json()["data"]["jobId"], self.token)
+                ok = wait.status == "completed"
+                extra = {"queue_wait_ms": wait.as_dict()["queue_wait_ms"], "job_run_ms": wait.as_dict()["job_run_ms"]}
+        latency = (time.perf_counter() - t0) * 1000.0
+        t.drain_calls()
+        return {"ok": ok, "latency_ms": latency, **extra}
+
+    def pdf_size(self, report_id: int) -> Optional[int]:
+        t = self._tester()
+        r = t.request("GET", f"/reports/{report_id}/download", token=self.token)
+        t.drain_calls()
+        return len(r.content) if r.status_code == 200 else None
+
+    def run_cell(self, size: str, photos: int, report_ids: List[int]):
+        for mode in (["sync", "async"] if self.args.mode == "both" else [self.args.mode]):
+            for conc in self.args.concurrency:
+                ids = report_ids[:conc]
+                if len(ids) < conc:
+                    continue
+                mark = self.sampler.now() if self.sampler else None
+                results = []
+                t0 = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=conc) as pool:
+                    for _ in range(self.args.repeat):
+                        results.extend(pool.map(lambda rid: self._prepare(mode, rid), ids))
+                wall = time.perf_counter() - t0
+                ok = [r for r in results if r["ok"]]
+                lat = [r["latency_ms"] for r in ok]
+                row = {
+                    "size": size, "photos": photos, "mode": mode, "concurrency": conc,
+                    "pdfs": len(results), "failed": len(results) - len(ok),
+                    "pdfs_per_s": round(len(ok) / wall, 3) if wall > 0 else None,
+                    "p50_ms": percentile(lat, 50), "p95_ms": percentile(lat, 95), "max_ms": max(lat) if lat else None,
+                    "pdf_bytes": self.pdf_size(ids[0]),
+                }
+                if mode == "async":
+                    row["job_run_p50_ms"] = percentile([r["job_run_ms"] for r in ok if r.get("job_run_ms") is not None], 50)
+                if self.sampler:
+                    end = self.sampler.now()
+                    for label in self.sampler.groups:
+                        for k, v in self.sampler.window(mark, end, label).items():
+                            row[f"{label}_{k}"] = v
+                self.rows.append(row)
+                print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF generation throughput with Chrome resource profiling")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--photos", default="0,5,20", help="Comma-separated photo counts per report")
+    parser.add_argument("--sizes", default="small,medium,large", help="Comma-separated template sizes: " + ", ".join(TEMPLATE_SIZES))
+    parser.add_argument("--photo-size", default="1280x960", help="Synthetic photo dimensions WxH (uploads are capped at 5 MB)")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="sync")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated concurrent prepares per level")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for an async job")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between /proc samples")
+    parser.add_argument("--no-sample", action="store_true", help="Do not sample local processes")
+    parser.add_argument("--out", default="pdf_bench.json")
+    args = parser.parse_args()
+    args.concurrency = [int(x) for x in args.concurrency.split(",") if x]
+    sizes = [s for s in args.sizes.split(",") if s]
+    unknown = [s for s in sizes if s not in TEMPLATE_SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    photo_counts = [int(x) for x in args.photos.split(",") if x]
+    w, h = (int(x) for x in args.photo_size.lower().split("x"))
+
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    sampler = None
+    if not args.no_sample:
+        if proc_available():
+            sampler = ProcessSampler(interval=args.sample_interval).start()
+        else:
+            print("/proc not available; resource sampling disabled", file=sys.stderr)
+
+    photo_bytes = synthetic_png(w, h)
+    bench = PdfBench(args, admin.token_admin, sampler)
+    need = max(args.concurrency)
+    try:
+        for size in sizes:
+            for photos in photo_counts:
+                print(f"building {need} reports: size={size} photos={photos}", file=sys.stderr)
+                with ThreadPoolExecutor(max_workers=min(need, 4)) as pool:
+                    ids = [i for i in pool.map(lambda k: build_fixture(args, size, photos, photo_bytes, k), range(need)) if i]
+                if not ids:
+                    print("fixture build failed; skipping cell", file=sys.stderr)
+                    continue
+                bench.run_cell(size, photos, ids)
+    finally:
+        if sampler:
+            sampler.stop()
+
+    with open(args.out, "w", encoding="utf_8") as f:
+        f.write(json.dumps({
+            "results": bench.rows,
+            "samples": sampler.series() if sampler else [],
+        }, indent=2, ensure_ascii=False))
+    print(f"Results written to {args.out}")
+    sys.exit(0 if all(r["failed"] == 0 for r in bench.rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
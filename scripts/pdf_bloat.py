@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+"""
+Break report PDFs down by what makes them big: images, fonts, content streams.
+
+Every PDF is memory-mapped and read through its cross-reference table (classic
+tables, xref streams and object streams are supported; a damaged xref falls
+back to scanning for "N G obj"), so only object dictionaries and the page
+content streams are parsed; image and font data is never decoded. For each
+file the bytes are attributed to:
+
+  * images: pixel size, encoding and on-disk bytes of each image XObject,
+    the size it is drawn at (from the page content's CTM, in points) and
+    the resulting effective DPI; soft masks (PNG alpha) separately;
+  * fonts: embedded font programs per BaseFont, plus ToUnicode/CMaps;
+  * content: page and form content streams;
+  * signature: /Sig dictionaries (the signed copy's PKCS#7 blob);
+  * other streams, and the remaining structure (dicts, xref, trailer).
+
+Images drawn above --target-dpi are downsampling candidates; the estimated
+saving assumes bytes scale with pixel count.
+
+Bulk mode walks REPORTS_PATH/<report_id>/unsigned.pdf|signed.pdf (layout of
+utils/storage.js). With API credentials, every report is looked up via
+GET /reports/{id} and the files are summarized per equipment template, which
+shows the templates whose photos need downsampling before rendering.
+
+Usage:
+  python scripts/pdf_bloat.py report.pdf --images
+  python scripts/pdf_bloat.py --reports-path /srv/muayene/reports --out bloat.json
+  python scripts/pdf_bloat.py --reports-path backend/uploads/reports --no-api --target-dpi 200
+
+Requires: pip install requests (only for the per-template lookup)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+WHITESPACE = b" \t\r\n\f\x00"
+DELIMITERS = b"()<>[]{}/%"
+NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+REF_TAIL = re.compile(rb"\s+(\d+)\s+R(?![A-Za-z0-9])")
+OBJ_HEADER = re.compile(rb"(\d+)\s+(\d+)\s+obj(?![A-Za-z0-9])")
+XREF_ENTRY = re.compile(rb"(\d{10})\s(\d{5})\s([nf])")
+XREF_SUBSECTION = re.compile(rb"(\d+)\s+(\d+)")
+
+
+class Ref(NamedTuple):
+    num: int
+    gen: int
+
+
+class Name(str):
+    pass
+
+
+class PdfError(Exception):
+    pass
+
+
+# ---------- Object syntax ----------
+
+def _skip_ws(buf, pos: int) -> int:
+    n = len(buf)
+    while pos < n:
+        c = buf[pos]
+        if c in WHITESPACE:
+            pos += 1
+        elif c == 0x25:  # % comment
+            while pos < n and buf[pos] not in b"\r\n":
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _literal_end(buf, pos: int) -> int:
+    """Index after the literal string starting at ``pos`` (the opening paren)."""
+    depth, i, n = 0, pos, len(buf)
+    while i < n:
+        c = buf[i]
+        if c == 0x5C:  # backslash escape
+            i += 2
+            continue
+        if c == 0x28:
+            depth += 1
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise PdfError("unterminated string")
+
+
+def parse_object(buf, pos: int) -> Tuple[Any, int]:
+    """Parse one direct object at ``pos``; returns (value, position after it)."""
+    pos = _skip_ws(buf, pos)
+    if pos >= len(buf):
+        raise PdfError("unexpected end of data")
+    c = buf[pos]
+    if c == 0x2F:  # /Name
+        end = pos + 1
+        while end < len(buf) and buf[end] not in WHITESPACE and buf[end] not in DELIMITERS:
+            end += 1
+        return Name(bytes(buf[pos + 1:end]).decode("latin-1")), end
+    if c == 0x3C:
+        if buf[pos + 1:pos + 2] == b"<":
+            d: Dict[str, Any] = {}
+            pos += 2
+            while True:
+                pos = _skip_ws(buf, pos)
+                if buf[pos:pos + 2] == b">>":
+                    return d, pos + 2
+                key, pos = parse_object(buf, pos)
+                value, pos = parse_object(buf, pos)
+                if isinstance(key, Name):
+                    d[str(key)] = value
+        end = buf.find(b">", pos)
+        if end < 0:
+            raise PdfError("unterminated hex string")
+        return bytes(buf[pos + 1:end]), end + 1
+    if c == 0x5B:
+        items = []
+        pos += 1
+        while True:
+            pos = _skip_ws(buf, pos)
+            if buf[pos:pos + 1] == b"]":
+                return items, pos + 1
+            value, pos = parse_object(buf, pos)
+            items.append(value)
+    if c == 0x28:
+        end = _literal_end(buf, pos)
+        return bytes(buf[pos + 1:end - 1]), end
+    m = NUMBER.match(buf, pos)
+    if m:
+        text = m.group(0)
+        if b"." not in text:
+            ref = REF_TAIL.match(buf, m.end())
+            if ref is not None:
+                return Ref(int(text), int(ref.group(1))), ref.end()
+            return int(text), m.end()
+        return float(text), m.end()
+    for word, value in ((b"true", True), (b"false", False), (b"null", None)):
+        if buf[pos:pos + len(word)] == word:
+            return value, pos + len(word)
+    raise PdfError(f"unexpected byte {bytes(buf[pos:pos + 1])!r} at {pos}")
+
+
+class PdfObject(NamedTuple):
+    num: int
+    value: Any
+    offset: Optional[int]  # None for objects inside an object stream
+    stream_start: Optional[int]
+    stream_length: Optional[int]
+    data: Optional[bytes]  # stream bytes, only for objects unpacked from memory
+
+
+def _decode_stream(raw: bytes, d: Dict[str, Any]) -> Optional[bytes]:
+    """FlateDecode (with PNG predictors) only; None for anything else."""
+    filters = d.get("Filter")
+    filters = filters if isinstance(filters, list) else [filters] if filters else []
+    if any(f != "FlateDecode" for f in filters):
+        return None
+    data = zlib.decompressobj().decompress(raw) if filters else raw
+    params = d.get("DecodeParms") or {}
+    if isinstance(params, list):
+        params = params[0] or {}
+    predictor = params.get("Predictor", 1) if isinstance(params, dict) else 1
+    if predictor >= 10:
+        cols = params.get("Columns", 1)
+        row_len = cols + 1
+        out, prev = bytearray(), bytearray(cols)
+        for i in range(0, len(data) - row_len + 1, row_len):
+            kind, row = data[i], bytearray(data[i + 1:i + row_len])
+            if kind == 2:  # Up, the only predictor xref streams use in practice
+                row = bytearray((row[j] + prev[j]) & 0xFF for j in range(cols))
+            elif kind == 1:
+                for j in range(1, cols):
+                    row[j] = (row[j] + row[j - 1]) & 0xFF
+            out += row
+            prev = row
+        data = bytes(out)
+    return data
+
+
+class PdfFile:
+    """Lazy, mmap-backed view of a PDF's objects."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        self.size = os.fstat(self._f.fileno()).st_size
+        if self.size == 0:
+            self._f.close()
+            raise PdfError("empty file")
+        self.buf = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets: Dict[int, int] = {}  # object number -> file offset
+        self.compressed: Dict[int, Tuple[int, int]] = {}  # object number -> (object stream, index)
+        self.trailer: Dict[str, Any] = {}
+        self.xref_fallback = False
+        self._cache: Dict[int, PdfObject] = {}
+        self._objstm: Dict[int, Dict[int, Tuple[Any, int]]] = {}
+        try:
+            self._read_xref()
+        except (PdfError, ValueError, IndexError, zlib.error):
+            self._scan_objects()
+
+    def close(self):
+        self.buf.close()
+        self._f.close()
+
+    # -- cross-reference --
+
+    def _read_xref(self):
+        tail_at = max(0, self.size - 2048)
+        idx = self.buf.rfind(b"startxref", tail_at)
+        if idx < 0:
+            raise PdfError("no startxref")
+        pos = int(NUMBER.match(self.buf, _skip_ws(self.buf, idx + 9)).group(0))
+        seen = set()
+        while pos is not None and pos not in seen and 0 <= pos < self.size:
+            seen.add(pos)
+            start = _skip_ws(self.buf, pos)
+            if self.buf[start:start + 4] == b"xref":
+                trailer, prev = self._read_xref_table(start + 4)
+            else:
+                trailer, prev = self._read_xref_stream(start)
+            for k, v in trailer.items():
+                self.trailer.setdefault(k, v)
+            stm = trailer.get("XRefStm")
+            if isinstance(stm, int) and stm not in seen:
+                seen.add(stm)
+                self._read_xref_stream(stm)
+            pos = prev if isinstance(prev, int) else None
+        if "Root" not in self.trailer or not self.offsets:
+            raise PdfError("incomplete xref")
+
+    def _read_xref_table(self, pos: int):
+        while True:
+            pos = _skip_ws(self.buf, pos)
+            if self.buf[pos:pos + 7] == b"trailer":
+                trailer, _ = parse_object(self.buf, pos + 7)
+                return trailer, trailer.get("Prev")
+            m = XREF_SUBSECTION.match(self.buf, pos)
+            if not m:
+                raise PdfError("bad xref subsection")
+            first, count = int(m.group(1)), int(m.group(2))
+            pos = m.end()
+            for i in range(count):
+                e = XREF_ENTRY.search(self.buf, pos, pos + 64)
+                if not e:
+                    raise PdfError("bad xref entry")
+                pos = e.end()
+                # Newer sections are read first and win
+                if e.group(3) == b"n" and first + i not in self.offsets and first + i not in self.compressed:
+                    self.offsets[first + i] = int(e.group(1))
+
+    def _read_xref_stream(self, pos: int):
+        obj = self._parse_at(pos)
+        d = obj.value
+        data = _decode_stream(self.buf[obj.stream_start:obj.stream_start + obj.stream_length], d)
+        if data is None:
+            raise PdfError("undecodable xref stream")
+        w = d["W"]
+        index = d.get("Index") or [0, d["Size"]]
+        entry_len = sum(w)
+        p = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                for width in w:
+                    fields.append(int.from_bytes(data[p:p + width], "big") if width else None)
+                    p += width
+                kind = fields[0] if fields[0] is not None else 1
+                if num in self.offsets or num in self.compressed:
+                    continue
+                if kind == 1:
+                    self.offsets[num] = fields[1]
+                elif kind == 2:
+                    self.compressed[num] = (fields[1], fields[2] or 0)
+        if p > len(data) + entry_len:
+            raise PdfError("short xref stream")
+        return d, d.get("Prev")
+
+    def _scan_objects(self):
+        """Rebuild the object table by scanning for "N G obj" (last definition wins)."""
+        self.xref_fallback = True
+        self.offsets.clear()
+        self.compressed.clear()
+        for m in OBJ_HEADER.finditer(self.buf):
+            self.offsets[int(m.group(1))] = m.start()
+        if not self.trailer.get("Root"):
+            for m in re.finditer(rb"/Root\s+(\d+)\s+(\d+)\s+R", self.buf):
+                self.trailer["Root"] = Ref(int(m.group(1)), int(m.group(2)))
+
+    # -- objects --
+
+    def _parse_at(self, offset: int, num: Optional[int] = None) -> PdfObject:
+        m = OBJ_HEADER.match(self.buf, _skip_ws(self.buf, offset))
+        if not m:
+            raise PdfError(f"no object at {offset}")
+        value, pos = parse_object(self.buf, m.end())
+        start = length = None
+        p = _skip_ws(self.buf, pos)
+        if isinstance(value, dict) and self.buf[p:p + 6] == b"stream":
+            start = p + 6
+            if self.buf[start:start + 2] == b"\r\n":
+                start += 2
+            elif self.buf[start:start + 1] in (b"\n", b"\r"):
+                start += 1
+            length = self.resolve(value.get("Length"))
+            if not isinstance(length, int) or start + length > self.size:
+                end = self.buf.find(b"endstream", start)
+                length = (end if end >= 0 else self.size) - start
+        return PdfObject(num if num is not None else int(m.group(1)), value, offset, start, length, None)
+
+    def get(self, num: int) -> Optional[PdfObject]:
+        if num in self._cache:
+            return self._cache[num]
+        obj = None
+        try:
+            if num in self.offsets:
+                obj = self._parse_at(self.offsets[num], num)
+            elif num in self.compressed:
+                stm, index = self.compressed[num]
+                entry = self._object_stream(stm).get(num)
+                if entry is not None:
+                    obj = PdfObject(num, entry[0], None, None, None, None)
+        except (PdfError, ValueError, IndexError):
+            obj = None
+        self._cache[num] = obj
+        return obj
+
+    def _object_stream(self, num: int) -> Dict[int, Tuple[Any, int]]:
+        if num not in self._objstm:
+            out: Dict[int, Tuple[Any, int]] = {}
+            obj = self.get(num)
+            data = self.stream_data(obj) if obj else None
+            if data is not None:
+                n, first = obj.value.get("N", 0), obj.value.get("First", 0)
+                header = [int(x) for x in data[:first].split()[:2 * n]]
+                for k in range(0, len(header) - 1, 2):
+                    try:
+                        out[header[k]] = (parse_object(data, first + header[k + 1])[0], k // 2)
+                    except PdfError:
+                        pass
+            self._objstm[num] = out
+        return self._objstm[num]
+
+    def resolve(self, value: Any, depth: int = 0) -> Any:
+        while isinstance(value, Ref) and depth < 16:
+            obj = self.get(value.num)
+            value = obj.value if obj else None
+            depth += 1
+        return value
+
+    def stream_data(self, obj: PdfObject) -> Optional[bytes]:
+        """Decoded stream content (Flate only); image and font data is never asked for."""
+        if obj is None or obj.stream_start is None:
+            return None
+        raw = self.buf[obj.stream_start:obj.stream_start + obj.stream_length]
+        try:
+            return _decode_stream(raw, obj.value)
+        except zlib.error:
+            return None
+
+    def numbers(self) -> List[int]:
+        return sorted(set(self.offsets) | set(self.compressed))
+
+
+# ---------- Page content ----------
+
+def _content_tokens(data: bytes):
+    """Operands (numbers, names) and operators of a content stream; strings and inline images skipped."""
+    i, n = 0, len(data)
+    while i < n:
+        c = data[i]
+        if c in WHITESPACE:
+            i += 1
+        elif c == 0x25:
+            while i < n and data[i] not in b"\r\n":
+                i += 1
+        elif c == 0x28:
+            try:
+                i = _literal_end(data, i)
+            except PdfError:
+                return
+            yield ("str", None)
+        elif c == 0x3C:
+            if data[i + 1:i + 2] == b"<":
+                i += 2
+                yield ("dict", None)
+            else:
+                end = data.find(b">", i)
+                i = n if end < 0 else end + 1
+                yield ("str", None)
+        elif c == 0x3E:
+            i += 2 if data[i + 1:i + 2] == b">" else 1
+        elif c in b"[]{}":
+            i += 1
+        elif c == 0x2F:
+            j = i + 1
+            while j < n and data[j] not in WHITESPACE and data[j] not in DELIMITERS:
+                j += 1
+            yield ("name", data[i + 1:j].decode("latin-1"))
+            i = j
+        else:
+            m = NUMBER.match(data, i)
+            if m:
+                yield ("num", float(m.group(0)))
+                i = m.end()
+                continue
+            j = i
+            while j < n and data[j] not in WHITESPACE and data[j] not in DELIMITERS:
+                j += 1
+            op = data[i:j].decode("latin-1")
+            i = max(j, i + 1)
+            if op == "ID":
+                end = re.compile(rb"\sEI(?![A-Za-z0-9])").search(data, i)
+                i = n if end is None else end.end()
+                continue
+            yield ("op", op)
+
+
+def _mul(m1, m2):
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2, c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+            e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2)
+
+
+class Analyzer:
+    def __init__(self, pdf: PdfFile):
+        self.pdf = pdf
+        self.placements: Dict[int, Tuple[float, float]] = {}  # image -> largest drawn size (pt)
+        self.content_objs: set = set()
+        self.pages = 0
+
+    def _walk_content(self, data: bytes, resources: Dict[str, Any], ctm, depth: int):
+        xobjects = self.pdf.resolve(resources.get("XObject")) or {}
+        saved = []
+        operands: List[Any] = []
+        for kind, value in _content_tokens(data):
+            if kind != "op":
+                operands.append(value)
+                continue
+            if value == "q":
+                saved.append(ctm)
+            elif value == "Q" and saved:
+                ctm = saved.pop()
+            elif value == "cm" and len(operands) >= 6 and all(isinstance(v, float) for v in operands[-6:]):
+                ctm = _mul(tuple(operands[-6:]), ctm)
+            elif value == "Do" and operands and isinstance(operands[-1], str):
+                ref = xobjects.get(operands[-1]) if isinstance(xobjects, dict) else None
+                if isinstance(ref, Ref):
+                    self._draw(ref, resources, ctm, depth)
+            operands = []
+
+    def _draw(self, ref: Ref, resources: Dict[str, Any], ctm, depth: int):
+        obj = self.pdf.get(ref.num)
+        if obj is None or not isinstance(obj.value, dict):
+            return
+        subtype = obj.value.get("Subtype")
+        if subtype == "Image":
+            # The unit square is mapped through the CTM
+            w = math.hypot(ctm[0], ctm[1])
+            h = math.hypot(ctm[2], ctm[3])
+            pw, ph = self.placements.get(ref.num, (0.0, 0.0))
+            self.placements[ref.num] = (max(pw, w), max(ph, h))
+        elif subtype == "Form" and depth < 8:
+            self.content_objs.add(ref.num)
+            data = self.pdf.stream_data(obj)
+            if data is None:
+                return
+            matrix = obj.value.get("Matrix") or [1, 0, 0, 1, 0, 0]
+            form_res = self.pdf.resolve(obj.value.get("Resources")) or resources
+            self._walk_content(data, form_res, _mul(tuple(float(x) for x in matrix), ctm), depth + 1)
+
+    def walk_pages(self):
+        root = self.pdf.resolve(self.pdf.trailer.get("Root")) or {}
+        todo = [(root.get("Pages"), {})]
+        seen = set()
+        while todo:
+            ref, inherited = todo.pop()
+            if not isinstance(ref, Ref) or ref.num in seen:
+                continue
+            seen.add(ref.num)
+            node = self.pdf.resolve(ref)
+            if not isinstance(node, dict):
+                continue
+            resources = self.pdf.resolve(node.get("Resources")) or inherited.get("Resources") or {}
+            if node.get("Type") == "Pages" or "Kids" in node:
+                for kid in reversed(self.pdf.resolve(node.get("Kids")) or []):
+                    todo.append((kid, {"Resources": resources}))
+                continue
+            self.pages += 1
+            contents = node.get("Contents")
+            refs = contents if isinstance(contents, list) else [contents]
+            data = b""
+            for c in refs:
+                if isinstance(c, Ref):
+                    self.content_objs.add(c.num)
+                    part = self.pdf.stream_data(self.pdf.get(c.num))
+                    data += (part or b"") + b"\n"
+            self._walk_content(data, resources if isinstance(resources, dict) else {}, (1.0, 0.0, 0.0, 1.0, 0.0, 0.0), 0)
+
+
+def analyze(path: str, target_dpi: float = 150.0, min_image_bytes: int = 50 * 1024) -> Dict[str, Any]:
+    pdf = PdfFile(path)
+    try:
+        nums = pdf.numbers()
+        objs = {n: pdf.get(n) for n in nums}
+        objs = {n: o for n, o in objs.items() if o is not None}
+        # On-disk span of each top-level object: up to the next object or the xref
+        ordered = sorted((o.offset, n) for n, o in objs.items() if o.offset is not None)
+        span: Dict[int, int] = {}
+        for (off, n), nxt in zip(ordered, ordered[1:] + [(pdf.size, None)]):
+            span[n] = max(0, nxt[0] - off)
+
+        an = Analyzer(pdf)
+        an.walk_pages()
+
+        masks, font_files, font_meta, sig = set(), {}, set(), set()
+        for n, o in objs.items():
+            d = o.value
+            if not isinstance(d, dict):
+                continue
+            if d.get("Subtype") == "Image" and isinstance(d.get("SMask"), Ref):
+                masks.add(d["SMask"].num)
+            if d.get("Type") == "FontDescriptor":
+                for key in ("FontFile", "FontFile2", "FontFile3"):
+                    if isinstance(d.get(key), Ref):
+                        font_files[d[key].num] = str(d.get("FontName") or "?")
+            if d.get("Type") == "Font":
+                font_meta.add(n)
+                for key in ("ToUnicode", "FontDescriptor", "Widths", "W", "CIDToGIDMap", "DescendantFonts", "Encoding"):
+                    v = d.get(key)
+                    for r in (v if isinstance(v, list) else [v]):
+                        if isinstance(r, Ref):
+                            font_meta.add(r.num)
+            if d.get("Type") == "Sig" or "ByteRange" in d:
+                sig.add(n)
+
+        cats = {k: {"count": 0, "bytes": 0} for k in ("images", "image_masks", "fonts", "font_meta", "content", "signature", "other_streams", "structure")}
+        images, fonts = [], {}
+        for n, o in objs.items():
+            d = o.value
+            size = span.get(n, 0)
+            is_dict = isinstance(d, dict)
+            if n in masks:
+                cat = "image_masks"
+            elif is_dict and d.get("Subtype") == "Image":
+                cat = "images"
+                drawn = an.placements.get(n)
+                px_w, px_h = d.get("Width") or 0, d.get("Height") or 0
+                dpi = round(px_w / (drawn[0] / 72.0), 1) if drawn and drawn[0] > 0 else None
+                f = d.get("Filter")
+                images.append({
+                    "obj": n, "width": px_w, "height": px_h, "bytes": o.stream_length or 0,
+                    "filter": "/".join(map(str, f)) if isinstance(f, list) else str(f or "none"),
+                    "color_space": str(d.get("ColorSpace")) if not isinstance(d.get("ColorSpace"), (list, Ref)) else "indexed/icc",
+                    "has_mask": isinstance(d.get("SMask"), Ref),
+                    "mask_bytes": (objs[d["SMask"].num].stream_length or 0) if isinstance(d.get("SMask"), Ref) and d["SMask"].num in objs else 0,
+                    "drawn_pt": [round(drawn[0], 1), round(drawn[1], 1)] if drawn else None,
+                    "dpi": dpi,
+                })
+            elif n in font_files:
+                cat = "fonts"
+                fonts[font_files[n]] = fonts.get(font_files[n], 0) + (o.stream_length or size)
+            elif n in font_meta:
+                cat = "font_meta"
+            elif n in an.content_objs:
+                cat = "content"
+            elif n in sig:
+                cat = "signature"
+            elif o.stream_start is not None:
+                cat = "other_streams"
+            else:
+                cat = "structure"
+            cats[cat]["count"] += 1
+            cats[cat]["bytes"] += size
+        # xref, trailer, header and anything between objects
+        cats["structure"]["bytes"] += max(0, pdf.size - sum(c["bytes"] for c in cats.values()))
+
+        savings = 0
+        over = 0
+        for img in images:
+            if img["dpi"] and img["dpi"] > target_dpi and img["bytes"] + img["mask_bytes"] >= min_image_bytes:
+                over += 1
+                keep = (target_dpi / img["dpi"]) ** 2
+                img["saving_est"] = int((img["bytes"] + img["mask_bytes"]) * (1 - keep))
+                savings += img["saving_est"]
+        images.sort(key=lambda i: -i["bytes"])
+        return {
+            "path": path,
+            "bytes": pdf.size,
+            "pages": an.pages,
+            "objects": len(objs),
+            "xref_fallback": pdf.xref_fallback,
+            "categories": cats,
+            "images": images,
+            "images_over_dpi": over,
+            "downsample_saving_est": savings,
+            "fonts": dict(sorted(fonts.items(), key=lambda kv: -kv[1])),
+        }
+    finally:
+        pdf.close()
+
+
+# ---------- Bulk ----------
+
+def report_files(root: str) -> List[Tuple[int, str, str]]:
+    """(report_id, "unsigned"|"signed", path) under REPORTS_PATH/<id>/."""
+    out = []
+    for entry in sorted(os.listdir(root), key=lambda s: (not s.isdigit(), int(s) if s.isdigit() else 0, s)):
+        if not entry.isdigit():
+            continue
+        for kind in ("unsigned", "signed"):
+            path = os.path.join(root, entry, f"{kind}.pdf")
+            if os.path.isfile(path):
+                out.append((int(entry), kind, path))
+    return out
+
+
+def template_key(report: Dict[str, Any]) -> str:
+    tpl = report.get("template")
+    digest = hashlib.sha1(json.dumps(tpl, sort_keys=True).encode("utf-8")).hexdigest()[:8] if tpl else "none"
+    return f"{report.get('equipment_type') or '?'} / {report.get('equipment_name') or '?'} #{digest}"
+
+
+def lookup_templates(args, report_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    from test_backend import BackendTester
+
+    t = BackendTester(args.api, args.email, args.password)
+    t.step_login_admin()
+    if not t.token_admin:
+        print("Login failed; summarizing without templates", file=sys.stderr)
+        return {}
+    out = {}
+    for rid in report_ids:
+        r = t.request("GET", f"/reports/{rid}", token=t.token_admin)
+        if r.status_code == 200:
+            data = r.json()["data"]
+            out[rid] = {"template": template_key(data), "photos": len(data.get("photo_urls") or [])}
+        t.drain_calls()
+    return out
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault(r.get("template") or "unknown", []).append(r)
+    out = {}
+    for key, rs in groups.items():
+        total = sum(r["bytes"] for r in rs)
+        img = sum(r["categories"]["images"]["bytes"] + r["categories"]["image_masks"]["bytes"] for r in rs)
+        dpis = [i["dpi"] for r in rs for i in r["images"] if i["dpi"]]
+        out[key] = {
+            "files": len(rs),
+            "mean_mb": round(total / len(rs) / 2**20, 2),
+            "max_mb": round(max(r["bytes"] for r in rs) / 2**20, 2),
+            "image_share": round(img / total, 3) if total else None,
+            "font_share": round(sum(r["categories"]["fonts"]["bytes"] for r in rs) / total, 3) if total else None,
+            "images": sum(len(r["images"]) for r in rs),
+            "median_dpi": sorted(dpis)[len(dpis) // 2] if dpis else None,
+            "images_over_dpi": sum(r["images_over_dpi"] for r in rs),
+            "saving_est_mb": round(sum(r["downsample_saving_est"] for r in rs) / 2**20, 2),
+        }
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]["saving_est_mb"]))
+
+
+def format_file(r: Dict[str, Any], show_images: bool) -> str:
+    mb = 2**20
+    lines = [f"{r['path']}: {r['bytes'] / mb:.2f} MB, {r['pages']} pages, {r['objects']} objects"
+             + (" (xref rebuilt by scanning)" if r["xref_fallback"] else "")]
+    for name, c in sorted(r["categories"].items(), key=lambda kv: -kv[1]["bytes"]):
+        if c["count"] or c["bytes"]:
+            lines.append(f"  {name:<14} {c['count']:>6} obj {c['bytes'] / mb:>9.2f} MB {c['bytes'] / r['bytes']:>7.1%}")
+    if r["fonts"]:
+        lines.append("  fonts: " + ", ".join(f"{k} {v / 1024:.0f} KB" for k, v in list(r["fonts"].items())[:6]))
+    lines.append(f"  {r['images_over_dpi']} images above target DPI, est. saving {r['downsample_saving_est'] / mb:.2f} MB")
+    if show_images:
+        for i in r["images"][:20]:
+            drawn = f"{i['drawn_pt'][0]:.0f}x{i['drawn_pt'][1]:.0f}pt" if i["drawn_pt"] else "not drawn"
+            lines.append(f"    obj {i['obj']:>5} {i['width']}x{i['height']}px {i['filter']:<12} {i['bytes'] / 1024:>8.0f} KB "
+                         f"{drawn:>14} {str(i['dpi'] or '-'):>7} dpi" + (" +mask" if i["has_mask"] else ""))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size breakdown of generated report PDFs (images, fonts, content)")
+    parser.add_argument("files", nargs="*", help="PDF files to analyze")
+    parser.add_argument("--reports-path", help="Analyze REPORTS_PATH/<id>/unsigned.pdf|signed.pdf in bulk")
+    parser.add_argument("--kind", choices=["unsigned", "signed", "both"], default="both")
+    parser.add_argument("--target-dpi", type=float, default=150.0, help="Images drawn above this DPI are downsampling candidates")
+    parser.add_argument("--min-image-kb", type=float, default=50.0, help="Ignore smaller images for the saving estimate")
+    parser.add_argument("--images", action="store_true", help="List the largest images of every file")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--no-api", action="store_true", help="Do not look up report templates")
+    parser.add_argument("--out", help="Write per-file results and the summary as JSON")
+    args = parser.parse_args()
+    if not args.files and not args.reports_path:
+        args.reports_path = os.getenv("REPORTS_PATH")
+    if not args.files and not args.reports_path:
+        parser.error("give PDF files or --reports-path (or set REPORTS_PATH)")
+
+    targets: List[Tuple[Optional[int], str, str]] = [(None, "file", p) for p in args.files]
+    if args.reports_path:
+        targets += [t for t in report_files(args.reports_path) if args.kind in ("both", t[1])]
+    meta: Dict[int, Dict[str, Any]] = {}
+    ids = sorted({rid for rid, _, _ in targets if rid is not None})
+    if ids and not args.no_api:
+        meta = lookup_templates(args, ids)
+
+    rows, failed = [], []
+    for rid, kind, path in targets:
+        try:
+            r = analyze(path, args.target_dpi, int(args.min_image_kb * 1024))
+        except (OSError, PdfError, ValueError) as e:
+            failed.append({"path": path, "error": str(e)})
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        r.update({"report_id": rid, "kind": kind, **meta.get(rid, {})})
+        rows.append(r)
+        if len(targets) <= 20 or args.images:
+            print(format_file(r, args.images))
+
+    summary = summarize(rows) if rows else {}
+    if len(rows) > 1:
+        print(f"\n{'template':<48} {'files':>5} {'mean MB':>8} {'max MB':>7} {'img %':>6} {'font %':>6} {'dpi50':>6} {'>dpi':>5} {'save MB':>8}")
+        for key, s in summary.items():
+            print(f"{key[:48]:<48} {s['files']:>5} {s['mean_mb']:>8} {s['max_mb']:>7} {(s['image_share'] or 0) * 100:>6.1f} "
+                  f"{(s['font_share'] or 0) * 100:>6.1f} {s['median_dpi'] or '-':>6} {s['images_over_dpi']:>5} {s['saving_est_mb']:>8}")
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps({"files": rows, "failed": failed, "templates": summary}, indent=2, ensure_ascii=False))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
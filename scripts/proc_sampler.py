@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Sample memory and CPU of local processes from /proc while a benchmark runs.
+
+Processes are grouped by label; a process belongs to a group when its comm
+or command line contains one of the group's patterns (case-insensitive).
+Each sample holds, per group, the process count, summed RSS, open file
+descriptors and CPU usage since the previous sample (100 = one core).
+Descriptors of processes owned by another user are not readable without
+privileges; those groups report fds as None. Only works on Linux and only
+sees processes on this machine, so run it next to the backend.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_GROUPS = {
+    "chrome": ["chrome", "chromium", "headless_shell"],
+    "node": ["node"],
+}
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class GroupSample:
+    processes: int = 0
+    rss_bytes: int = 0
+    cpu_percent: Optional[float] = None
+    fds: Optional[int] = None
+
+
+@dataclass
+class Sample:
+    t: float  # seconds since the sampler started
+    groups: Dict[str, GroupSample] = field(default_factory=dict)
+
+
+def proc_available() -> bool:
+    return os.path.isdir("/proc/self")
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+
+
+def _cpu_ticks(pid: int) -> Optional[int]:
+    stat = _read(f"/proc/{pid}/stat")
+    if not stat:
+        return None
+    # comm may contain spaces; fields after the closing paren are fixed
+    rest = stat[stat.rfind(")") + 2:].split()
+    return int(rest[11]) + int(rest[12])  # utime + stime
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    statm = _read(f"/proc/{pid}/statm")
+    if not statm:
+        return None
+    return int(statm.split()[1]) * _PAGE_SIZE
+
+
+def _fd_count(pid: int) -> Optional[int]:
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return None
+
+
+class ProcessSampler:
+    def __init__(self, groups: Optional[Dict[str, List[str]]] = None, interval: float = 0.5,
+                 pids: Optional[List[int]] = None):
+        self.groups = {k: [p.lower() for p in v] for k, v in (groups or DEFAULT_GROUPS).items()}
+        self.interval = interval
+        # Explicit PIDs (and their children) go to the "pids" group
+        self.pids = set(pids or [])
+        self.samples: List[Sample] = []
+        self._prev: Dict[int, Tuple[int, float]] = {}  # pid -> (cpu ticks, monotonic time)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._t0 = time.monotonic()
+
+    def _label(self, pid: int, parents: Dict[int, int]) -> Optional[str]:
+        if self.pids:
+            p = pid
+            while p and p not in self.pids:
+                p = parents.get(p, 0)
+            if p:
+                return "pids"
+        comm = (_read(f"/proc/{pid}/comm") or "").strip().lower()
+        cmd = (_read(f"/proc/{pid}/cmdline") or "").replace("\0", " ").lower()
+        for label, patterns in self.groups.items():
+            if any(p in comm or p in cmd for p in patterns):
+                return label
+        return None
+
+    def _parents(self, pids: List[int]) -> Dict[int, int]:
+        parents = {}
+        for pid in pids:
+            stat = _read(f"/proc/{pid}/stat")
+            if stat:
+                parents[pid] = int(stat[stat.rfind(")") + 2:].split()[1])
+        return parents
+
+    def sample(self) -> Sample:
+        now = time.monotonic()
+        pids = [int(d) for d in os.listdir("/proc") if d.isdigit() and int(d) != os.getpid()]
+        parents = self._parents(pids) if self.pids else {}
+        s = Sample(t=round(now - self._t0, 3))
+        seen = {}
+        for pid in pids:
+            label = self._label(pid, parents)
+            if label is None:
+                continue
+            rss = _rss_bytes(pid)
+            ticks = _cpu_ticks(pid)
+            if rss is None or ticks is None:
+                continue  # exited while we looked
+            g = s.groups.setdefault(label, GroupSample())
+            g.processes += 1
+            g.rss_bytes += rss
+            fds = _fd_count(pid)
+            if fds is not None:
+                g.fds = (g.fds or 0) + fds
+            prev = self._prev.get(pid)
+            if prev is not None and now > prev[1]:
+                g.cpu_percent = (g.cpu_percent or 0.0) + (ticks - prev[0]) / _CLK_TCK / (now - prev[1]) * 100.0
+            seen[pid] = (ticks, now)
+        self._prev = seen
+        self.samples.append(s)
+        return s
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "ProcessSampler":
+        if not proc_available():
+            raise RuntimeError("/proc is not available; process sampling needs Linux")
+        self._t0 = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="proc-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def now(self) -> float:
+        """Current time on the samples' clock, for marking benchmark phases."""
+        return time.monotonic() - self._t0
+
+    def window(self, start: float, end: float, label: str) -> Dict[str, Optional[float]]:
+        """Peak/mean RSS and mean CPU of one group between two now() marks."""
+        rows = [s.groups[label] for s in self.samples if start <= s.t <= end and label in s.groups]
+        if not rows:
+            return {"rss_peak_mb": None, "rss_mean_mb": None, "cpu_mean_percent": None, "processes_max": None, "fds_max": None}
+        cpu = [g.cpu_percent for g in rows if g.cpu_percent is not None]
+        fds = [g.fds for g in rows if g.fds is not None]
+        return {
+            "rss_peak_mb": round(max(g.rss_bytes for g in rows) / 2**20, 1),
+            "rss_mean_mb": round(sum(g.rss_bytes for g in rows) / len(rows) / 2**20, 1),
+            "cpu_mean_percent": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "processes_max": max(g.processes for g in rows),
+            "fds_max": max(fds) if fds else None,
+        }
+
+    def series(self) -> List[Dict[str, object]]:
+        """Flat rows (t, group, processes, rss_mb, cpu_percent, fds) for CSV/JSON output."""
+        out = []
+        for s in self.samples:
+            for label, g in s.groups.items():
+                out.append({
+                    "t": s.t,
+                    "group": label,
+                    "processes": g.processes,
+                    "rss_mb": round(g.rss_bytes / 2**20, 1),
+                    "cpu_percent": round(g.cpu_percent, 1) if g.cpu_percent is not None else None,
+                    "fds": g.fds,
+                })
+        return out
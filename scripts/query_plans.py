@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Capture EXPLAIN (ANALYZE, BUFFERS) plans for the controllers' SQL.
+
+The list controllers build raw SQL with ILIKE searches, multi-table JOINs
+and a COUNT(*) companion per page, and the report endpoints and the worker
+share a 7-way join. QUERIES below is a catalogue of those statements, copied
+from the controllers with the filters a typical request adds. Parameters are
+looked up in the database itself (the busiest company, its busiest
+technician, a recent report, ...), so the plans reflect whatever data is
+loaded: muayenedb.sql, a generate_tenant.py sql dump, or production-like
+fixtures. The database is ANALYZEd before every capture, so a freshly loaded
+or migrated schema has statistics for the planner and the table sizes.
+
+Every statement runs as PREPARE + EXPLAIN EXECUTE inside a transaction that
+is rolled back (the worker's job pick is an UPDATE), which matches how
+node-postgres sends parameterised queries. Each plan is checked for:
+
+  * Seq Scan on a table with at least --seq-min-rows rows, with a suggested
+    index from the scan's filter (a pg_trgm GIN index for ILIKE);
+  * row estimate misses of --misestimate x or more between planned and
+    actual rows of a node;
+  * sorts that spill to disk.
+
+Results are written as JSON together with the table sizes and the index
+list, so captures taken before and after a migration in
+backend/config/migrations can be compared with --diff.
+
+Usage:
+  python scripts/query_plans.py --load muayenedb.sql --out plans-before.json
+  psql -d muayenedb -f backend/config/migrations/010_x.sql
+  python scripts/query_plans.py --out plans-after.json
+  python scripts/query_plans.py --diff plans-before.json plans-after.json
+
+Requires: psql on PATH (connection from DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD)
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Representative parameters, each a query returning one value. Later lookups
+# may use earlier ones as :name.
+LOOKUPS: List[Tuple[str, str]] = [
+    ("company_id", "SELECT company_id FROM work_orders GROUP BY company_id ORDER BY COUNT(*) DESC LIMIT 1"),
+    ("technician_id", """SELECT i.technician_id FROM inspections i JOIN work_orders wo ON i.work_order_id = wo.id
+                         WHERE wo.company_id = :company_id GROUP BY i.technician_id ORDER BY COUNT(*) DESC LIMIT 1"""),
+    ("busy_date", """SELECT inspection_date::text FROM inspections WHERE technician_id = :technician_id
+                     GROUP BY inspection_date ORDER BY COUNT(*) DESC LIMIT 1"""),
+    ("work_order_id", """SELECT wo.id FROM work_orders wo JOIN inspections i ON i.work_order_id = wo.id
+                         WHERE wo.company_id = :company_id GROUP BY wo.id ORDER BY COUNT(*) DESC LIMIT 1"""),
+    ("customer_company_id", """SELECT customer_company_id FROM offers WHERE company_id = :company_id
+                               GROUP BY customer_company_id ORDER BY COUNT(*) DESC LIMIT 1"""),
+    ("report_id", """SELECT r.id FROM reports r JOIN inspections i ON r.inspection_id = i.id
+                     JOIN work_orders wo ON i.work_order_id = wo.id WHERE wo.company_id = :company_id
+                     ORDER BY r.id DESC LIMIT 1"""),
+    ("qr_token", "SELECT qr_token FROM reports WHERE id = :report_id"),
+    ("tracking_token", "SELECT tracking_token FROM offers WHERE company_id = :company_id AND tracking_token IS NOT NULL ORDER BY id DESC LIMIT 1"),
+    ("equipment_type", "SELECT type FROM equipment WHERE company_id = :company_id GROUP BY type ORDER BY COUNT(*) DESC LIMIT 1"),
+    # A three-letter fragment of a customer name, wrapped like the controllers do
+    ("search", "SELECT '%' || substr(name, 2, 3) || '%' FROM customer_companies WHERE company_id = :company_id ORDER BY id LIMIT 1"),
+]
+FALLBACKS = {"busy_date": "2025-01-01", "search": "%a%"}
+
+# name -> (source, SQL with $n placeholders, parameters as :lookup names or literals)
+QUERIES: Dict[str, Tuple[str, str, List[str]]] = {
+    "customers.list": ("customerCompanyController.getCustomerCompanies", """
+        SELECT id, name, tax_number, address, contact, email, authorized_person, created_at, updated_at
+        FROM customer_companies
+        WHERE company_id = $1
+        ORDER BY created_at DESC LIMIT $2 OFFSET $3""", [":company_id", "50", "0"]),
+    "customers.search": ("customerCompanyController.getCustomerCompanies", """
+        SELECT id, name, tax_number, address, contact, email, authorized_person, created_at, updated_at
+        FROM customer_companies
+        WHERE company_id = $1
+        AND (name ILIKE $2 OR tax_number ILIKE $2 OR email ILIKE $2)
+        ORDER BY created_at DESC LIMIT $3 OFFSET $4""", [":company_id", ":search", "50", "0"]),
+    "customers.search_count": ("customerCompanyController.getCustomerCompanies", """
+        SELECT COUNT(*) FROM customer_companies WHERE company_id = $1
+        AND (name ILIKE $2 OR tax_number ILIKE $2 OR email ILIKE $2)""", [":company_id", ":search"]),
+    "equipment.list": ("equipmentController.getEquipment", """
+        SELECT id, name, type, template, is_active, created_at, updated_at
+        FROM equipment
+        WHERE company_id = $1 AND is_active = true
+        AND type = $2
+        ORDER BY created_at DESC LIMIT $3 OFFSET $4""", [":company_id", ":equipment_type", "50", "0"]),
+    "equipment.search_count": ("equipmentController.getEquipment", """
+        SELECT COUNT(*) FROM equipment WHERE company_id = $1 AND is_active = true
+        AND (name ILIKE $2 OR type ILIKE $2)""", [":company_id", ":search"]),
+    "offers.search": ("offerController.getOffers", """
+        SELECT o.*, cc.name as customer_name, cc.email as customer_email,
+               t1.name as created_by_name, t1.surname as created_by_surname,
+               t2.name as approved_by_name, t2.surname as approved_by_surname
+        FROM offers o
+        JOIN customer_companies cc ON o.customer_company_id = cc.id
+        JOIN technicians t1 ON o.created_by = t1.id
+        LEFT JOIN technicians t2 ON o.approved_by = t2.id
+        WHERE o.company_id = $1
+        AND (o.offer_number ILIKE $2 OR cc.name ILIKE $2)
+        ORDER BY o.created_at DESC LIMIT $3 OFFSET $4""", [":company_id", ":search", "20", "0"]),
+    "offers.search_count": ("offerController.getOffers", """
+        SELECT COUNT(*)
+        FROM offers o
+        JOIN customer_companies cc ON o.customer_company_id = cc.id
+        WHERE o.company_id = $1
+        AND (o.offer_number ILIKE $2 OR cc.name ILIKE $2)""", [":company_id", ":search"]),
+    "offers.by_customer": ("offerController.getOffers", """
+        SELECT o.*, cc.name as customer_name, cc.email as customer_email,
+               t1.name as created_by_name, t1.surname as created_by_surname,
+               t2.name as approved_by_name, t2.surname as approved_by_surname
+        FROM offers o
+        JOIN customer_companies cc ON o.customer_company_id = cc.id
+        JOIN technicians t1 ON o.created_by = t1.id
+        LEFT JOIN technicians t2 ON o.approved_by = t2.id
+        WHERE o.company_id = $1
+        AND o.customer_company_id = $2
+        ORDER BY o.created_at DESC LIMIT $3 OFFSET $4""", [":company_id", ":customer_company_id", "20", "0"]),
+    "offers.track": ("offerController.trackOffer", """
+        SELECT o.*, cc.name as customer_name, cc.authorized_person,
+               comp.name as company_name, comp.contact as company_contact
+        FROM offers o
+        JOIN customer_companies cc ON o.customer_company_id = cc.id
+        JOIN companies comp ON o.company_id = comp.id
+        WHERE o.tracking_token = $1""", [":tracking_token"]),
+    "offers.convert_slot_probe": ("offerController.convertToWorkOrder (findFreeDate)", """
+        SELECT 1 FROM inspections
+        WHERE technician_id = $1 AND inspection_date = $2
+          AND start_time = $3 AND end_time = $4
+        LIMIT 1""", [":technician_id", ":busy_date", "09:00", "17:00"]),
+    "work_orders.list": ("workOrderController.getWorkOrders", """
+        SELECT wo.*, cc.name as customer_name, cc.email as customer_email,
+               t.name as created_by_name, t.surname as created_by_surname,
+               o.offer_number,
+               COUNT(i.id) as inspection_count,
+               COUNT(CASE WHEN i.status = 'completed' THEN 1 END) as completed_inspections
+        FROM work_orders wo
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        JOIN technicians t ON wo.created_by = t.id
+        LEFT JOIN offers o ON wo.offer_id = o.id
+        LEFT JOIN inspections i ON wo.id = i.work_order_id
+        WHERE wo.company_id = $1
+        GROUP BY wo.id, cc.name, cc.email, t.name, t.surname, o.offer_number
+        ORDER BY wo.created_at DESC LIMIT $2 OFFSET $3""", [":company_id", "20", "0"]),
+    "work_orders.list_mine": ("workOrderController.getWorkOrders", """
+        SELECT wo.*, cc.name as customer_name, cc.email as customer_email,
+               t.name as created_by_name, t.surname as created_by_surname,
+               o.offer_number,
+               COUNT(i.id) as inspection_count,
+               COUNT(CASE WHEN i.status = 'completed' THEN 1 END) as completed_inspections
+        FROM work_orders wo
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        JOIN technicians t ON wo.created_by = t.id
+        LEFT JOIN offers o ON wo.offer_id = o.id
+        LEFT JOIN inspections i ON wo.id = i.work_order_id
+        WHERE wo.company_id = $1
+        AND EXISTS (
+          SELECT 1 FROM work_order_assignments woa
+          WHERE woa.work_order_id = wo.id AND woa.technician_id = $2
+        )
+        GROUP BY wo.id, cc.name, cc.email, t.name, t.surname, o.offer_number
+        ORDER BY wo.created_at DESC LIMIT $3 OFFSET $4""", [":company_id", ":technician_id", "20", "0"]),
+    "work_orders.count_mine": ("workOrderController.getWorkOrders", """
+        SELECT COUNT(DISTINCT wo.id)
+        FROM work_orders wo
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        WHERE wo.company_id = $1
+        AND EXISTS (
+          SELECT 1 FROM work_order_assignments woa
+          WHERE woa.work_order_id = wo.id AND woa.technician_id = $2
+        )""", [":company_id", ":technician_id"]),
+    "work_orders.assigned_technicians": ("workOrderController.getWorkOrders (per row)", """
+        SELECT t.id, t.name, t.surname, t.email
+        FROM work_order_assignments woa
+        JOIN technicians t ON woa.technician_id = t.id
+        WHERE woa.work_order_id = $1""", [":work_order_id"]),
+    "work_orders.inspections": ("workOrderController.getWorkOrder", """
+        SELECT i.*, e.name as equipment_name, e.type as equipment_type,
+               t.name as technician_name, t.surname as technician_surname
+        FROM inspections i
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        WHERE i.work_order_id = $1
+        ORDER BY i.inspection_date, i.start_time""", [":work_order_id"]),
+    "inspections.list": ("inspectionController.getInspections", """
+        SELECT i.*, e.name as equipment_name, e.type as equipment_type,
+               t.name as technician_name, t.surname as technician_surname,
+               wo.work_order_number, cc.name as customer_name,
+               r.id as report_id, r.is_signed, r.qr_token, r.report_style
+        FROM inspections i
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        LEFT JOIN reports r ON i.id = r.inspection_id
+        WHERE wo.company_id = $1
+        ORDER BY i.inspection_date DESC, i.start_time DESC LIMIT $2 OFFSET $3""", [":company_id", "20", "0"]),
+    "inspections.list_mine_range": ("inspectionController.getInspections", """
+        SELECT i.*, e.name as equipment_name, e.type as equipment_type,
+               t.name as technician_name, t.surname as technician_surname,
+               wo.work_order_number, cc.name as customer_name,
+               r.id as report_id, r.is_signed, r.qr_token, r.report_style
+        FROM inspections i
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        LEFT JOIN reports r ON i.id = r.inspection_id
+        WHERE wo.company_id = $1
+        AND i.technician_id = $2
+        AND i.inspection_date >= $3
+        AND i.inspection_date <= $4
+        ORDER BY i.inspection_date DESC, i.start_time DESC LIMIT $5 OFFSET $6""",
+        [":company_id", ":technician_id", ":busy_date", ":busy_date", "20", "0"]),
+    "inspections.count": ("inspectionController.getInspections", """
+        SELECT COUNT(*)
+        FROM inspections i
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        WHERE wo.company_id = $1""", [":company_id"]),
+    "inspections.check_availability": ("inspectionController.checkTimeSlotAvailability", """
+        SELECT i.id, i.start_time, i.end_time, e.name as equipment_name
+        FROM inspections i
+        JOIN equipment e ON i.equipment_id = e.id
+        WHERE i.technician_id = $1
+        AND i.inspection_date = $2
+        AND (
+          (i.start_time <= $3 AND i.end_time > $3) OR
+          (i.start_time < $4 AND i.end_time >= $4) OR
+          (i.start_time >= $3 AND i.end_time <= $4)
+        )""", [":technician_id", ":busy_date", "09:00", "17:00"]),
+    "reports.get": ("reportController.getReport / downloadReport", """
+        SELECT r.*, i.inspection_data, i.inspection_date, i.start_time, i.end_time, i.photo_urls,
+               e.name as equipment_name, e.type as equipment_type, e.template,
+               t.name as technician_name, t.surname as technician_surname,
+               wo.work_order_number, cc.name as customer_name,
+               comp.name as company_name, comp.logo_url
+        FROM reports r
+        JOIN inspections i ON r.inspection_id = i.id
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        JOIN companies comp ON wo.company_id = comp.id
+        WHERE r.id = $1 AND wo.company_id = $2""", [":report_id", ":company_id"]),
+    "reports.worker_load": ("reportWorker.processJob", """
+        SELECT r.*, i.inspection_data, i.inspection_date, i.start_time, i.end_time, i.photo_urls,
+               e.name as equipment_name, e.type as equipment_type, e.template,
+               t.name as technician_name, t.surname as technician_surname,
+               wo.work_order_number, cc.name as customer_name,
+               comp.name as company_name, comp.logo_url
+        FROM reports r
+        JOIN inspections i ON r.inspection_id = i.id
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        JOIN companies comp ON wo.company_id = comp.id
+        WHERE r.id = $1""", [":report_id"]),
+    "reports.public": ("reportController.getPublicReport / downloadPublicReport", """
+        SELECT r.*, i.inspection_data, i.inspection_date, i.start_time, i.end_time, i.photo_urls,
+               e.name as equipment_name, e.type as equipment_type,
+               t.name as technician_name, t.surname as technician_surname,
+               wo.work_order_number, cc.name as customer_name,
+               comp.name as company_name, comp.contact as company_contact
+        FROM reports r
+        JOIN inspections i ON r.inspection_id = i.id
+        JOIN equipment e ON i.equipment_id = e.id
+        JOIN technicians t ON i.technician_id = t.id
+        JOIN work_orders wo ON i.work_order_id = wo.id
+        JOIN customer_companies cc ON wo.customer_company_id = cc.id
+        JOIN companies comp ON wo.company_id = comp.id
+        WHERE r.qr_token = $1""", [":qr_token"]),
+    "report_jobs.pick": ("reportWorker.fetchAndMarkJobs", """
+        WITH picked AS (
+          SELECT id FROM report_jobs
+          WHERE status = 'pending'
+          ORDER BY priority ASC, created_at ASC
+          FOR UPDATE SKIP LOCKED
+          LIMIT $1
+        )
+        UPDATE report_jobs j
+        SET status = 'processing', attempts = attempts + 1, started_at = CURRENT_TIMESTAMP
+        FROM picked p
+        WHERE j.id = p.id
+        RETURNING j.*""", ["3"]),
+    "technicians.list": ("technicianController.getTechnicians", """
+        SELECT id, name, surname, email, phone, permissions, is_active, created_at, updated_at
+        FROM technicians
+        WHERE company_id = $1
+        ORDER BY created_at DESC""", [":company_id"]),
+}
+
+FILTER_COLUMN = re.compile(r"\(?\(?(?:\w+\.)?(\w+)\)?(?:::\w+)?\s*(=|<=|>=|<|>|~~\*|~~)\s")
+
+
+def literal(value: Optional[str]) -> str:
+    return "NULL" if value is None else "'" + str(value).replace("'", "''") + "'"
+
+
+class Psql:
+    """Runs SQL through the psql client, connection from the backend's DB_* variables."""
+
+    def __init__(self, host: str, port: str, dbname: str, user: str, password: str):
+        self.args = ["psql", "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1",
+                     "-h", host, "-p", str(port), "-U", user, "-d", dbname]
+        self.env = {**os.environ, "PGPASSWORD": password, "PGCLIENTENCODING": "UTF8"}
+
+    def run(self, sql: str, timeout: float = 600.0) -> str:
+        p = subprocess.run(self.args, input=sql, capture_output=True, text=True, env=self.env, timeout=timeout)
+        if p.returncode != 0:
+            raise RuntimeError(p.stderr.strip() or f"psql exited with {p.returncode}")
+        return p.stdout
+
+    def run_file(self, path: str):
+        p = subprocess.run(self.args + ["-f", path], capture_output=True, text=True, env=self.env)
+        if p.returncode != 0:
+            raise RuntimeError(f"{path}: {p.stderr.strip()}")
+
+    def value(self, sql: str) -> Optional[str]:
+        out = self.run(sql.rstrip().rstrip(";") + ";\n").strip()
+        return out.splitlines()[0] if out else None
+
+    def json(self, sql: str) -> Any:
+        out = self.value(f"SELECT COALESCE(json_agg(t), '[]') FROM ({sql}) t")
+        return json.loads(out) if out else []
+
+
+def resolve_params(db: Psql) -> Dict[str, Optional[str]]:
+    values: Dict[str, Optional[str]] = {}
+    for name, sql in LOOKUPS:
+        for prev, v in values.items():
+            sql = sql.replace(f":{prev}", literal(v))
+        values[name] = db.value(sql) or FALLBACKS.get(name)
+    return values
+
+
+def schema_snapshot(db: Psql) -> Dict[str, Any]:
+    # reltuples is -1 on PostgreSQL 14+ until the table is first analyzed
+    tables = db.json("""SELECT c.relname AS name,
+                               CASE WHEN c.reltuples < 0 THEN COALESCE(s.n_live_tup, 0) ELSE c.reltuples::bigint END AS rows,
+                               pg_total_relation_size(c.oid) AS bytes
+                        FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+                        WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace
+                        ORDER BY c.relname""")
+    indexes = db.json("SELECT tablename AS table, indexname AS name, indexdef AS def FROM pg_indexes WHERE schemaname = 'public' ORDER BY 1, 2")
+    return {
+        "server_version": db.value("SHOW server_version"),
+        "tables": {t["name"]: {"rows": t["rows"], "bytes": t["bytes"]} for t in tables},
+        "indexes": {i["name"]: {"table": i["table"], "def": i["def"]} for i in indexes},
+    }
+
+
+def leading_columns(indexes: Dict[str, Dict[str, str]]) -> Dict[str, set]:
+    """table -> first column of each of its indexes."""
+    out: Dict[str, set] = {}
+    for ix in indexes.values():
+        m = re.search(r"USING \w+ \(([^,)\s]+)", ix["def"])
+        if m:
+            out.setdefault(ix["table"], set()).add(m.group(1).strip('"'))
+    return out
+
+
+def explain(db: Psql, sql: str, params: List[Optional[str]]) -> Dict[str, Any]:
+    script = (
+        "BEGIN;\n"
+        f"PREPARE plan_q AS {sql};\n"
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE plan_q({', '.join(literal(p) for p in params)});\n"
+        "ROLLBACK;\n"
+    ) if params else (
+        "BEGIN;\n"
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql};\n"
+        "ROLLBACK;\n"
+    )
+    return json.loads(db.run(script))[0]
+
+
+def walk(node: Dict[str, Any], depth: int = 0):
+    yield node, depth
+    for child in node.get("Plans", []):
+        yield from walk(child, depth + 1)
+
+
+def shape(node: Dict[str, Any]) -> str:
+    """Compact plan signature: node types with their relation/index, used to spot plan changes."""
+    label = node["Node Type"]
+    target = node.get("Index Name") or node.get("Relation Name")
+    if target:
+        label += f" {target}"
+    kids = node.get("Plans", [])
+    return label + ("(" + ", ".join(shape(k) for k in kids) + ")" if kids else "")
+
+
+def check_plan(plan: Dict[str, Any], tables: Dict[str, Dict[str, Any]], indexed: Dict[str, set],
+               seq_min_rows: int, misestimate: float) -> List[Dict[str, Any]]:
+    flags = []
+    for node, _ in walk(plan):
+        kind = node["Node Type"]
+        rel = node.get("Relation Name")
+        if kind == "Seq Scan" and rel and tables.get(rel, {}).get("rows", 0) >= seq_min_rows:
+            flag = {"kind": "seq_scan", "relation": rel, "table_rows": tables[rel]["rows"],
+                    "filter": node.get("Filter"), "rows_removed": node.get("Rows Removed by Filter", 0) * node.get("Actual Loops", 1),
+                    "loops": node.get("Actual Loops", 1)}
+            suggestions = []
+            for col, op in FILTER_COLUMN.findall(node.get("Filter") or ""):
+                if col in indexed.get(rel, set()) and not op.startswith("~~"):
+                    continue
+                if op.startswith("~~"):
+                    s = f"CREATE INDEX ON {rel} USING gin ({col} gin_trgm_ops)"
+                else:
+                    s = f"CREATE INDEX ON {rel} ({col})"
+                if s not in suggestions:
+                    suggestions.append(s)
+            if suggestions:
+                flag["suggest"] = suggestions
+            flags.append(flag)
+        planned, actual = node.get("Plan Rows", 0), node.get("Actual Rows", 0)
+        if node.get("Actual Loops", 1) and max(planned, actual) >= 100:
+            ratio = (max(planned, actual) + 1) / (min(planned, actual) + 1)
+            if ratio >= misestimate:
+                flags.append({"kind": "misestimate", "node": kind, "relation": rel, "planned_rows": planned,
+                              "actual_rows": actual, "ratio": round(ratio, 1)})
+        if "external" in (node.get("Sort Method") or "").lower():
+            flags.append({"kind": "sort_spill", "node": kind, "space_kb": node.get("Sort Space Used"),
+                          "sort_key": node.get("Sort Key")})
+    return flags
+
+
+def capture(db: Psql, names: List[str], repeat: int, seq_min_rows: int, misestimate: float) -> Dict[str, Any]:
+    schema = schema_snapshot(db)
+    indexed = leading_columns(schema["indexes"])
+    params = resolve_params(db)
+    results = {}
+    for name in names:
+        source, sql, raw = QUERIES[name]
+        values = [params.get(p[1:]) if p.startswith(":") else p for p in raw]
+        try:
+            runs = [explain(db, sql.strip(), values) for _ in range(repeat)]
+        except RuntimeError as e:
+            results[name] = {"source": source, "params": values, "error": str(e)}
+            continue
+        last = runs[-1]  # warm cache
+        plan = last["Plan"]
+        results[name] = {
+            "source": source,
+            "sql": re.sub(r"\s+", " ", sql).strip(),
+            "params": values,
+            "execution_ms": round(statistics.median(r["Execution Time"] for r in runs), 3),
+            "planning_ms": round(statistics.median(r["Planning Time"] for r in runs), 3),
+            "rows": plan.get("Actual Rows"),
+            "shared_hit": plan.get("Shared Hit Blocks", 0),
+            "shared_read": runs[0]["Plan"].get("Shared Read Blocks", 0),
+            "shape": shape(plan),
+            "flags": check_plan(plan, schema["tables"], indexed, seq_min_rows, misestimate),
+            "plan": plan,
+        }
+    return {"captured_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "params": params, **schema, "queries": results}
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], slower: float = 1.5) -> List[str]:
+    lines = []
+    added = sorted(set(new["indexes"]) - set(old["indexes"]))
+    dropped = sorted(set(old["indexes"]) - set(new["indexes"]))
+    for name in added:
+        lines.append(f"+ index {name}: {new['indexes'][name]['def']}")
+    for name in dropped:
+        lines.append(f"- index {name}: {old['indexes'][name]['def']}")
+    for name in sorted(set(old["queries"]) | set(new["queries"])):
+        a, b = old["queries"].get(name), new["queries"].get(name)
+        if not a or not b or "error" in a or "error" in b:
+            state = lambda q: "missing" if not q else "error" if "error" in q else "ok"  # noqa: E731
+            lines.append(f"~ {name}: before: {state(a)}, after: {state(b)}")
+            continue
+        notes = []
+        if a["shape"] != b["shape"]:
+            notes.append(f"plan changed\n    before: {a['shape']}\n    after:  {b['shape']}")
+        ratio = (b["execution_ms"] + 0.01) / (a["execution_ms"] + 0.01)
+        if ratio >= slower or ratio <= 1 / slower:
+            notes.append(f"{a['execution_ms']} -> {b['execution_ms']} ms ({ratio:.2f}x)")
+        key = lambda f: (f["kind"], f.get("relation"), f.get("node"))  # noqa: E731
+        gone = {key(f) for f in a["flags"]} - {key(f) for f in b["flags"]}
+        new_flags = {key(f) for f in b["flags"]} - {key(f) for f in a["flags"]}
+        notes += [f"fixed {k[0]} {k[1] or k[2]}" for k in sorted(gone, key=str)]
+        notes += [f"new {k[0]} {k[1] or k[2]}" for k in sorted(new_flags, key=str)]
+        if notes:
+            lines.append(f"* {name}: " + "; ".join(notes))
+    return lines
+
+
+def format_table(result: Dict[str, Any]) -> str:
+    lines = [f"{'query':<34} {'exec ms':>9} {'plan ms':>8} {'rows':>7} {'hit':>7} {'read':>7}  flags"]
+    for name, q in result["queries"].items():
+        if "error" in q:
+            lines.append(f"{name:<34} ERROR {q['error'].splitlines()[0]}")
+            continue
+        flags = ", ".join(f"{f['kind']}:{f.get('relation') or f.get('node')}" for f in q["flags"]) or "-"
+        lines.append(f"{name:<34} {q['execution_ms']:>9} {q['planning_ms']:>8} {q['rows'] or 0:>7} "
+                     f"{q['shared_hit']:>7} {q['shared_read']:>7}  {flags}")
+    suggestions = sorted({s for q in result["queries"].values() for f in q.get("flags", []) for s in f.get("suggest", [])})
+    if suggestions:
+        lines.append("\nIndex candidates (from Seq Scan filters):")
+        lines += [f"  {s};" + ("  -- needs CREATE EXTENSION pg_trgm" if "gin_trgm_ops" in s else "") for s in suggestions]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN (ANALYZE, BUFFERS) capture for the controllers' queries")
+    parser.add_argument("--db-host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--db-port", default=os.getenv("DB_PORT", "5432"))
+    parser.add_argument("--db-name", default=os.getenv("DB_NAME", "muayenedb"))
+    parser.add_argument("--db-user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--db-password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--load", action="append", default=[], metavar="SQL", help="Run this psql file first (repeatable, in order), e.g. muayenedb.sql or a generate_tenant.py dump")
+    parser.add_argument("--queries", help="Comma-separated subset of: " + ", ".join(QUERIES))
+    parser.add_argument("--repeat", type=int, default=3, help="Executions per query (median time, last plan)")
+    parser.add_argument("--seq-min-rows", type=int, default=1000, help="Flag Seq Scans on tables with at least this many rows")
+    parser.add_argument("--misestimate", type=float, default=10.0, help="Flag nodes whose planned and actual rows differ by this factor")
+    parser.add_argument("--out", help="Write the capture as JSON")
+    parser.add_argument("--diff", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two captures instead of running")
+    parser.add_argument("--print-params", action="store_true", help="Print the looked-up parameters")
+    args = parser.parse_args()
+
+    if args.diff:
+        with open(args.diff[0], encoding="utf_8") as f:
+            before = json.load(f)
+        with open(args.diff[1], encoding="utf_8") as f:
+            after = json.load(f)
+        lines = diff(before, after)
+        print("\n".join(lines) if lines else "No plan changes")
+        sys.exit(0)
+
+    names = [n for n in (args.queries.split(",") if args.queries else QUERIES) if n]
+    unknown = [n for n in names if n not in QUERIES]
+    if unknown:
+        parser.error(f"unknown queries: {', '.join(unknown)}")
+
+    db = Psql(args.db_host, args.db_port, args.db_name, args.db_user, args.db_password)
+    try:
+        for path in args.load:
+            print(f"Loading {path}", file=sys.stderr)
+            db.run_file(path)
+        # Fresh statistics for the planner and for the table sizes, also right after a migration
+        db.run("ANALYZE;\n")
+        result = capture(db, names, max(1, args.repeat), args.seq_min_rows, args.misestimate)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"psql failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.print_params:
+        print(json.dumps(result["params"], indent=2, ensure_ascii=False))
+    print(format_table(result))
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(result, indent=2, ensure_ascii=False))
+    failed = any("error" in q for q in result["queries"].values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Replay captured API traffic against a backend at 1x/5x/20x speed.
+
+Start the API with TRAFFIC_CAPTURE_PATH=/path/traffic.jsonl and
+middleware/trafficCapture.js writes one line per request: method, route
+template (/api/offers/:id/send), path params, query and body *shape*, uploaded
+file sizes, captured status and latency, and the IDs found in the response.
+Shapes keep IDs, numbers, dates and short enum-like strings; free text and
+secrets are reduced to their length. Login JWTs are not written at all, and
+the tokens that open a public page (offer tracking_token, report qr_token and
+the :token/:qrToken path params) are kept only as a sha256 digest, so the log
+does not give access to the production data it describes.
+
+The replayer re-issues the requests with the captured inter-arrival times
+divided by --speeds, from a pool of keep-alive clients, so the real mix of
+list/search reads and bursty report generation hits the server. IDs are
+threaded the way BackendTester threads offer_id -> work_order_id ->
+inspection_id -> report_id: when a captured response produced an ID (a
+created offer, the inspections of a converted work order, a prepare-async
+jobId), the replay response in the same position gives the new value, and
+later requests that used the old ID get the new one. A request whose ID is
+still being produced waits for it (up to --id-wait seconds). IDs that existed
+before the capture are sent unchanged, which is right for a restored copy of
+the captured database; the exception is digested tokens, which cannot be sent
+back and count as unmapped unless the replay produced them. When the
+producing request fails in the replay, its IDs are sent unchanged as well
+(--unmapped keep) or the requests that need them are skipped
+(--unmapped skip).
+
+All authenticated requests use the --email account's token; POST
+/auth/login is replayed with those credentials too. Uploaded photos are
+replaced by noise PNGs of the captured size, free-text fields by filler of
+the captured length and dates are moved forward by the time since the
+capture (--no-shift-dates to keep them).
+
+Usage:
+  TRAFFIC_CAPTURE_PATH=/var/log/muayene/traffic.jsonl npm start   # on the server
+  python scripts/replay_traffic.py traffic.jsonl --describe
+  python scripts/replay_traffic.py traffic.jsonl --speeds 1,5,20 --out replay.json
+  python scripts/replay_traffic.py traffic.jsonl --routes '^/api/(inspections|reports)' --limit 2000 --speeds 20
+
+Requires: pip install requests
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from load_backend import percentile
+from test_backend import BackendTester, synthetic_png
+
+# Same key rules as middleware/trafficCapture.js
+ID_KEY = re.compile(r"(^id$|_id$|Id$|_token$|Token$)")
+TOKEN_DIGEST = "sha256:"
+DATE_STRING = re.compile(r"^(\d{4}-\d{2}-\d{2})([T ][0-9:.]+(Z|[+-]\d{2}:?\d{2})?)?$")
+
+# Normalized key/segment name -> ID namespace
+KINDS = {
+    "customercompany": "customer-companies", "customercompanies": "customer-companies", "customer": "customer-companies",
+    "company": "companies", "companies": "companies",
+    "equipment": "equipment",
+    "offer": "offers", "offers": "offers",
+    "workorder": "work-orders", "workorders": "work-orders",
+    "inspection": "inspections", "inspections": "inspections",
+    "report": "reports", "reports": "reports",
+    "technician": "technicians", "technicians": "technicians",
+    "job": "jobs", "jobs": "jobs",
+    "qrtoken": "qr", "trackingtoken": "tracking", "token": "tracking",
+}
+# Path params that are not entity IDs
+NOT_IDS = {"filename", "photoFilename", "permission"}
+# Routes whose response "data.id" is not of the route's own resource
+ROOT_KIND = {"/api/offers/:id/convert-to-work-order": "work-orders"}
+LOGIN_ROUTE = "/api/auth/login"
+
+
+def kind_of(name: str, route: str) -> Optional[str]:
+    """ID namespace of a key, path param or root ("") ID."""
+    if name in NOT_IDS:
+        return None
+    if name in ("", "id"):
+        if name == "" and route in ROOT_KIND:
+            return ROOT_KIND[route]
+        segments = [s for s in route.split("/") if s and s != "api"]
+        name = segments[0] if segments else ""
+    n = re.sub(r"[^a-z]", "", name.lower())
+    if n.endswith("id") and n != "id":
+        n = n[:-2]
+    return KINDS.get(n, n or None)
+
+
+def collect_ids(value: Any, parent: str = "", out: Optional[List[Tuple[str, Any]]] = None, depth: int = 0) -> List[Tuple[str, Any]]:
+    """Port of collectIds() in middleware/trafficCapture.js, for the replay responses."""
+    out = [] if out is None else out
+    if len(out) >= 200 or depth > 6 or not isinstance(value, (dict, list)):
+        return out
+    if isinstance(value, list):
+        for v in value:
+            collect_ids(v, parent, out, depth + 1)
+        return out
+    for k, v in value.items():
+        if len(out) >= 200:
+            break
+        if isinstance(v, (dict, list)):
+            collect_ids(v, k, out, depth + 1)
+        elif k == "id":
+            out.append((parent, v))
+        elif ID_KEY.search(k) and v is not None:
+            out.append((k, v))
+    return out
+
+
+def load_log(path: str, routes: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    pattern = re.compile(routes) if routes else None
+    entries = []
+    with open(path, encoding="utf_8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            e = json.loads(line)
+            if pattern and not pattern.search(e["route"]):
+                continue
+            entries.append(e)
+    entries.sort(key=lambda e: e["ts"])
+    return entries[:limit] if limit else entries
+
+
+def describe(entries: List[Dict[str, Any]]) -> str:
+    """Route mix, rates and burstiness of a capture."""
+    span = (entries[-1]["ts"] - entries[0]["ts"]) / 1000.0 if len(entries) > 1 else 0.0
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for e in entries:
+        by_route.setdefault(f"{e['method']} {e['route']}", []).append(e)
+    lines = [f"{len(entries)} requests over {span:.0f} s ({len(entries) / span if span else 0:.2f} req/s), {len(by_route)} routes",
+             f"{'route':<58} {'count':>7} {'share':>6} {'ms p50':>8} {'ms p95':>8} {'burst':>8}"]
+    for key, es in sorted(by_route.items(), key=lambda kv: -len(kv[1])):
+        ms = [e["ms"] for e in es if e.get("ms") is not None]
+        # Busiest minute against the average minute: how bursty the route is
+        minutes: Dict[int, int] = {}
+        for e in es:
+            minutes[e["ts"] // 60000] = minutes.get(e["ts"] // 60000, 0) + 1
+        avg = len(es) / max(1.0, span / 60.0)
+        lines.append(f"{key[:58]:<58} {len(es):>7} {len(es) / len(entries):>6.1%} {percentile(ms, 50) or 0:>8.1f} "
+                     f"{percentile(ms, 95) or 0:>8.1f} {max(minutes.values()) / avg if avg else 0:>8.1f}")
+    return "\n".join(lines)
+
+
+class IdMap:
+    """Captured ID -> replay ID per namespace, with waits for IDs still being produced."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.map: Dict[Tuple[str, str], Any] = {}
+        self.events: Dict[Tuple[str, str], threading.Event] = {}
+        self.produces: Dict[int, List[Tuple[str, str]]] = {}
+        seen = set()
+        for i, e in enumerate(entries):
+            for key in self.references(e):
+                seen.add(key)
+            for name, old in e.get("ids") or []:
+                kind = kind_of(name, e["route"])
+                key = (kind, str(old))
+                # Only IDs first seen in this response; earlier references mean it already existed
+                if kind and key not in seen:
+                    seen.add(key)
+                    self.events[key] = threading.Event()
+                    self.produces.setdefault(i, []).append(key)
+
+    @staticmethod
+    def references(e: Dict[str, Any]) -> List[Tuple[str, str]]:
+        keys = [(kind_of(k, e["route"]), str(v)) for k, v in (e.get("params") or {}).items()]
+        for part in (e.get("query"), e.get("body"), e.get("form")):
+            stack = [part]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, dict):
+                    for k, v in node.items():
+                        if ID_KEY.search(k) and isinstance(v, (str, int)):
+                            keys.append((kind_of(k, e["route"]), str(v)))
+                        else:
+                            stack.append(v)
+                elif isinstance(node, list):
+                    stack.extend(node)
+        return [k for k in keys if k[0]]
+
+    def learn(self, index: int, entry: Dict[str, Any], new_ids: List[Tuple[str, Any]]):
+        """Pair captured and replayed IDs of one response by namespace and position."""
+        wanted = self.produces.get(index)
+        if not wanted:
+            return
+        new_by_kind: Dict[str, List[Any]] = {}
+        for name, value in new_ids:
+            new_by_kind.setdefault(kind_of(name, entry["route"]), []).append(value)
+        position: Dict[str, int] = {}
+        wanted_set = set(wanted)
+        for name, old in entry.get("ids") or []:
+            kind = kind_of(name, entry["route"])
+            i = position.get(kind, 0)
+            position[kind] = i + 1
+            key = (kind, str(old))
+            if key in wanted_set and i < len(new_by_kind.get(kind, [])) and key not in self.map:
+                self.map[key] = new_by_kind[kind][i]
+
+    def release(self, index: int):
+        for key in self.produces.get(index, []):
+            self.events[key].set()
+
+    def resolve(self, kind: Optional[str], old: Any, wait: float) -> Tuple[Any, bool]:
+        """(value to send, mapped?) for a captured ID."""
+        if not kind:
+            return old, True
+        key = (kind, str(old))
+        ev = self.events.get(key)
+        if ev is not None and key not in self.map:
+            ev.wait(wait)
+        if key in self.map:
+            return self.map[key], True
+        if str(old).startswith(TOKEN_DIGEST):
+            return old, False  # the real token is not in the log
+        return old, ev is None  # produced in the capture but not in the replay: a real miss
+
+
+class Replay:
+    def __init__(self, args, entries: List[Dict[str, Any]], token: str, speed: float):
+        self.args = args
+        self.entries = entries
+        self.token = token
+        self.speed = speed
+        self.ids = IdMap(entries)
+        self.day_shift = timedelta(days=(date.today() - datetime.fromtimestamp(entries[0]["ts"] / 1000.0).date()).days) \
+            if args.shift_dates else timedelta(0)
+        self.rows: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.photos: Dict[int, bytes] = {}
+        self.counter = 0
+
+    def tester(self) -> BackendTester:
+        t = getattr(self.local, "tester", None)
+        if t is None:
+            t = self.local.tester = BackendTester(self.args.api, "", "")
+        return t
+
+    def photo(self, size: int) -> bytes:
+        bucket = max(1, int(math.ceil(size / 65536)))
+        with self.lock:
+            data = self.photos.get(bucket)
+        if data is None:
+            # Noise PNG: ~3 bytes per pixel at 4:3
+            pixels = bucket * 65536 / 3
+            w = max(1, int(math.sqrt(pixels * 4 / 3)))
+            data = synthetic_png(w, max(1, int(pixels / w)))
+            with self.lock:
+                self.photos[bucket] = data
+        return data
+
+    def _filler(self, key: str, n: int) -> str:
+        with self.lock:
+            self.counter += 1
+            c = self.counter
+        k = key.lower()
+        if "email" in k:
+            return f"replay{os.getpid()}_{c}@example.com"
+        if "phone" in k or "tax" in k:
+            return str(5000000000 + c)[-max(n, 10):]
+        return ("Tekrar " * (n // 7 + 1))[:max(n, 1)]
+
+    def materialize(self, node: Any, key: str, route: str, misses: List[str]) -> Any:
+        if isinstance(node, dict):
+            if "$str" in node and len(node) == 1:
+                return self._filler(key, node["$str"])
+            if "$base64" in node and len(node) == 1:
+                raw = b"%PDF-1.4\n%" + b"0" * max(0, node["$base64"] * 3 // 4 - 10)
+                return base64.b64encode(raw).decode("ascii")
+            if "$array" in node and len(node) == 1:
+                return []
+            if "$object" in node and len(node) == 1:
+                return {}
+            return {k: self.materialize(v, k, route, misses) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self.materialize(v, key, route, misses) for v in node]
+        if isinstance(node, (str, int)) and not isinstance(node, bool) and ID_KEY.search(key):
+            value, ok = self.ids.resolve(kind_of(key, route), node, self.args.id_wait)
+            if not ok:
+                misses.append(f"{key}={node}")
+            return value
+        if isinstance(node, str) and self.day_shift:
+            m = DATE_STRING.match(node)
+            if m:
+                try:
+                    shifted = date.fromisoformat(m.group(1)) + self.day_shift
+                    return shifted.isoformat() + node[10:]
+                except ValueError:
+                    return node
+        return node
+
+    def build(self, e: Dict[str, Any]) -> Tuple[str, Dict[str, Any], List[str]]:
+        misses: List[str] = []
+        path = e["route"]
+        for name, old in (e.get("params") or {}).items():
+            value, ok = self.ids.resolve(kind_of(name, e["route"]), old, self.args.id_wait)
+            if not ok:
+                misses.append(f"{name}={old}")
+            path = path.replace(f":{name}", str(value), 1)
+        if self.args.api.rstrip("/").endswith("/api") and path.startswith("/api"):
+            path = path[4:]
+        kwargs: Dict[str, Any] = {"params": self.materialize(e.get("query") or {}, "", e["route"], misses)}
+        if e["route"] == LOGIN_ROUTE:
+            kwargs["json"] = {"email": self.args.email, "password": self.args.password}
+        elif e.get("files"):
+            kwargs["headers"] = {"Content-Type": None}
+            kwargs["data"] = self.materialize(e.get("form") or {}, "", e["route"], misses)
+            kwargs["files"] = [(f["field"], (f"replay_{i}.png", self.photo(f.get("size") or 1), "image/png"))
+                               for i, f in enumerate(e["files"])]
+        elif e.get("body") is not None:
+            kwargs["json"] = self.materialize(e["body"], "", e["route"], misses)
+        return path, kwargs, misses
+
+    def send(self, index: int, due: float, t0: float):
+        e = self.entries[index]
+        lag_ms = (time.perf_counter() - t0 - due) * 1000.0
+        row = {"route": f"{e['method']} {e['route']}", "captured_status": e.get("status"), "captured_ms": e.get("ms"),
+               "lag_ms": round(lag_ms, 1), "status": None, "ms": None, "skipped": None, "unmapped": []}
+        try:
+            path, kwargs, misses = self.build(e)
+            row["unmapped"] = misses
+            if misses and self.args.unmapped == "skip":
+                row["skipped"] = "unmapped id"
+                return
+            t = self.tester()
+            headers = kwargs.pop("headers", None)
+            r = t.request(e["method"], path, token=self.token if e.get("auth") else None, headers=headers, **kwargs)
+            call = t.drain_calls()[-1]
+            row["status"] = r.status_code
+            row["ms"] = round(call.total_ms, 2)
+            if r.status_code < 400 and self.ids.produces.get(index):
+                try:
+                    data = r.json().get("data")
+                except ValueError:
+                    data = None
+                self.ids.learn(index, e, collect_ids(data) if data is not None else [])
+        except Exception as ex:
+            row["skipped"] = f"error: {type(ex).__name__}: {ex}"[:200]
+        finally:
+            self.ids.release(index)
+            with self.lock:
+                self.rows.append(row)
+
+    def run(self) -> Dict[str, Any]:
+        ts0 = self.entries[0]["ts"]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.workers) as pool:
+            for i, e in enumerate(self.entries):
+                due = (e["ts"] - ts0) / 1000.0 / self.speed
+                delay = due - (time.perf_counter() - t0)
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, i, due, t0)
+        wall = time.perf_counter() - t0
+        return self.summary(wall)
+
+    def summary(self, wall: float) -> Dict[str, Any]:
+        span = (self.entries[-1]["ts"] - self.entries[0]["ts"]) / 1000.0
+        sent = [r for r in self.rows if r["status"] is not None]
+
+        def same_class(r):
+            return r["captured_status"] is None or r["status"] // 100 == r["captured_status"] // 100
+
+        routes: Dict[str, Dict[str, Any]] = {}
+        for route in sorted({r["route"] for r in self.rows}):
+            rs = [r for r in self.rows if r["route"] == route]
+            ok = [r for r in rs if r["status"] is not None]
+            routes[route] = {
+                "count": len(rs),
+                "errors": sum(1 for r in ok if r["status"] >= 400),
+                "status_changed": sum(1 for r in ok if not same_class(r)),
+                "skipped": sum(1 for r in rs if r["skipped"]),
+                "unmapped": sum(1 for r in rs if r["unmapped"]),
+                "p50_ms": percentile([r["ms"] for r in ok], 50),
+                "p95_ms": percentile([r["ms"] for r in ok], 95),
+                "captured_p50_ms": percentile([r["captured_ms"] for r in rs if r["captured_ms"] is not None], 50),
+            }
+        lags = [r["lag_ms"] for r in self.rows]
+        return {
+            "speed": self.speed,
+            "requests": len(self.rows),
+            "sent": len(sent),
+            "errors": sum(1 for r in sent if r["status"] >= 400),
+            "status_changed": sum(1 for r in sent if not same_class(r)),
+            "skipped": sum(1 for r in self.rows if r["skipped"]),
+            "ids_mapped": len(self.ids.map),
+            "ids_expected": len(self.ids.events),
+            "target_rps": round(len(self.entries) / (span / self.speed), 2) if span > 0 else None,
+            "achieved_rps": round(len(sent) / wall, 2) if wall > 0 else None,
+            "wall_s": round(wall, 2),
+            "lag_p95_ms": percentile(lags, 95),
+            "routes": routes,
+            "failures": [r for r in self.rows if r["skipped"] or (r["status"] is not None and not same_class(r))][:50],
+        }
+
+
+def format_summary(s: Dict[str, Any]) -> str:
+    lines = [f"speed {s['speed']:g}x: {s['sent']}/{s['requests']} sent in {s['wall_s']} s, "
+             f"{s['achieved_rps']} req/s (target {s['target_rps']}), errors={s['errors']} status_changed={s['status_changed']} "
+             f"skipped={s['skipped']} ids {s['ids_mapped']}/{s['ids_expected']}, lag p95 {s['lag_p95_ms'] or 0:.0f} ms",
+             f"  {'route':<58} {'count':>6} {'err':>5} {'chg':>5} {'p50':>8} {'p95':>8} {'capt p50':>9}"]
+    for route, r in sorted(s["routes"].items(), key=lambda kv: -kv[1]["count"]):
+        lines.append(f"  {route[:58]:<58} {r['count']:>6} {r['errors']:>5} {r['status_changed']:>5} "
+                     f"{r['p50_ms'] or 0:>8.1f} {r['p95_ms'] or 0:>8.1f} {r['captured_p50_ms'] or 0:>9.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-scaled replay of captured API traffic with ID substitution")
+    parser.add_argument("log", help="JSONL written by middleware/trafficCapture.js (TRAFFIC_CAPTURE_PATH)")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--speeds", default="1", help="Comma-separated speed-ups, e.g. 1,5,20 (one pass each)")
+    parser.add_argument("--routes", help="Only replay routes matching this regex")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    parser.add_argument("--workers", type=int, default=64, help="Concurrent client connections")
+    parser.add_argument("--id-wait", type=float, default=30.0, help="Seconds a request waits for an ID still being produced")
+    parser.add_argument("--unmapped", choices=["keep", "skip"], default="keep", help="IDs produced in the capture but not in the replay")
+    parser.add_argument("--no-shift-dates", dest="shift_dates", action="store_false", help="Send captured dates unchanged")
+    parser.add_argument("--describe", action="store_true", help="Only print the capture's route mix")
+    parser.add_argument("--out", help="Write the summaries as JSON")
+    args = parser.parse_args()
+
+    entries = load_log(args.log, args.routes, args.limit)
+    if not entries:
+        print("No requests in the log", file=sys.stderr)
+        sys.exit(1)
+    print(describe(entries))
+    if args.describe:
+        sys.exit(0)
+
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    summaries = []
+    for speed in [float(x) for x in args.speeds.split(",") if x]:
+        print(f"\nReplaying {len(entries)} requests at {speed:g}x...", file=sys.stderr)
+        s = Replay(args, entries, admin.token_admin, speed).run()
+        summaries.append(s)
+        print(format_summary(s))
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(summaries, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(s["status_changed"] == 0 and s["skipped"] == 0 for s in summaries) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Measure report worker throughput by enqueueing many prepare-async jobs at once.
+
+Fresh reports are built through the BackendTester flow (customer → offer →
+work order → saved inspection), or taken from --report-ids. All
+POST /reports/{id}/prepare-async calls are then released together and every
+job is followed with BackendTester.wait_for_report_job (backoff + jitter, no
+sync fallback). The report shows queue wait and run time percentiles, the
+makespan and jobs/s, and the highest number of jobs the worker actually ran
+at the same time next to REPORT_WORKER_BATCH.
+
+Usage:
+  python scripts/report_queue_bench.py --reports 30 --worker-batch 3
+  python scripts/report_queue_bench.py --report-ids 12,13,14 --out queue.json
+
+Requires: pip install requests, a running utils/reportWorker.js
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from load_backend import percentile
+from test_backend import BackendTester, JobWait, parse_ts
+
+
+def build_reports(api: str, email: str, password: str, count: int, concurrency: int) -> List[int]:
+    """Create ``count`` fresh reports by running the flow through save_inspection."""
+    def one(_):
+        t = BackendTester(api, email, password)
+        if t.run_through(t.step_save_inspection):
+            return t.report_id
+        failed = next((r for r in t.results if not r.success), None)
+        print(f"fixture failed at {failed.name if failed else '?'}", file=sys.stderr)
+        return None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ids = list(pool.map(one, range(count)))
+    return [i for i in ids if i]
+
+
+def max_overlap(intervals: List[tuple]) -> int:
+    """Largest number of [start, end) intervals that overlap at any instant."""
+    events = []
+    for start, end in intervals:
+        events.append((start, 1))
+        events.append((end, -1))
+    # Ends sort before starts at the same instant
+    events.sort(key=lambda e: (e[0], e[1]))
+    cur = best = 0
+    for _, delta in events:
+        cur += delta
+        best = max(best, cur)
+    return best
+
+
+def burst(api: str, token: str, report_ids: List[int], timeout: float) -> List[Dict[str, Any]]:
+    """Enqueue every report at the same moment and wait for all jobs."""
+    gate = threading.Barrier(len(report_ids))
+
+    def one(report_id: int) -> Dict[str, Any]:
+        t = BackendTester(api, "", "", job_timeout=timeout)
+        gate.wait()
+        t0 = time.perf_counter()
+        r = t.request("POST", f"/reports/{report_id}/prepare-async", token=token)
+        enqueue_ms = (time.perf_counter() - t0) * 1000.0
+        if r.status_code not in (200, 202):
+            return {"report_id": report_id, "status": f"enqueue_http_{r.status_code}", "enqueue_ms": enqueue_ms}
+        wait: JobWait = t.wait_for_report_job(r.json()["data"]["jobId"], token)
+        t.drain_calls()
+        return {
+            "report_id": report_id,
+            "enqueue_ms": enqueue_ms,
+            "client_total_ms": (time.perf_counter() - t0) * 1000.0,
+            "job": wait.job,
+            **wait.as_dict(),
+        }
+
+    with ThreadPoolExecutor(max_workers=len(report_ids)) as pool:
+        return list(pool.map(one, report_ids))
+
+
+def summarize(jobs: List[Dict[str, Any]], worker_batch: Optional[int]) -> Dict[str, Any]:
+    completed = [j for j in jobs if j.get("job_status") == "completed"]
+    statuses: Dict[str, int] = {}
+    for j in jobs:
+        st = j.get("job_status") or j.get("status") or "unknown"
+        statuses[st] = statuses.get(st, 0) + 1
+
+    created = [parse_ts(j["job"].get("created_at")) for j in completed]
+    started = [parse_ts(j["job"].get("started_at")) for j in completed]
+    finished = [parse_ts(j["job"].get("finished_at")) for j in completed]
+    makespan_s = None
+    concurrency = None
+    if completed and all(created) and all(started) and all(finished):
+        makespan_s = (max(finished) - min(created)).total_seconds()
+        concurrency = max_overlap(list(zip(started, finished)))
+
+    def dist(key: str) -> Dict[str, Optional[float]]:
+        vals = [j[key] for j in completed if j.get(key) is not None]
+        return {p: percentile(vals, q) for p, q in (("p50", 50), ("p95", 95), ("max", 100))}
+
+    return {
+        "jobs": len(jobs),
+        "statuses": statuses,
+        "makespan_s": makespan_s,
+        "jobs_per_s": len(completed) / makespan_s if makespan_s else None,
+        "max_concurrent_jobs": concurrency,
+        "worker_batch": worker_batch,
+        "queue_wait_ms": dist("queue_wait_ms"),
+        "job_run_ms": dist("job_run_ms"),
+        "client_total_ms": dist("client_total_ms"),
+        "polls_per_job": sum(j.get("polls", 0) for j in jobs) / len(jobs) if jobs else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst prepare-async jobs to measure report worker throughput")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--reports", type=int, default=20, help="Number of fresh reports to build and enqueue")
+    parser.add_argument("--report-ids", help="Comma-separated existing report IDs (skips fixture building)")
+    parser.add_argument("--setup-concurrency", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for each job")
+    parser.add_argument("--worker-batch", type=int, default=int(os.getenv("REPORT_WORKER_BATCH", "3")), help="REPORT_WORKER_BATCH of the worker under test")
+    parser.add_argument("--out", help="Write per-job results and the summary as JSON")
+    args = parser.parse_args()
+
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    if args.report_ids:
+        report_ids = [int(x) for x in args.report_ids.split(",") if x.strip()]
+    else:
+        print(f"Building {args.reports} reports...", file=sys.stderr)
+        report_ids = build_reports(args.api, args.email, args.password, args.reports, args.setup_concurrency)
+    if not report_ids:
+        print("No reports to enqueue", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Enqueueing {len(report_ids)} jobs at once...", file=sys.stderr)
+    jobs = burst(args.api, admin.token_admin, report_ids, args.timeout)
+    summary = summarize(jobs, args.worker_batch)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps({"summary": summary, "jobs": jobs}, indent=2, ensure_ascii=False, default=str))
+    sys.exit(0 if summary["statuses"].get("completed", 0) == len(jobs) else 1)
+
+
+if __name__ == "__main__":
+    main()
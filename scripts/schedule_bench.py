@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Scheduling conflicts under concurrency: availability-check latency and
+double-bookings.
+
+Slot conflicts are detected in three places, all check-then-insert:
+
+  * GET /inspections/check-availability runs the overlap query for one
+    technician and day;
+  * POST /inspections runs the same query and inserts if it found nothing;
+  * convert-to-work-order (findFreeDate) only looks for an identical
+    09:00-17:00 slot of the creating user, day by day.
+
+The only database guard is UNIQUE (technician_id, inspection_date,
+start_time, end_time), which catches identical slots (as a 500) but not
+overlapping ones. This benchmark runs three phases against a tenant:
+
+  availability  closed-loop GET /inspections/check-availability at each
+                --concurrency level over random technicians, days in the
+                --days window and 1-3 hour slots; latency percentiles,
+                throughput and the share of busy answers;
+  race          for --targets free (technician, day) pairs, --racers
+                clients released together by a barrier each POST an
+                inspection whose slot overlaps all the others (starts
+                --stagger-min apart, 0 = identical slots); the day is then
+                read back and every overlapping pair that was stored counts
+                as a double-booking;
+  convert       --converts approved offers are converted concurrently with
+                the same taskStartDate, on a day where the admin already has
+                a 10:00-12:00 inspection; lost conversions (5xx), stored
+                overlaps and converts that landed on the pre-booked day are
+                counted.
+
+Fill a tenant with dense schedules first, e.g. on a throwaway clone:
+  python scripts/generate_tenant.py sql --technicians 300 --inspections 700000 --out dense.sql
+  python scripts/db_fixture.py build --extra dense.sql
+The race and convert phases write inspections, work orders and offers.
+
+Usage:
+  python scripts/schedule_bench.py --concurrency 1,8,32 --duration 15
+  python scripts/schedule_bench.py --phases race,convert --targets 50 --racers 8 --out schedule.json
+
+Requires: pip install requests
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from load_backend import percentile
+from test_backend import BackendTester
+
+PHASES = ["availability", "race", "convert"]
+WHOLE_DAY = ("07:00", "20:00")
+
+
+def _r(v: Optional[float]) -> Optional[float]:
+    return round(v, 2) if v is not None else None
+
+
+def minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+def hhmm(total: int) -> str:
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def overlapping_pairs(slots: List[Tuple[str, str]]) -> int:
+    """Pairs of [start, end) intervals that overlap; touching ends do not count."""
+    iv = sorted((minutes(s), minutes(e)) for s, e in slots)
+    pairs = 0
+    for i, (s1, e1) in enumerate(iv):
+        for s2, _ in iv[i + 1:]:
+            if s2 >= e1:
+                break
+            pairs += 1
+    return pairs
+
+
+class ScheduleBench:
+    def __init__(self, admin: BackendTester, seed: int = 1):
+        self.admin = admin
+        self.api = admin.base
+        self.token = admin.token_admin
+        self.rng = random.Random(seed)
+        self.technicians: List[int] = []
+        self.admin_id: Optional[int] = None
+
+    def tester(self) -> BackendTester:
+        t = BackendTester(self.api, self.admin.email, self.admin.password)
+        t.token_admin = self.token
+        return t
+
+    def discover(self):
+        r = self.admin.request("GET", "/technicians", token=self.token)
+        self.technicians = [t["id"] for t in r.json()["data"] if t.get("is_active")] if r.status_code == 200 else []
+        p = self.admin.request("GET", "/auth/profile", token=self.token)
+        if p.status_code == 200:
+            self.admin_id = p.json()["data"]["user"]["id"]
+        self.admin.drain_calls()
+
+    def check(self, t: BackendTester, tech: int, day: str, start: str, end: str) -> Optional[bool]:
+        r = t.request("GET", "/inspections/check-availability", token=self.token,
+                      params={"technicianId": tech, "date": day, "startTime": start, "endTime": end})
+        t.drain_calls()
+        return r.json()["data"]["available"] if r.status_code == 200 else None
+
+    def day_slots(self, t: BackendTester, tech: int, day: str) -> List[Tuple[str, str]]:
+        r = t.request("GET", "/inspections", token=self.token,
+                      params={"technicianId": tech, "dateFrom": day, "dateTo": day, "limit": 500})
+        t.drain_calls()
+        if r.status_code != 200:
+            return []
+        # dateFrom = dateTo = day; inspection_date comes back as a UTC timestamp, so it is not compared here
+        return [(i["start_time"], i["end_time"]) for i in r.json()["data"]["inspections"]]
+
+    # ---------- availability ----------
+
+    def availability(self, concurrency: int, duration: float, days: int, start_day: date) -> Dict[str, Any]:
+        lat: List[float] = []
+        counts = {"busy": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(k: int):
+            t = self.tester()
+            rng = random.Random(k)
+            while time.perf_counter() < deadline:
+                tech = rng.choice(self.technicians)
+                day = (start_day + timedelta(days=rng.randrange(days))).isoformat()
+                s = rng.randrange(8 * 60, 16 * 60, 30)
+                e = min(s + rng.choice([60, 120, 180]), 20 * 60)
+                t0 = time.perf_counter()
+                try:
+                    ok = self.check(t, tech, day, hhmm(s), hhmm(e))
+                except Exception:
+                    ok = None
+                ms = (time.perf_counter() - t0) * 1000.0
+                with lock:
+                    if ok is None:
+                        counts["errors"] += 1
+                    else:
+                        lat.append(ms)
+                        counts["busy"] += 0 if ok else 1
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, range(concurrency)))
+        wall = time.perf_counter() - t0
+        return {
+            "concurrency": concurrency, "checks": len(lat), "errors": counts["errors"],
+            "checks_per_s": round(len(lat) / wall, 2) if wall > 0 else None,
+            "busy_share": round(counts["busy"] / len(lat), 3) if lat else None,
+            "p50_ms": _r(percentile(lat, 50)), "p95_ms": _r(percentile(lat, 95)), "p99_ms": _r(percentile(lat, 99)),
+        }
+
+    # ---------- race ----------
+
+    def fixtures(self) -> Optional[Tuple[int, int]]:
+        """(work order id, equipment id) to hang race inspections on."""
+        t = self.admin
+        wo = t.request("GET", "/work-orders", token=self.token, params={"limit": 1})
+        eq = t.request("GET", "/equipment", token=self.token, params={"limit": 1})
+        t.drain_calls()
+        if wo.status_code != 200 or eq.status_code != 200:
+            return None
+        wos, eqs = wo.json()["data"]["workOrders"], eq.json()["data"]["equipment"]
+        return (wos[0]["id"], eqs[0]["id"]) if wos and eqs else None
+
+    def free_days(self, n: int, start_day: date, days: int, techs: List[int]) -> List[Tuple[int, str]]:
+        t = self.tester()
+        out, tried = [], set()
+        for _ in range(n * 20):
+            if len(out) >= n:
+                break
+            key = (self.rng.choice(techs), (start_day + timedelta(days=self.rng.randrange(days))).isoformat())
+            if key in tried:
+                continue
+            tried.add(key)
+            if self.check(t, key[0], key[1], *WHOLE_DAY):
+                out.append(key)
+        return out
+
+    def race(self, targets: List[Tuple[int, str]], racers: int, stagger: int, wo_id: int, eq_id: int) -> Dict[str, Any]:
+        codes: Dict[str, int] = {}
+        lat: List[float] = []
+        double_booked = pairs = 0
+        testers = [self.tester() for _ in range(racers)]
+        for tech, day in targets:
+            barrier = threading.Barrier(racers)
+
+            def racer(k: int):
+                start = 10 * 60 + k * stagger
+                body = {"workOrderId": wo_id, "equipmentId": eq_id, "technicianId": tech, "inspectionDate": day,
+                        "startTime": hhmm(start), "endTime": hhmm(start + 120)}
+                barrier.wait()
+                t0 = time.perf_counter()
+                try:
+                    r = testers[k].request("POST", "/inspections", token=self.token, json=body)
+                    code = str(r.status_code)
+                except Exception:
+                    code = "error"
+                testers[k].drain_calls()
+                return code, (time.perf_counter() - t0) * 1000.0
+
+            with ThreadPoolExecutor(max_workers=racers) as pool:
+                for code, ms in pool.map(racer, range(racers)):
+                    codes[code] = codes.get(code, 0) + 1
+                    lat.append(ms)
+            stored = self.day_slots(self.admin, tech, day)
+            p = overlapping_pairs(stored)
+            pairs += p
+            double_booked += 1 if p else 0
+        return {
+            "targets": len(targets), "racers": racers, "stagger_min": stagger, "status": codes,
+            "double_booked_targets": double_booked, "overlapping_pairs": pairs,
+            "p50_ms": _r(percentile(lat, 50)), "p95_ms": _r(percentile(lat, 95)),
+        }
+
+    # ---------- convert ----------
+
+    def prepare_offers(self, n: int) -> List[int]:
+        t = self.tester()
+        t.step_create_customer()
+        t.step_create_equipment_with_template()
+        offers = []
+        for _ in range(n):
+            t.offer_id = None
+            t.step_create_offer()
+            t.step_approve_offer()
+            if t.offer_id and t.results[-1].success:
+                offers.append(t.offer_id)
+        return offers
+
+    def convert(self, offers: List[int], day: str, wo_id: int, eq_id: int) -> Dict[str, Any]:
+        # The admin already works 10:00-12:00 that day; findFreeDate only looks for an identical 09:00-17:00 slot
+        t = self.tester()
+        pre = t.request("POST", "/inspections", token=self.token, json={
+            "workOrderId": wo_id, "equipmentId": eq_id, "technicianId": self.admin_id, "inspectionDate": day,
+            "startTime": "10:00", "endTime": "12:00"})
+        t.drain_calls()
+        barrier = threading.Barrier(len(offers))
+        testers = [self.tester() for _ in offers]
+
+        def converter(k: int):
+            barrier.wait()
+            t0 = time.perf_counter()
+            try:
+                r = testers[k].request("POST", f"/offers/{offers[k]}/convert-to-work-order", token=self.token,
+                                       json={"openingDate": date.today().isoformat(), "taskStartDate": day, "notes": "schedule_bench"})
+                code = str(r.status_code)
+            except Exception:
+                code = "error"
+            testers[k].drain_calls()
+            return code, (time.perf_counter() - t0) * 1000.0
+
+        codes: Dict[str, int] = {}
+        lat: List[float] = []
+        with ThreadPoolExecutor(max_workers=len(offers)) as pool:
+            for code, ms in pool.map(converter, range(len(offers))):
+                codes[code] = codes.get(code, 0) + 1
+                lat.append(ms)
+        # Conversions land on day, day+1, ... for the admin
+        pairs = landed_on_booked = 0
+        d0 = date.fromisoformat(day)
+        for k in range(len(offers) + 1):
+            slots = self.day_slots(self.admin, self.admin_id, (d0 + timedelta(days=k)).isoformat())
+            p = overlapping_pairs(slots)
+            pairs += p
+            if k == 0 and pre.status_code == 201:
+                landed_on_booked = sum(1 for s in slots if s[0][:5] == "09:00")
+        return {
+            "converts": len(offers), "status": codes, "preexisting_booked": pre.status_code == 201,
+            "lost_conversions": sum(v for c, v in codes.items() if not c.startswith("2")),
+            "overlapping_pairs": pairs, "landed_on_booked_day": landed_on_booked,
+            "p50_ms": _r(percentile(lat, 50)), "p95_ms": _r(percentile(lat, 95)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Availability-check latency and double-booking count under concurrency")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--phases", default=",".join(PHASES), help="Comma-separated subset of: " + ", ".join(PHASES))
+    parser.add_argument("--concurrency", default="1,8,32", help="availability: comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="availability: seconds per level")
+    parser.add_argument("--start-date", default=date.today().isoformat(), help="First day of the checked window")
+    parser.add_argument("--days", type=int, default=365, help="Days in the checked window")
+    parser.add_argument("--targets", type=int, default=20, help="race: free (technician, day) pairs to race on")
+    parser.add_argument("--racers", type=int, default=4, help="race: concurrent overlapping bookings per target")
+    parser.add_argument("--stagger-min", type=int, default=15, help="race: minutes between racers' start times (0 = identical slots)")
+    parser.add_argument("--race-offset-days", type=int, default=400, help="race/convert: days after --start-date where free days are searched")
+    parser.add_argument("--converts", type=int, default=4, help="convert: concurrent conversions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+    phases = [p for p in args.phases.split(",") if p]
+    unknown = [p for p in phases if p not in PHASES]
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(unknown)}")
+
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+    bench = ScheduleBench(admin, seed=args.seed)
+    bench.discover()
+    if not bench.technicians:
+        print("No active technicians", file=sys.stderr)
+        sys.exit(1)
+    start_day = date.fromisoformat(args.start_date)
+    print(f"{len(bench.technicians)} technicians, window {start_day} + {args.days} days")
+    out: Dict[str, Any] = {"technicians": len(bench.technicians)}
+
+    if "availability" in phases:
+        out["availability"] = []
+        print(f"\n{'clients':>7} {'checks/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'busy':>6} {'err':>5}")
+        for conc in [int(x) for x in args.concurrency.split(",") if x]:
+            r = bench.availability(conc, args.duration, args.days, start_day)
+            out["availability"].append(r)
+            print(f"{conc:>7} {r['checks_per_s'] or 0:>9} {r['p50_ms'] or 0:>8} {r['p95_ms'] or 0:>8} "
+                  f"{r['p99_ms'] or 0:>8} {(r['busy_share'] or 0) * 100:>5.1f}% {r['errors']:>5}")
+
+    failed = False
+    if "race" in phases or "convert" in phases:
+        fx = bench.fixtures()
+        if fx is None:
+            print("Need at least one work order and one equipment for the race phases", file=sys.stderr)
+            sys.exit(1)
+        race_start = start_day + timedelta(days=args.race_offset_days)
+        if "race" in phases:
+            targets = bench.free_days(args.targets, race_start, args.days, bench.technicians)
+            r = bench.race(targets, args.racers, args.stagger_min, *fx)
+            out["race"] = r
+            print(f"\nrace: {r['targets']} targets x {r['racers']} racers, status {r['status']}, "
+                  f"double-booked {r['double_booked_targets']} targets ({r['overlapping_pairs']} overlapping pairs), "
+                  f"p50 {r['p50_ms']} ms")
+            failed = failed or r["overlapping_pairs"] > 0
+        if "convert" in phases and bench.admin_id:
+            offers = bench.prepare_offers(args.converts)
+            day = bench.free_days(1, race_start, args.days, [bench.admin_id])
+            if len(offers) < 2 or not day:
+                print("convert: could not prepare offers or find a free day", file=sys.stderr)
+            else:
+                r = bench.convert(offers, day[0][1], *fx)
+                out["convert"] = r
+                print(f"\nconvert: {r['converts']} concurrent, status {r['status']}, lost {r['lost_conversions']}, "
+                      f"overlapping pairs {r['overlapping_pairs']} (on the pre-booked day: {r['landed_on_booked_day']}), "
+                      f"p50 {r['p50_ms']} ms")
+                failed = failed or r["overlapping_pairs"] > 0 or r["lost_conversions"] > 0
+
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(out, indent=2, ensure_ascii=False))
+    # Exit 1 when a double-booking or lost conversion was observed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
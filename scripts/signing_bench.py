@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Large-PDF signing round trip over the base64 JSON path.
+
+The signing flow moves the whole PDF as base64 inside JSON twice:
+GET /reports/{id}/signing-data returns pdfBase64 (storage.readFileBase64
+reads the file and encodes it in memory) and POST /reports/{id}/sign sends
+signedPdfBase64 back, which signReport decodes in memory before
+writeFileAtomic. The JSON body parser in app.js is limited to 10 MB, and
+the download repair path stops at PDF_BASE64_REPAIR_MAX_BYTES (30 MB).
+
+For every target size (1–100 MB by default) the benchmark takes a fresh
+prepared report and measures:
+
+  * signing-data, buffered client: response bytes, TTFB/total, JSON parse
+    and base64 decode time, and peak Python memory (tracemalloc);
+  * signing-data, streaming client: the pdfBase64 field is decoded from the
+    response stream chunk by chunk without building the JSON object;
+  * sign: the PDF padded to the target size (as a signature's incremental
+    update would grow it), client encode time, request bytes, latency and
+    the HTTP status, so the size where the server starts refusing is
+    visible;
+  * bloat: JSON bytes on the wire per PDF byte.
+
+signing-data returns the unsigned PDF as prepared, which is small. With
+--pad-unsigned, run on the backend host, the unsigned.pdf file is grown to
+the target size in place first so that direction is measured at scale too.
+
+Usage:
+  python scripts/signing_bench.py --sizes-mb 1,5,10,30,60,100
+  python scripts/signing_bench.py --sizes-mb 1,8,16 --repeat 3 --pad-unsigned --out signing.json
+
+Requires: pip install requests, a running utils/reportWorker.js (or --sync-fallback)
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from test_backend import BackendTester
+
+MB = 2**20
+
+
+class Base64FieldDecoder:
+    """Decode one base64 string field out of a streamed JSON body without holding the body.
+
+    JSON.stringify does not escape '/', so the value is plain base64 up to the
+    closing quote.
+    """
+
+    def __init__(self, key: str = "pdfBase64"):
+        self.marker = re.compile(rb'"' + key.encode("ascii") + rb'"\s*:\s*"')
+        self.digest = hashlib.sha256()
+        self.bytes = 0
+        self.head = b""
+        self._pending = b""
+        self._state = "search"  # search | value | done
+
+    def __call__(self, chunk: bytes):
+        if self._state == "done":
+            return
+        data = self._pending + chunk
+        if self._state == "search":
+            m = self.marker.search(data)
+            if m is None:
+                # Keep enough tail for a marker split across chunks
+                self._pending = data[-64:]
+                return
+            data = data[m.end():]
+            self._state = "value"
+        end = data.find(b'"')
+        if end >= 0:
+            data = data[:end]
+            self._state = "done"
+            self._pending = b""
+        else:
+            cut = len(data) - len(data) % 4
+            data, self._pending = data[:cut], data[cut:]
+        decoded = binascii.a2b_base64(data)
+        if len(self.head) < 8:
+            self.head += decoded[:8 - len(self.head)]
+        self.bytes += len(decoded)
+        self.digest.update(decoded)
+
+    @property
+    def complete(self) -> bool:
+        return self._state == "done"
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 2)
+
+
+def _traced(fn):
+    """Run fn() under tracemalloc; returns (result, peak MB of Python allocations)."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / MB, 1)
+
+
+def build_prepared_reports(args, count: int) -> List[int]:
+    def one(_):
+        t = BackendTester(args.api, args.email, args.password, job_timeout=args.job_timeout, sync_fallback=args.sync_fallback)
+        return t.report_id if t.run_through(t.step_prepare_report_async) else None
+
+    with ThreadPoolExecutor(max_workers=min(count, 4)) as pool:
+        return [i for i in pool.map(one, range(count)) if i]
+
+
+def pad_unsigned(t: BackendTester, token: str, report_id: int, target: int) -> Optional[int]:
+    """Grow the report's unsigned.pdf to ``target`` bytes when the file is reachable from here."""
+    r = t.request("GET", f"/reports/{report_id}", token=token)
+    path = r.json()["data"].get("unsigned_pdf_path") if r.status_code == 200 else None
+    if not path or not os.path.isfile(path):
+        return None
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\n%")
+        remaining = target - size - 2
+        while remaining > 0:
+            n = min(remaining, 8 * MB)
+            f.write(os.urandom(n))
+            remaining -= n
+    return os.path.getsize(path)
+
+
+def signing_data_buffered(t: BackendTester, token: str, report_id: int) -> Dict[str, Any]:
+    def run():
+        r = t.request("GET", f"/reports/{report_id}/signing-data", token=token)
+        call = t.drain_calls()[-1]
+        t0 = time.perf_counter()
+        payload = json.loads(r.content) if r.status_code == 200 else {}
+        parse_ms = _ms(t0)
+        t0 = time.perf_counter()
+        pdf = base64.b64decode(payload.get("data", {}).get("pdfBase64", ""))
+        decode_ms = _ms(t0)
+        return {
+            "status": r.status_code, "response_bytes": call.response_bytes,
+            "ttfb_ms": round(call.ttfb_ms, 2), "total_ms": round(call.total_ms, 2),
+            "parse_ms": parse_ms, "decode_ms": decode_ms,
+            "pdf_bytes": len(pdf), "sha256": hashlib.sha256(pdf).hexdigest(), "is_pdf": pdf[:4] == b"%PDF",
+        }, pdf
+
+    (row, pdf), peak = _traced(run)
+    row["peak_mb"] = peak
+    return {"row": row, "pdf": pdf}
+
+
+def signing_data_streaming(t: BackendTester, token: str, report_id: int) -> Dict[str, Any]:
+    def run():
+        dec = Base64FieldDecoder()
+        r = t.request("GET", f"/reports/{report_id}/signing-data", token=token, on_chunk=dec)
+        call = t.drain_calls()[-1]
+        return {
+            "status": r.status_code, "total_ms": round(call.total_ms, 2), "complete": dec.complete,
+            "pdf_bytes": dec.bytes, "sha256": dec.digest.hexdigest(), "is_pdf": dec.head[:4] == b"%PDF",
+        }
+
+    row, peak = _traced(run)
+    row["peak_mb"] = peak
+    return row
+
+
+def sign(t: BackendTester, token: str, report_id: int, pdf: bytes, target: int, pin: str) -> Dict[str, Any]:
+    if len(pdf) < target:
+        pdf = pdf + b"\n%" + os.urandom(max(0, target - len(pdf) - 2))
+    t0 = time.perf_counter()
+    body = json.dumps({"pin": pin, "signedPdfBase64": base64.b64encode(pdf).decode("ascii")}).encode("ascii")
+    encode_ms = _ms(t0)
+    error = None
+    try:
+        r = t.request("POST", f"/reports/{report_id}/sign", token=token, data=body)
+        status = r.status_code
+        if status != 200:
+            try:
+                error = r.json().get("error", {}).get("code")
+            except ValueError:
+                error = r.text[:80]
+    except Exception as e:
+        status, error = None, str(e)
+    call = t.drain_calls()[-1]
+    return {
+        "status": status, "error": error, "pdf_bytes": len(pdf), "request_bytes": len(body),
+        "bloat": round(len(body) / len(pdf), 3), "encode_ms": encode_ms,
+        "total_ms": round(call.total_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sign round trip over base64 JSON at growing PDF sizes")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--tech-email", default=os.getenv("TECH_EMAIL", "ahmet@abc.com"), help="Technician who signs")
+    parser.add_argument("--tech-password", default=os.getenv("TECH_PASS", "password"))
+    parser.add_argument("--pin", default=os.getenv("TECH_PIN", "123456"), help="Technician e-signature PIN")
+    parser.add_argument("--sizes-mb", default="1,5,10,30,60,100", help="Comma-separated PDF sizes in MB")
+    parser.add_argument("--repeat", type=int, default=1, help="Reports per size")
+    parser.add_argument("--pad-unsigned", action="store_true", help="Grow unsigned.pdf on disk to the target size (run on the backend host)")
+    parser.add_argument("--job-timeout", type=float, default=120.0)
+    parser.add_argument("--sync-fallback", action="store_true", help="Use /prepare when the report job does not finish")
+    parser.add_argument("--out", help="Write all rows as JSON")
+    args = parser.parse_args()
+    sizes = [float(x) for x in args.sizes_mb.split(",") if x]
+
+    tech = BackendTester(args.api, args.tech_email, args.tech_password)
+    r = tech.request("POST", "/auth/login", json={"email": args.tech_email, "password": args.tech_password})
+    token = r.json()["data"]["token"] if r.status_code == 200 else None
+    tech.drain_calls()
+    if not token:
+        print("Technician login failed", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Preparing {len(sizes) * args.repeat} reports...", file=sys.stderr)
+    report_ids = build_prepared_reports(args, len(sizes) * args.repeat)
+    if len(report_ids) < len(sizes) * args.repeat:
+        print("Fixture build failed", file=sys.stderr)
+        sys.exit(1)
+
+    rows = []
+    print(f"{'MB':>6} {'get MB':>7} {'get ms':>8} {'parse':>7} {'decode':>7} {'peak':>6} {'stream':>8} {'speak':>6} "
+          f"{'put MB':>7} {'bloat':>6} {'enc':>7} {'sign ms':>8} {'status':>7}")
+    for k, report_id in enumerate(report_ids):
+        target = int(sizes[k // args.repeat] * MB)
+        padded = pad_unsigned(tech, token, report_id, target) if args.pad_unsigned else None
+        tech.drain_calls()
+        buffered = signing_data_buffered(tech, token, report_id)
+        streaming = signing_data_streaming(tech, token, report_id)
+        pdf = buffered.pop("pdf")
+        signed = sign(tech, token, report_id, pdf, target, args.pin)
+        del pdf
+        b = buffered["row"]
+        row = {"report_id": report_id, "target_bytes": target, "unsigned_padded_bytes": padded,
+               "signing_data": b, "signing_data_streaming": streaming, "sign": signed,
+               "streaming_matches": streaming["sha256"] == b["sha256"]}
+        rows.append(row)
+        print(f"{target / MB:>6.1f} {(b['response_bytes'] or 0) / MB:>7.1f} {b['total_ms']:>8.0f} {b['parse_ms']:>7.0f} {b['decode_ms']:>7.0f} "
+              f"{b['peak_mb']:>6.0f} {streaming['total_ms']:>8.0f} {streaming['peak_mb']:>6.0f} "
+              f"{signed['request_bytes'] / MB:>7.1f} {signed['bloat']:>6} {signed['encode_ms']:>7.0f} {signed['total_ms']:>8.0f} "
+              f"{signed['status'] or '-':>7} {signed['error'] or ''}")
+
+    refused = [r["target_bytes"] for r in rows if r["sign"]["status"] != 200]
+    if refused:
+        print(f"\nSign refused from {min(refused) / MB:.1f} MB PDFs "
+              f"({min(r['sign']['request_bytes'] for r in rows if r['sign']['status'] != 200) / MB:.1f} MB JSON)")
+    mismatched = [r["report_id"] for r in rows if not r["streaming_matches"]]
+    if mismatched:
+        print(f"Streaming decode differs from buffered decode for reports {mismatched}")
+    if args.out:
+        with open(args.out, "w", encoding="utf_8") as f:
+            f.write(json.dumps(rows, indent=2, ensure_ascii=False))
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
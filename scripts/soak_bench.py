@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Soak test for report preparation: drive PDF generation for hours and watch memory.
+
+The report worker keeps one Puppeteer browser for its whole life
+(utils/pdfGenerator.js relaunches it only after a disconnect, and
+reportWorker.runLoop never recycles it), so slow growth in Node or Chrome
+only shows after many jobs. This script prepares a small set of reports over
+and over (prepare-async through the worker by default, or the API's sync
+/prepare) with --concurrency clients for --duration seconds, while
+proc_sampler records RSS, open file descriptors and process count of the
+worker, the other Node processes and Chrome from /proc.
+
+At the end each group gets a leak verdict: a least-squares slope of RSS
+(and fds) against jobs completed, after a warm-up, in MB per 1000 jobs.
+A group is flagged when that slope exceeds --max-mb-per-1k and the fit
+explains most of the variance (R² >= --min-r2), or when its process count
+keeps climbing (orphaned Chrome renderers). The JSON output (rewritten at
+every progress line, so a long run that dies still leaves data) holds the
+sample series, the job completion times and the verdicts.
+
+Run it on the backend host (process sampling is local and Linux-only).
+
+Usage:
+  python scripts/soak_bench.py --duration 14400 --concurrency 3 --out soak.json
+  python scripts/soak_bench.py --mode sync --duration 1800 --reports 8 --progress 60
+
+Requires: pip install requests
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from load_backend import percentile
+from proc_sampler import ProcessSampler, proc_available
+from test_backend import BackendTester
+
+# First match wins: the worker's node process gets its own group
+SOAK_GROUPS = {
+    "chrome": ["chrome", "chromium", "headless_shell"],
+    "worker": ["reportworker"],
+    "node": ["node"],
+}
+
+
+def fit(xs: List[float], ys: List[float]) -> Tuple[Optional[float], Optional[float]]:
+    """Least-squares slope of ys over xs and its R² (None when xs do not vary)."""
+    n = len(xs)
+    if n < 3:
+        return None, None
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    if sxx == 0:
+        return None, None
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    syy = sum((y - my) ** 2 for y in ys)
+    slope = sxy / sxx
+    r2 = (sxy * sxy) / (sxx * syy) if syy > 0 else 1.0
+    return slope, r2
+
+
+def leak_verdicts(sampler: ProcessSampler, done_at: List[float], warmup_jobs: int,
+                  max_mb_per_1k: float, max_fds_per_1k: float, min_r2: float) -> Dict[str, Dict[str, Any]]:
+    """Per group: RSS/fd slope per 1000 jobs after warm-up, process count drift and a verdict."""
+    out = {}
+    for label in sampler.groups:
+        pts = []
+        for s in sampler.samples:
+            g = s.groups.get(label)
+            jobs = bisect.bisect_right(done_at, s.t)
+            if g is not None and jobs >= warmup_jobs:
+                pts.append((jobs, g.rss_bytes / 2**20, g.fds, g.processes))
+        if len(pts) < 3:
+            out[label] = {"verdict": "insufficient data", "samples": len(pts)}
+            continue
+        jobs = [p[0] for p in pts]
+        rss_slope, rss_r2 = fit(jobs, [p[1] for p in pts])
+        fd_pts = [(p[0], p[2]) for p in pts if p[2] is not None]
+        fd_slope, fd_r2 = fit([p[0] for p in fd_pts], [p[1] for p in fd_pts]) if fd_pts else (None, None)
+        tenth = max(1, len(pts) // 10)
+        procs_first = max(p[3] for p in pts[:tenth])
+        procs_last = min(p[3] for p in pts[-tenth:])
+        reasons = []
+        if rss_slope is not None and rss_slope * 1000 > max_mb_per_1k and (rss_r2 or 0) >= min_r2:
+            reasons.append(f"RSS +{rss_slope * 1000:.1f} MB per 1000 jobs (R² {rss_r2:.2f})")
+        if fd_slope is not None and fd_slope * 1000 > max_fds_per_1k and (fd_r2 or 0) >= min_r2:
+            reasons.append(f"fds +{fd_slope * 1000:.1f} per 1000 jobs (R² {fd_r2:.2f})")
+        if procs_last > procs_first:
+            reasons.append(f"processes {procs_first} -> {procs_last}")
+        out[label] = {
+            "verdict": "leak suspected" if reasons else "stable",
+            "reasons": reasons,
+            "samples": len(pts),
+            "jobs_from": jobs[0],
+            "jobs_to": jobs[-1],
+            "rss_start_mb": round(pts[0][1], 1),
+            "rss_end_mb": round(pts[-1][1], 1),
+            "rss_mb_per_1k_jobs": round(rss_slope * 1000, 3) if rss_slope is not None else None,
+            "rss_r2": round(rss_r2, 3) if rss_r2 is not None else None,
+            "fds_per_1k_jobs": round(fd_slope * 1000, 3) if fd_slope is not None else None,
+            "fds_r2": round(fd_r2, 3) if fd_r2 is not None else None,
+            "processes_start": procs_first,
+            "processes_end": procs_last,
+        }
+    return out
+
+
+class Soak:
+    def __init__(self, args, token: str, report_ids: List[int], sampler: ProcessSampler):
+        self.args = args
+        self.token = token
+        self.report_ids = report_ids
+        self.sampler = sampler
+        self.done_at: List[float] = []  # sampler clock of every completed job, ascending
+        self.latencies: List[float] = []
+        self.failed = 0
+        self.errors: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def prepare(self, t: BackendTester, report_id: int) -> Tuple[bool, Optional[str]]:
+        if self.args.mode == "sync":
+            r = t.request("POST", f"/reports/{report_id}/prepare", token=self.token)
+            return r.status_code == 200, None if r.status_code == 200 else f"HTTP {r.status_code}"
+        r = t.request("POST", f"/reports/{report_id}/prepare-async", token=self.token)
+        if r.status_code not in (200, 202):
+            return False, f"HTTP {r.status_code}"
+        wait = t.wait_for_report_job(r.json()["data"]["jobId"], self.token)
+        return wait.status == "completed", None if wait.status == "completed" else f"job {wait.status}"
+
+    def client(self, index: int):
+        t = BackendTester(self.args.api, "", "", job_timeout=self.args.job_timeout)
+        k = index
+        while not self.stop.is_set():
+            report_id = self.report_ids[k % len(self.report_ids)]
+            k += 1
+            t0 = time.perf_counter()
+            try:
+                ok, error = self.prepare(t, report_id)
+            except Exception as e:
+                ok, error = False, type(e).__name__
+            latency = (time.perf_counter() - t0) * 1000.0
+            t.drain_calls()
+            with self.lock:
+                if ok:
+                    self.done_at.append(self.sampler.now())
+                    self.latencies.append(latency)
+                else:
+                    self.failed += 1
+                    self.errors[error] = self.errors.get(error, 0) + 1
+            if not ok:
+                # Do not spin on a dead backend
+                self.stop.wait(1.0)
+
+    def progress(self, started: float) -> str:
+        with self.lock:
+            jobs, failed = len(self.done_at), self.failed
+            recent = self.latencies[-200:]
+        last = self.sampler.samples[-1] if self.sampler.samples else None
+        groups = []
+        for label in self.sampler.groups:
+            g = last.groups.get(label) if last else None
+            if g is not None:
+                groups.append(f"{label} {g.rss_bytes / 2**20:.0f}MB/{g.fds if g.fds is not None else '?'}fd/{g.processes}p")
+        elapsed = time.perf_counter() - started
+        p50 = percentile(recent, 50)
+        return (f"[{elapsed / 60:7.1f} min] jobs={jobs} failed={failed} "
+                f"rate={jobs / elapsed if elapsed > 0 else 0:.2f}/s p50={p50 or 0:.0f}ms  " + "  ".join(groups))
+
+    def result(self) -> Dict[str, Any]:
+        with self.lock:
+            done_at = list(self.done_at)
+            lat = list(self.latencies)
+        a = self.args
+        return {
+            "mode": a.mode,
+            "concurrency": a.concurrency,
+            "reports": self.report_ids,
+            "jobs": len(done_at),
+            "failed": self.failed,
+            "errors": self.errors,
+            "latency_p50_ms": percentile(lat, 50),
+            "latency_p95_ms": percentile(lat, 95),
+            "verdicts": leak_verdicts(self.sampler, done_at, a.warmup_jobs, a.max_mb_per_1k, a.max_fds_per_1k, a.min_r2),
+            "job_done_at": [round(t, 3) for t in done_at],
+            "samples": self.sampler.series(),
+        }
+
+
+def write(path: str, data: Dict[str, Any]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf_8") as f:
+        f.write(json.dumps(data, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running report preparation soak with Node/Chrome memory sampling")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--mode", choices=["async", "sync"], default="async", help="async: report worker, sync: API /prepare")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=2, help="Concurrent prepare loops")
+    parser.add_argument("--reports", type=int, default=4, help="Reports to build and prepare in rotation")
+    parser.add_argument("--report-ids", help="Comma-separated existing report IDs instead of building new ones")
+    parser.add_argument("--job-timeout", type=float, default=300.0, help="Seconds to wait for one async job")
+    parser.add_argument("--sample-interval", type=float, default=5.0, help="Seconds between /proc samples")
+    parser.add_argument("--progress", type=float, default=300.0, help="Seconds between progress lines and checkpoints")
+    parser.add_argument("--warmup-jobs", type=int, default=50, help="Jobs excluded from the leak fit (browser and caches warming up)")
+    parser.add_argument("--max-mb-per-1k", type=float, default=10.0, help="RSS growth per 1000 jobs that counts as a leak")
+    parser.add_argument("--max-fds-per-1k", type=float, default=5.0, help="fd growth per 1000 jobs that counts as a leak")
+    parser.add_argument("--min-r2", type=float, default=0.5, help="Minimum R² of the fit for a leak verdict")
+    parser.add_argument("--out", default="soak.json")
+    args = parser.parse_args()
+
+    if not proc_available():
+        print("/proc is not available; the soak needs Linux and must run on the backend host", file=sys.stderr)
+        sys.exit(1)
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    if args.report_ids:
+        report_ids = [int(x) for x in args.report_ids.split(",") if x.strip()]
+    else:
+        def build(_):
+            t = BackendTester(args.api, args.email, args.password, job_timeout=args.job_timeout, sync_fallback=True)
+            return t.report_id if t.run_through(t.step_prepare_report_async) else None
+
+        print(f"Building {args.reports} reports...", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=min(args.reports, 4)) as pool:
+            report_ids = [i for i in pool.map(build, range(args.reports)) if i]
+    if not report_ids:
+        print("No reports to prepare", file=sys.stderr)
+        sys.exit(1)
+
+    sampler = ProcessSampler(SOAK_GROUPS, interval=args.sample_interval).start()
+    soak = Soak(args, admin.token_admin, report_ids, sampler)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    pool = ThreadPoolExecutor(max_workers=args.concurrency)
+    clients = [pool.submit(soak.client, i) for i in range(args.concurrency)]
+    try:
+        while time.perf_counter() < deadline:
+            time.sleep(min(args.progress, max(0.0, deadline - time.perf_counter())))
+            print(soak.progress(started), file=sys.stderr)
+            write(args.out, soak.result())
+    except KeyboardInterrupt:
+        print("Interrupted; finishing jobs in flight", file=sys.stderr)
+    finally:
+        soak.stop.set()
+        for c in clients:
+            c.result()
+        pool.shutdown()
+        sampler.stop()
+
+    result = soak.result()
+    write(args.out, result)
+    print(f"\njobs={result['jobs']} failed={result['failed']} p50={result['latency_p50_ms'] or 0:.0f}ms p95={result['latency_p95_ms'] or 0:.0f}ms")
+    for label, v in result["verdicts"].items():
+        if "rss_mb_per_1k_jobs" not in v:
+            print(f"{label:<7} {v['verdict']}")
+            continue
+        print(f"{label:<7} {v['verdict']:<15} RSS {v['rss_start_mb']}->{v['rss_end_mb']} MB, {v['rss_mb_per_1k_jobs']} MB/1k jobs "
+              f"(R² {v['rss_r2']}), fds {v['fds_per_1k_jobs']}/1k jobs, processes {v['processes_start']}->{v['processes_end']}")
+        for reason in v["reasons"]:
+            print(f"        - {reason}")
+    print(f"Results written to {args.out}")
+    sys.exit(1 if any(v["verdict"] == "leak suspected" for v in result["verdicts"].values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Validate equipment templates offline and estimate what their reports cost to render.
+
+Validation mirrors validateTemplate() in backend/controllers/equipmentController.js
+(the backend only answers true/false; this says which section and why).
+The cost model follows backend/utils/reportRenderer.js and the Puppeteer settings
+in backend/utils/pdfGenerator.js (A4, 12 mm margins):
+
+  * DOM nodes: elements the renderer emits for the template sections plus
+    the fixed header, general/equipment info and footer;
+  * worst-case photo bytes: every photos section filled to maxCount with
+    photos at the upload limit (5 MB each; Chrome embeds them at source
+    resolution);
+  * pages: estimated layout height at the template's style scale divided by
+    the printable A4 height. Tables assume --table-rows rows.
+
+Templates that are invalid, or whose estimate crosses a threshold, are
+flagged before they reach PUT /equipment/{id}/template.
+
+Usage:
+  python scripts/template_lint.py template.json equipment_export.json
+  python scripts/template_lint.py --example --random 200 --seed 7 --json
+  cat template.json | python scripts/template_lint.py - --max-pages 10
+
+Input files hold a template ({"sections": [...]}) or an object with a
+"template" key (e.g. an equipment row), or a list of either.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+from create_example_equipment import build_random_template, build_template
+
+SECTION_TYPES = ["key_value", "checklist", "table", "photos", "notes"]
+VALUE_TYPES = ["text", "number", "date", "select"]
+LEGACY_FIELD_TYPES = ["text", "number", "date", "select", "table", "photo"]
+UPLOAD_LIMIT_BYTES = 5 * 1024 * 1024  # backend/middleware/upload.js fileSize
+
+# A4 minus 12 mm margins, in CSS px (96 dpi)
+PAGE_HEIGHT_PX = (297 - 24) / 25.4 * 96
+PAGE_WIDTH_PX = (210 - 24) / 25.4 * 96
+
+# Per style scale (STYLE_PRESETS in backend/utils/reportRenderer.js): page + container padding,
+# section title, grid row, compact grid row, table row, photo row, notes block and section gap heights
+SCALES = {
+    "small": {"padding": 44, "title": 30, "kv_row": 42, "compact_row": 38, "table_row": 31, "photo_row": 116, "notes": 84, "gap": 18, "photo_gap": 10},
+    "medium": {"padding": 56, "title": 36, "kv_row": 50, "compact_row": 45, "table_row": 36, "photo_row": 152, "notes": 92, "gap": 24, "photo_gap": 14},
+    "large": {"padding": 64, "title": 40, "kv_row": 55, "compact_row": 50, "table_row": 40, "photo_row": 176, "notes": 96, "gap": 28, "photo_gap": 18},
+}
+HEADER_PX = 120
+FOOTER_PX = 150
+FIXED_NODES = 40  # html/head/body, header meta table, footer with QR block
+
+
+def _falsy(v: Any) -> bool:
+    """JavaScript truthiness, as used by validateTemplate's ``!x`` checks."""
+    if v is None or v is False or v == "":
+        return True
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v == 0 or v != v
+    return False
+
+
+def validate_template(template: Any) -> List[str]:
+    """Reasons the backend's validateTemplate() would reject ``template`` (empty when valid)."""
+    if not isinstance(template, dict):
+        return ["template is not an object"]
+    sections = template.get("sections")
+    if not isinstance(sections, list):
+        return ["sections is not an array"]
+    for si, section in enumerate(sections):
+        where = f"sections[{si}]"
+        if not isinstance(section, dict):
+            return [f"{where}: not an object"]
+        title = section.get("title")
+        if _falsy(title) or not isinstance(title, str):
+            return [f"{where}: title must be a non-empty string"]
+        st = section.get("type")
+        if not _falsy(st):
+            if st not in SECTION_TYPES:
+                return [f"{where}: unknown type {st!r}"]
+            if st == "key_value":
+                if not isinstance(section.get("items"), list):
+                    return [f"{where}: key_value needs items[]"]
+                for i, it in enumerate(section["items"]):
+                    if not isinstance(it, dict) or _falsy(it.get("name")) or not isinstance(it.get("name"), str):
+                        return [f"{where}.items[{i}]: name must be a non-empty string"]
+                    vt = it.get("valueType") or "text"
+                    if vt not in VALUE_TYPES:
+                        return [f"{where}.items[{i}]: unknown valueType {vt!r}"]
+                    if vt == "select" and (not isinstance(it.get("options"), list) or not it["options"]):
+                        return [f"{where}.items[{i}]: select needs options[]"]
+            elif st == "checklist":
+                if not isinstance(section.get("questions"), list):
+                    return [f"{where}: checklist needs questions[]"]
+                for i, q in enumerate(section["questions"]):
+                    if not isinstance(q, dict) or _falsy(q.get("name")) or _falsy(q.get("label")):
+                        return [f"{where}.questions[{i}]: name and label are required"]
+                    if not isinstance(q.get("options"), list) or not q["options"]:
+                        return [f"{where}.questions[{i}]: options[] must not be empty"]
+            elif st == "table":
+                if not isinstance(section.get("columns"), list) or not section["columns"]:
+                    return [f"{where}: table needs columns[]"]
+                for i, c in enumerate(section["columns"]):
+                    if not isinstance(c, dict) or _falsy(c.get("name")) or _falsy(c.get("label")):
+                        return [f"{where}.columns[{i}]: name and label are required"]
+            elif _falsy(section.get("field")) or not isinstance(section.get("field"), str):
+                return [f"{where}: {st} needs a field name"]
+        else:
+            if not isinstance(section.get("fields"), list):
+                return [f"{where}: legacy section needs fields[] (or a type)"]
+            for i, f in enumerate(section["fields"]):
+                fw = f"{where}.fields[{i}]"
+                if not isinstance(f, dict) or _falsy(f.get("name")) or not isinstance(f.get("name"), str):
+                    return [f"{fw}: name must be a non-empty string"]
+                if _falsy(f.get("type")) or not isinstance(f.get("type"), str):
+                    return [f"{fw}: type is required"]
+                if f["type"] not in LEGACY_FIELD_TYPES:
+                    return [f"{fw}: unknown type {f['type']!r}"]
+                if f["type"] == "select" and (_falsy(f.get("options")) or not isinstance(f.get("options"), list)):
+                    return [f"{fw}: select needs options[]"]
+                if f["type"] == "table" and (_falsy(f.get("columns")) or not isinstance(f.get("columns"), list)):
+                    return [f"{fw}: table needs columns[]"]
+    return []
+
+
+def _columns(value: Any, fallback: int) -> int:
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return fallback
+    return n if n > 0 else fallback
+
+
+def _grid_rows(spans: List[int], cols: int) -> int:
+    """Row count of buildRowsFromCells() for cells with the given colspans."""
+    rows, remaining, open_row = 0, cols, False
+    for span in spans:
+        span = min(cols, max(1, span))
+        if span > remaining:
+            if open_row:
+                rows += 1
+            remaining, open_row = cols, False
+        remaining -= span
+        open_row = True
+        if remaining == 0:
+            rows += 1
+            remaining, open_row = cols, False
+    return rows + (1 if open_row else 0)
+
+
+def _span(cell: Dict[str, Any]) -> int:
+    try:
+        return int(cell.get("colspan") or 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _grid(cells: List[Dict[str, Any]], cols: int, per_cell: int):
+    """(nodes, rows) of renderGridTable() for key_value/checklist cells."""
+    rows = _grid_rows([_span(c) for c in cells], cols) if cells else 1
+    # table, one tr per row, one td per cell (+ one filler td per short row at most)
+    nodes = 1 + rows + max(len(cells), 1) + rows + len(cells) * per_cell
+    return nodes, rows
+
+
+def estimate(template: Dict[str, Any], table_rows: int = 10, photo_bytes: int = UPLOAD_LIMIT_BYTES,
+             default_photos: int = 10) -> Dict[str, Any]:
+    scale = (((template.get("settings") or {}).get("reportStyle") or {}).get("scale") or "medium").lower()
+    m = SCALES.get(scale, SCALES["medium"])
+    content_width = PAGE_WIDTH_PX - 2 * m["padding"]
+    photo_cols = max(1, int((content_width + m["photo_gap"]) // (120 + m["photo_gap"])))
+
+    nodes = FIXED_NODES
+    height = 2 * m["padding"] + HEADER_PX + FOOTER_PX
+    # Fixed general info (5 items, 3 columns, 2 rows) and equipment info (2 items, 2 columns)
+    for cells, cols in ((5, 3), (2, 2)):
+        n, rows = _grid([{}] * cells, cols, 2)
+        nodes += 3 + n
+        height += m["title"] + rows * m["kv_row"] + m["gap"]
+
+    photos = 0
+    unbounded_photos = []
+    sections = template.get("sections") or []
+    legacy = any(isinstance(s, dict) and _falsy(s.get("type")) for s in sections)
+    for s in sections:
+        if not isinstance(s, dict):
+            continue
+        if legacy:
+            # renderTemplate() switches to renderLegacy() for the whole template
+            fields = s.get("fields") or []
+            if not fields:
+                continue
+            nodes += 4 + 2 * len(fields)
+            height += m["title"] + m["gap"]
+            for f in fields:
+                if f.get("type") == "table":
+                    cols = len(f.get("columns") or []) or 1
+                    nodes += 4 + table_rows * (1 + cols) + cols
+                    height += m["table_row"] * (table_rows + 1)
+                elif f.get("type") == "photo":
+                    nodes += default_photos
+                    photos += default_photos
+                    unbounded_photos.append(f.get("name"))
+                    height += m["photo_row"]
+                else:
+                    height += m["table_row"]
+            continue
+        st = s.get("type")
+        nodes += 3
+        height += m["title"] + m["gap"]
+        if st == "key_value":
+            items = s.get("items") or []
+            n, rows = _grid(items, _columns(s.get("columns"), 2), 2)
+            nodes += n + sum(1 for it in items if it.get("unit"))
+            height += rows * m["kv_row"]
+        elif st == "checklist":
+            questions = s.get("questions") or []
+            n, rows = _grid(questions, _columns(s.get("columns"), 2), 3)
+            nodes += n
+            height += rows * m["compact_row"]
+        elif st == "table":
+            cols = len(s.get("columns") or []) or 1
+            units = sum(1 for c in s.get("columns") or [] if c.get("unit"))
+            nodes += 6 + cols + table_rows * (1 + cols + units)
+            height += m["table_row"] * (table_rows + 1)
+        elif st == "photos":
+            count = s.get("maxCount")
+            if not isinstance(count, int) or count <= 0:
+                count = default_photos
+                unbounded_photos.append(s.get("field"))
+            nodes += 1 + 2 * count
+            photos += count
+            height += math.ceil(count / photo_cols) * (m["photo_row"] + m["photo_gap"]) + 2 * m["photo_gap"]
+        elif st == "notes":
+            nodes += 1
+            height += m["notes"]
+
+    return {
+        "scale": scale if scale in SCALES else "medium",
+        "legacy": legacy,
+        "sections": len(sections),
+        "dom_nodes": nodes,
+        "photos_max": photos,
+        "photo_bytes_worst": photos * photo_bytes,
+        "height_px": round(height),
+        "pages": max(1, math.ceil(height / PAGE_HEIGHT_PX)),
+        "photos_without_max_count": [f for f in unbounded_photos if f is not None],
+    }
+
+
+def lint(template: Any, limits: argparse.Namespace) -> Dict[str, Any]:
+    errors = validate_template(template)
+    if errors:
+        return {"valid": False, "errors": errors, "warnings": [], "estimate": None}
+    est = estimate(template, limits.table_rows, int(limits.photo_mb * 1024 * 1024), limits.default_photos)
+    warnings = []
+    sections = template["sections"]
+    if est["legacy"] and any(not _falsy(s.get("type")) for s in sections):
+        warnings.append("mixes typed and legacy sections; the renderer drops the typed ones")
+    names: Dict[str, int] = {}
+    for s in sections:
+        for key in ("items", "questions"):
+            for it in s.get(key) or []:
+                names[it.get("name")] = names.get(it.get("name"), 0) + 1
+        for it in s.get("fields") or []:
+            names[it.get("name")] = names.get(it.get("name"), 0) + 1
+        if s.get("field"):
+            names[s["field"]] = names.get(s["field"], 0) + 1
+        if s.get("type") == "table" and len(s.get("columns") or []) > limits.max_table_columns:
+            warnings.append(f"table '{s['title']}' has {len(s['columns'])} columns; cells get too narrow on A4")
+    dupes = sorted(n for n, c in names.items() if c > 1 and n)
+    if dupes:
+        warnings.append("field names used more than once share one value: " + ", ".join(dupes))
+    for field in est["photos_without_max_count"]:
+        warnings.append(f"photos '{field}' has no maxCount; estimated with {limits.default_photos}")
+    if est["dom_nodes"] > limits.max_dom_nodes:
+        warnings.append(f"~{est['dom_nodes']} DOM nodes (limit {limits.max_dom_nodes}); slow to render")
+    if est["pages"] > limits.max_pages:
+        warnings.append(f"~{est['pages']} pages (limit {limits.max_pages})")
+    if est["photo_bytes_worst"] > limits.max_photo_mb * 1024 * 1024:
+        warnings.append(f"up to {est['photo_bytes_worst'] / 2**20:.0f} MB of photos (limit {limits.max_photo_mb:g} MB); huge PDF")
+    return {"valid": True, "errors": [], "warnings": warnings, "estimate": est}
+
+
+def _templates_from(obj: Any, source: str) -> List[tuple]:
+    if isinstance(obj, list):
+        out = []
+        for i, o in enumerate(obj):
+            out += _templates_from(o, f"{source}[{i}]")
+        return out
+    if isinstance(obj, dict) and "template" in obj and "sections" not in obj:
+        label = obj.get("name") or obj.get("id")
+        return [(f"{source} ({label})" if label else source, obj["template"])]
+    return [(source, obj)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline validator and render-cost estimator for equipment templates")
+    parser.add_argument("files", nargs="*", help="JSON files with templates ('-' for stdin)")
+    parser.add_argument("--example", action="store_true", help="Also lint create_example_equipment.build_template()")
+    parser.add_argument("--random", type=int, default=0, help="Also lint N build_random_template() outputs")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--table-rows", type=int, default=10, help="Rows assumed per table section")
+    parser.add_argument("--photo-mb", type=float, default=UPLOAD_LIMIT_BYTES / 2**20, help="Bytes assumed per photo")
+    parser.add_argument("--default-photos", type=int, default=10, help="Photos assumed when maxCount is missing")
+    parser.add_argument("--max-dom-nodes", type=int, default=4000)
+    parser.add_argument("--max-pages", type=int, default=15)
+    parser.add_argument("--max-photo-mb", type=float, default=60.0)
+    parser.add_argument("--max-table-columns", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 on warnings too")
+    args = parser.parse_args()
+
+    inputs: List[tuple] = []
+    for path in args.files:
+        if path == "-":
+            inputs += _templates_from(json.load(sys.stdin), "stdin")
+        else:
+            with open(path, encoding="utf_8") as f:
+                inputs += _templates_from(json.load(f), path)
+    if args.example:
+        inputs.append(("build_template()", build_template()))
+    rng = random.Random(args.seed)
+    inputs += [(f"random[{i}]", build_random_template(rng)) for i in range(args.random)]
+    if not inputs:
+        parser.error("no templates given (files, --example or --random)")
+
+    results = [{"source": src, **lint(tpl, args)} for src, tpl in inputs]
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for r in results:
+            est: Optional[Dict[str, Any]] = r["estimate"]
+            status = "INVALID" if not r["valid"] else ("WARN" if r["warnings"] else "OK")
+            line = f"{status:<8} {r['source']}"
+            if est:
+                line += (f"  nodes~{est['dom_nodes']} pages~{est['pages']} photos<={est['photos_max']} "
+                         f"({est['photo_bytes_worst'] / 2**20:.0f} MB)")
+            print(line)
+            for msg in r["errors"] + r["warnings"]:
+                print(f"         - {msg}")
+    failed = any(not r["valid"] or (args.strict and r["warnings"]) for r in results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,49 @@
 #!/usr/bin/env python3
+import argparse
 import base64
+import calendar
+import csv
+import hashlib
+import itertools
 import json
 import os
+import random
+import re
+import struct
 import sys
+import threading
 import time
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+import uuid
+import zlib
+from concurrent import futures
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 except ImportError:
     print("This script requires the 'requests' package. Install with: pip install requests", file=sys.stderr)
     sys.exit(1)
 
+import baseline
+
 
 def now_ts() -> int:
     return int(time.time())
 
 
+_uniq_counter = itertools.count()
+
+
+def unique_suffix() -> str:
+    # now_ts() alone collides when several virtual users create records in the same second
+    return f"{now_ts()}{os.getpid() % 1000:03d}{next(_uniq_counter) % 10000:04d}"
+
+
 def tiny_png_bytes() -> bytes:
     # 1x1 transparent PNG
     b64 = (
@@ -27,6 +53,174 @@ def tiny_png_bytes() -> bytes:
     return base64.b64decode(b64)
 
 
+def synthetic_png(width: int, height: int) -> bytes:
+    """RGB PNG of random noise; noise does not compress, so the size tracks the pixel count."""
+    raw = b"".join(b"\x00" + os.urandom(width * 3) for _ in range(height))
+
+    def chunk(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+
+def parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def job_timings(job: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Queue wait (created → started) and run time (started → finished) of a report_jobs row."""
+    created = parse_ts(job.get("created_at"))
+    started = parse_ts(job.get("started_at"))
+    finished = parse_ts(job.get("finished_at"))
+    return {
+        "queue_wait_ms": (started - created).total_seconds() * 1000.0 if created and started else None,
+        "job_run_ms": (finished - started).total_seconds() * 1000.0 if started and finished else None,
+    }
+
+
+def path_template(path: str) -> str:
+    """Collapse numeric IDs and tokens so the same call matches across runs."""
+    parts = []
+    for seg in path.split('/'):
+        if seg.isdigit():
+            seg = ':id'
+        elif re.fullmatch(r"[0-9a-fA-F-]{16,}", seg):
+            seg = ':token'
+        parts.append(seg)
+    return '/'.join(parts)
+
+
+def parse_server_timing(value: Optional[str]) -> Dict[str, float]:
+    """Metric name -> dur (ms) from a Server-Timing header, e.g. ``db;dur=12.5;desc="3", app;dur=40``."""
+    out: Dict[str, float] = {}
+    for metric in (value or "").split(","):
+        params = [p.strip() for p in metric.split(";")]
+        if not params[0]:
+            continue
+        dur = 0.0
+        for p in params[1:]:
+            key, _, val = p.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    dur = float(val.strip().strip('"'))
+                except ValueError:
+                    pass
+        out[params[0]] = out.get(params[0], 0.0) + dur
+    return out
+
+
+# ---------- Connection timing ----------
+# urllib3 opens sockets lazily inside the pool, so connect time is captured by
+# wrapping connect() and accumulating per thread; each BackendTester is used by
+# one thread at a time.
+_connect_clock = threading.local()
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _connect_clock.ms = getattr(_connect_clock, "ms", 0.0) + (time.perf_counter() - t0) * 1000.0
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+@dataclass
+class RequestTiming:
+    method: str
+    path: str
+    status: Optional[int] = None
+    connect_ms: float = 0.0  # 0 when a kept-alive connection was reused
+    ttfb_ms: Optional[float] = None  # request start until response headers
+    total_ms: Optional[float] = None  # request start until body fully read
+    request_bytes: Optional[int] = None  # body bytes sent
+    response_bytes: Optional[int] = None  # body bytes received
+    error: Optional[str] = None
+    request_id: Optional[str] = None  # X-Request-ID, to find the call in the server log
+    server_timing: Dict[str, float] = field(default_factory=dict)  # Server-Timing: db, db-wait, render, pdf, app (ms)
+
+
+@dataclass
+class Download:
+    """A response body consumed in chunks: size and hash are computed as it arrives."""
+    status: Optional[int] = None
+    content_type: str = ""
+    content_length: Optional[int] = None  # Content-Length header
+    content_range: Optional[str] = None
+    bytes: int = 0
+    sha256: str = ""
+    head: bytes = b""
+
+    @property
+    def complete(self) -> bool:
+        return self.content_length is None or self.content_length == self.bytes
+
+
+@dataclass
+class JobWait:
+    """Client-observed progress of one report_jobs row (times relative to the first poll)."""
+    job_id: int
+    status: Optional[str] = None  # completed | failed | timeout | pending | processing
+    polls: int = 0
+    processing_seen_ms: Optional[float] = None
+    finished_seen_ms: Optional[float] = None
+    job: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_status": self.status,
+            "polls": self.polls,
+            "processing_seen_ms": self.processing_seen_ms,
+            "finished_seen_ms": self.finished_seen_ms,
+            **job_timings(self.job),
+        }
+
+
+def step_deps(needs: Tuple[str, ...] = (), produces: Tuple[str, ...] = ()):
+    """Declare the flow state a step reads and writes, for BackendTester.run_parallel().
+
+    Names are the tester attributes a step sets (``customer_id``, ``report_id``, ...)
+    or markers for server-side state changes (``offer_accepted``, ``signed_pdf``).
+    Steps without a declaration run alone, after everything before them.
+    """
+    def wrap(fn):
+        fn.needs = tuple(needs)
+        fn.produces = tuple(produces)
+        return fn
+    return wrap
+
+
 @dataclass
 class StepResult:
     name: str
@@ -34,18 +228,128 @@ class StepResult:
     status: Optional[int] = None
     message: Optional[str] = None
     data: Dict[str, Any] = field(default_factory=dict)
+    elapsed_ms: Optional[float] = None
+    calls: List[RequestTiming] = field(default_factory=list)
+
+    @property
+    def request_bytes(self) -> int:
+        return sum(c.request_bytes or 0 for c in self.calls)
+
+    @property
+    def response_bytes(self) -> int:
+        return sum(c.response_bytes or 0 for c in self.calls)
+
+    @property
+    def server_timing(self) -> Dict[str, float]:
+        """Server-side phase totals over the step's calls (ms)."""
+        total: Dict[str, float] = {}
+        for c in self.calls:
+            for name, ms in c.server_timing.items():
+                total[name] = total.get(name, 0.0) + ms
+        return {name: round(ms, 3) for name, ms in total.items()}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Timing-only view of the step (no response payloads), for export and diffing."""
+        return {
+            "name": self.name,
+            "success": self.success,
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed_ms, 3) if self.elapsed_ms is not None else None,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "server_timing": self.server_timing,
+            "calls": [asdict(c) for c in self.calls],
+        }
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """``exp`` claim of a JWT (epoch seconds), read without verifying the signature."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """JWTs shared by testers (and threads) per base URL and email until shortly before expiry.
+
+    Each /auth/login costs a bcrypt compare on the server; virtual users that
+    share a cache log in once per account instead of once per iteration.
+    Concurrent misses for the same account wait for one login.
+    """
+
+    def __init__(self, margin_s: float = 60.0, default_ttl_s: float = 3600.0):
+        self.margin_s = margin_s
+        self.default_ttl_s = default_ttl_s  # for tokens without an exp claim
+        self.hits = 0
+        self.logins = 0
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _valid(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self._tokens.get(key)
+        if entry and entry[1] - self.margin_s > time.time():
+            return entry[0]
+        return None
+
+    def login(self, tester: "BackendTester", email: str, password: str) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """(login response or None on a cache hit, token or None on failure)."""
+        key = (tester.base, email.lower())
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                token = self._valid(key)
+                if token:
+                    self.hits += 1
+                    return None, token
+            r = tester.request("POST", "/auth/login", json={"email": email, "password": password})
+            with self._lock:
+                self.logins += 1
+            if not tester._ok(r):
+                return r, None
+            token = r.json()["data"]["token"]
+            with self._lock:
+                self._tokens[key] = (token, jwt_expiry(token) or time.time() + self.default_ttl_s)
+            return r, token
+
+    def invalidate(self, base_url: str, email: str):
+        with self._lock:
+            self._tokens.pop((base_url.rstrip("/"), email.lower()), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"token_cache_hits": self.hits, "logins": self.logins}
 
 
 class BackendTester:
-    def __init__(self, base_url: str, email: str, password: str):
+    def __init__(self, base_url: str, email: str, password: str, job_timeout: float = 60.0, sync_fallback: bool = False,
+                 token_cache: Optional[TokenCache] = None, task_date: Optional[str] = None):
         self.base = base_url.rstrip('/')
         self.email = email
         self.password = password
+        # Report jobs: how long to wait for the worker, and whether to mask a timeout with /prepare
+        self.job_timeout = job_timeout
+        self.sync_fallback = sync_fallback
+        # Shared JWTs instead of a /auth/login per flow (see TokenCache)
+        self.token_cache = token_cache
+        # Fixed taskStartDate for runs on a fresh database (db_fixture.py); None picks a random future date
+        self.task_date = task_date
         self.token_admin: Optional[str] = None
         self.token_tech: Optional[str] = None
         self.results: List[StepResult] = []
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
+        adapter = TimingAdapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Step start and pending request timings are per thread, so run_parallel() can share the tester
+        self._local = threading.local()
+        self._mark = time.perf_counter()
+        self._calls: List[RequestTiming] = []
 
         # Dynamic IDs
         self.customer_id: Optional[int] = None
@@ -55,6 +359,39 @@ class BackendTester:
         self.work_order_id: Optional[int] = None
         self.inspection_id: Optional[int] = None
         self.report_id: Optional[int] = None
+        self.qr_token: Optional[str] = None
+
+    def reset(self):
+        """Forget results and per-flow IDs so the same session can run the flow again."""
+        self.results = []
+        self._calls = []
+        self.customer_id = None
+        self.equipment_id = None
+        self.offer_id = None
+        self.offer_track = None
+        self.work_order_id = None
+        self.inspection_id = None
+        self.report_id = None
+        self.qr_token = None
+
+    @property
+    def _mark(self) -> float:
+        return getattr(self._local, "mark", 0.0)
+
+    @_mark.setter
+    def _mark(self, value: float):
+        self._local.mark = value
+
+    @property
+    def _calls(self) -> List[RequestTiming]:
+        calls = getattr(self._local, "calls", None)
+        if calls is None:
+            calls = self._local.calls = []
+        return calls
+
+    @_calls.setter
+    def _calls(self, value: List[RequestTiming]):
+        self._local.calls = value
 
     # ---------- Helpers ----------
     def _auth_headers(self, token: Optional[str]) -> Dict[str, str]:
@@ -69,27 +406,111 @@ class BackendTester:
             payload = resp.json() if resp is not None else None
         except Exception:
             payload = None
-        self.results.append(StepResult(name=name, success=success, status=status, message=message, data={"response": payload, **(data or {})}))
+        # Time since the step started (or since the previous record of a multi-record step)
+        mark = time.perf_counter()
+        elapsed_ms = (mark - self._mark) * 1000.0
+        self._mark = mark
+        calls = self.drain_calls()
+        sink = getattr(self._local, "results", None)
+        (self.results if sink is None else sink).append(StepResult(name=name, success=success, status=status, message=message, data={"response": payload, **(data or {})}, elapsed_ms=elapsed_ms, calls=calls))
 
-    def _post(self, path: str, json_body: Dict[str, Any] = None, token: Optional[str] = None, files: Dict[str, Tuple[str, bytes, str]] = None) -> requests.Response:
+    def request(self, method: str, path: str, token: Optional[str] = None, headers: Dict[str, Any] = None,
+                on_chunk: Optional[Callable[[bytes], None]] = None, chunk_size: int = 64 * 1024, **kwargs) -> requests.Response:
+        """Send a request on the pooled session and time it into the current step.
+
+        With ``on_chunk`` the body is passed on in ``chunk_size`` pieces instead of
+        being buffered, and ``resp.content`` is not available afterwards.
+        """
         url = f"{self.base}{path}"
+        h = self._auth_headers(token)
+        h["X-Request-ID"] = uuid.uuid4().hex
+        h.update(headers or {})
+        timing = RequestTiming(method=method, path=path, request_id=h.get("X-Request-ID"))
+        _connect_clock.ms = 0.0
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, headers=h, stream=True, **kwargs)
+            timing.ttfb_ms = (time.perf_counter() - t0) * 1000.0
+            if on_chunk is None:
+                size = len(resp.content)
+            else:
+                size = 0
+                for chunk in resp.iter_content(chunk_size):
+                    on_chunk(chunk)
+                    size += len(chunk)
+            timing.total_ms = (time.perf_counter() - t0) * 1000.0
+        except Exception as e:
+            timing.total_ms = (time.perf_counter() - t0) * 1000.0
+            timing.connect_ms = _connect_clock.ms
+            timing.error = str(e)
+            self._calls.append(timing)
+            raise
+        timing.connect_ms = _connect_clock.ms
+        timing.status = resp.status_code
+        timing.request_id = resp.headers.get("X-Request-ID", timing.request_id)
+        timing.server_timing = parse_server_timing(resp.headers.get("Server-Timing"))
+        timing.response_bytes = size
+        req_body = resp.request.body
+        if req_body is None:
+            req_body = b""
+        elif isinstance(req_body, str):
+            req_body = req_body.encode("utf-8")
+        # Streamed bodies count only when they know their length (generators don't)
+        if isinstance(req_body, bytes) or hasattr(req_body, "__len__"):
+            timing.request_bytes = len(req_body)
+        self._calls.append(timing)
+        return resp
+
+    def download(self, path: str, token: Optional[str] = None, params: Dict[str, Any] = None,
+                 headers: Dict[str, Any] = None, chunk_size: int = 64 * 1024,
+                 on_chunk: Optional[Callable[[bytes], None]] = None) -> Tuple[requests.Response, Download]:
+        """GET ``path`` streaming the body through sha256; the body itself is not kept."""
+        dl = Download()
+        digest = hashlib.sha256()
+
+        def consume(chunk: bytes):
+            if len(dl.head) < 8:
+                dl.head += chunk[:8 - len(dl.head)]
+            dl.bytes += len(chunk)
+            digest.update(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+
+        resp = self.request("GET", path, token=token, headers=headers, params=params or {}, on_chunk=consume, chunk_size=chunk_size)
+        dl.status = resp.status_code
+        dl.content_type = resp.headers.get("Content-Type", "")
+        length = resp.headers.get("Content-Length")
+        dl.content_length = int(length) if length and length.isdigit() else None
+        dl.content_range = resp.headers.get("Content-Range")
+        dl.sha256 = digest.hexdigest()
+        return resp, dl
+
+    def drain_calls(self) -> List[RequestTiming]:
+        """Return and clear timings of requests not yet attached to a StepResult."""
+        calls, self._calls = self._calls, []
+        return calls
+
+    def _post(self, path: str, json_body: Dict[str, Any] = None, token: Optional[str] = None, files: Dict[str, Tuple[str, bytes, str]] = None) -> requests.Response:
         if files:
-            # For multipart, do not send Content-Type: application/json
-            headers = self._auth_headers(token)
-            return requests.post(url, headers=headers, files=files, data={k: v for k, v in (json_body or {}).items()})
-        return self.session.post(url, headers=self._auth_headers(token), json=json_body or {})
+            # For multipart, drop the session's Content-Type: application/json so requests sets the boundary
+            return self.request("POST", path, token=token, headers={"Content-Type": None}, files=files, data={k: v for k, v in (json_body or {}).items()})
+        return self.request("POST", path, token=token, json=json_body or {})
 
     def _get(self, path: str, token: Optional[str] = None, params: Dict[str, Any] = None) -> requests.Response:
-        url = f"{self.base}{path}"
-        return self.session.get(url, headers=self._auth_headers(token), params=params or {})
+        return self.request("GET", path, token=token, params=params or {})
 
     def _put(self, path: str, json_body: Dict[str, Any] = None, token: Optional[str] = None) -> requests.Response:
-        url = f"{self.base}{path}"
-        return self.session.put(url, headers=self._auth_headers(token), json=json_body or {})
+        return self.request("PUT", path, token=token, json=json_body or {})
 
     def _delete(self, path: str, token: Optional[str] = None) -> requests.Response:
-        url = f"{self.base}{path}"
-        return self.session.delete(url, headers=self._auth_headers(token))
+        return self.request("DELETE", path, token=token)
+
+    def _login(self, email: str, password: str) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """Log in, or take the token from the shared cache (response is None then)."""
+        if self.token_cache is not None:
+            return self.token_cache.login(self, email, password)
+        r = self._post("/auth/login", {"email": email, "password": password})
+        return r, r.json()["data"]["token"] if self._ok(r) else None
 
     def _ok(self, resp: requests.Response) -> bool:
         try:
@@ -97,7 +518,42 @@ class BackendTester:
         except Exception:
             return False
 
+    def _pdf_download_ok(self, dl: Download) -> bool:
+        return dl.status == 200 and dl.content_type.startswith("application/pdf") and dl.head.startswith(b"%PDF") and dl.complete
+
+    def wait_for_report_job(self, job_id: int, token: Optional[str], timeout: Optional[float] = None,
+                            initial: float = 0.1, max_interval: float = 2.0, factor: float = 1.6,
+                            jitter: float = 0.25) -> JobWait:
+        """Poll /reports/jobs/{id} with exponential backoff and jitter until the job finishes.
+
+        Records when the client first saw the job processing and finished, next to the
+        server-side created/started/finished timestamps. Returns status "timeout" instead of
+        falling back to the synchronous endpoint, so worker slowness stays visible.
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        wait = JobWait(job_id=job_id)
+        t0 = time.perf_counter()
+        interval = initial
+        while True:
+            s = self._get(f"/reports/jobs/{job_id}", token=token)
+            wait.polls += 1
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            if s.status_code == 200:
+                wait.job = s.json()["data"]
+                wait.status = wait.job.get("status")
+                if wait.status == "processing" and wait.processing_seen_ms is None:
+                    wait.processing_seen_ms = elapsed_ms
+                if wait.status in ("completed", "failed"):
+                    wait.finished_seen_ms = elapsed_ms
+                    return wait
+            if elapsed_ms / 1000.0 >= timeout:
+                wait.status = "timeout"
+                return wait
+            time.sleep(interval * random.uniform(1.0 - jitter, 1.0 + jitter))
+            interval = min(interval * factor, max_interval)
+
     # ---------- Test Steps ----------
+    @step_deps()
     def step_health(self):
         name = "health"
         try:
@@ -106,18 +562,20 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(produces=("token_admin",))
     def step_login_admin(self):
         name = "login_admin"
         try:
-            r = self._post("/auth/login", {"email": self.email, "password": self.password})
-            if self._ok(r):
-                self.token_admin = r.json()["data"]["token"]
-                self._record(name, r, True)
+            r, token = self._login(self.email, self.password)
+            if token:
+                self.token_admin = token
+                self._record(name, r, True, data={"cached": r is None})
             else:
                 self._record(name, r, False)
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("token_admin",))
     def step_profile(self):
         name = "profile_admin"
         try:
@@ -126,15 +584,16 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("token_admin",), produces=("customer_id",))
     def step_create_customer(self):
         name = "create_customer"
         try:
-            uniq = now_ts()
+            uniq = unique_suffix()
             body = {
                 "name": f"Test Musteri {uniq}",
                 "email": f"test{uniq}@ex.com",
                 # Use a unique tax number to avoid seed conflict
-                "taxNumber": f"9{uniq:09d}",
+                "taxNumber": f"9{uniq}",
                 "address": "",
                 "contact": "",
                 "authorizedPerson": ""
@@ -147,10 +606,11 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("token_admin",), produces=("equipment_id",))
     def step_create_equipment_with_template(self):
         name = "create_equipment"
         try:
-            uniq = now_ts()
+            uniq = unique_suffix()
             template = {
                 "sections": [
                     {
@@ -189,6 +649,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("customer_id", "equipment_id"), produces=("offer_id",))
     def step_create_offer(self):
         name = "create_offer"
         try:
@@ -205,6 +666,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("offer_id",), produces=("offer_approved",))
     def step_approve_offer(self):
         name = "approve_offer"
         try:
@@ -213,6 +675,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("offer_approved",), produces=("offer_track",))
     def step_send_offer(self):
         name = "send_offer"
         try:
@@ -228,6 +691,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("offer_track",), produces=("offer_accepted",))
     def step_public_offer_accept(self):
         name = "public_offer_accept"
         try:
@@ -236,12 +700,16 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("offer_accepted",), produces=("work_order_id",))
     def step_convert_to_work_order(self):
         name = "convert_to_work_order"
         try:
-            # Pick a future date unlikely to collide with existing 09:00-17:00 slots
             base = now_ts()
-            future_ts = base + 86400 * ((base % 90) + 1)  # 1..90 days ahead
+            if self.task_date:
+                future_ts = calendar.timegm(time.strptime(self.task_date, "%Y-%m-%d"))
+            else:
+                # Shared database: pick a future date unlikely to collide with existing 09:00-17:00 slots
+                future_ts = base + 86400 * ((base % 90) + 1)  # 1..90 days ahead
             opening = time.strftime("%Y-%m-%d", time.gmtime(base))
             start = time.strftime("%Y-%m-%d", time.gmtime(future_ts))
             end = time.strftime("%Y-%m-%d", time.gmtime(future_ts + 86400))
@@ -259,6 +727,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("work_order_id",), produces=("inspection_id",))
     def step_list_inspections(self):
         name = "list_inspections"
         try:
@@ -272,6 +741,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("inspection_id",), produces=("inspection_photos",))
     def step_upload_inspection_photo(self):
         name = "upload_inspection_photo"
         try:
@@ -283,6 +753,8 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    # After the photo upload: both rewrite inspections.inspection_data from their own read
+    @step_deps(needs=("inspection_photos",), produces=("inspection_data",))
     def step_update_inspection_data(self):
         name = "update_inspection"
         try:
@@ -302,6 +774,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("inspection_photos", "inspection_data"), produces=("report_id",))
     def step_save_inspection(self):
         name = "save_inspection"
         try:
@@ -317,6 +790,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("report_id",), produces=("inspection_completed",))
     def step_complete_inspection(self):
         name = "complete_inspection"
         try:
@@ -325,6 +799,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("inspection_completed",), produces=("work_order_completed",))
     def step_work_order_status_completed(self):
         name = "work_order_status_completed"
         try:
@@ -333,33 +808,39 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("inspection_completed",), produces=("unsigned_pdf",))
     def step_prepare_report_async(self):
         name = "prepare_report_async"
         try:
             r = self._post(f"/reports/{self.report_id}/prepare-async", token=self.token_admin)
             ok = r.status_code in (200, 202)
             job_id = None
+            wait: Optional[JobWait] = None
+            fallback_sync = False
+            message = None
             if ok:
                 job_id = r.json()["data"]["jobId"]
-                # poll for completion
-                for _ in range(20):
-                    s = self._get(f"/reports/jobs/{job_id}", token=self.token_admin)
-                    if s.status_code == 200 and s.json()["data"]["status"] == "completed":
-                        ok = True
-                        break
-                    time.sleep(0.25)
-                else:
-                    # fallback to sync prepare
-                    p = self._post(f"/reports/{self.report_id}/prepare", token=self.token_admin)
-                    ok = self._ok(p)
+                wait = self.wait_for_report_job(job_id, self.token_admin)
+                ok = wait.status == "completed"
+                if not ok:
+                    message = f"job {wait.status}" + (f": {wait.job.get('last_error')}" if wait.job.get("last_error") else "")
+                    if self.sync_fallback:
+                        fallback_sync = True
+                        p = self._post(f"/reports/{self.report_id}/prepare", token=self.token_admin)
+                        ok = self._ok(p)
             else:
                 # Enqueue failed (likely migration missing); try sync prepare immediately
+                fallback_sync = True
                 p = self._post(f"/reports/{self.report_id}/prepare", token=self.token_admin)
                 ok = self._ok(p)
-            self._record(name, r, ok, data={"job_id": job_id})
+            data = {"job_id": job_id, "fallback_sync": fallback_sync}
+            if wait is not None:
+                data.update(wait.as_dict())
+            self._record(name, r, ok, message=message, data=data)
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("unsigned_pdf",), produces=("unsigned_checked",))
     def step_verify_unsigned_path(self):
         name = "verify_unsigned_path"
         try:
@@ -373,6 +854,8 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    # May rewrite unsigned.pdf (the /prepare retry, or signing-data regenerating a missing file), so the download waits for it
+    @step_deps(needs=("unsigned_pdf",), produces=("unsigned_checked", "unsigned_settled"))
     def step_verify_signing_data_pdf(self):
         name = "verify_signing_data_pdf"
         try:
@@ -403,25 +886,24 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("unsigned_settled",), produces=("unsigned_checked",))
     def step_download_report_unsigned(self):
         name = "download_report_unsigned"
         try:
-            url = f"/reports/{self.report_id}/download"
-            r = self._get(url, token=self.token_admin)
-            ok = r.status_code == 200 and r.headers.get('Content-Type','').startswith('application/pdf')
-            self._record(name, r, ok)
+            r, dl = self.download(f"/reports/{self.report_id}/download", token=self.token_admin)
+            self._record(name, r, self._pdf_download_ok(dl), data={"bytes": dl.bytes, "sha256": dl.sha256})
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("unsigned_checked",), produces=("token_tech", "signed_pdf"))
     def step_sign_report_with_technician(self):
         name = "sign_report_with_technician"
         try:
             # login as technician with e-sign PIN 123456 (seed)
-            rlogin = self._post("/auth/login", {"email": "ahmet@abc.com", "password": "password"})
-            if not self._ok(rlogin):
+            rlogin, self.token_tech = self._login("ahmet@abc.com", "password")
+            if not self.token_tech:
                 self._record(name, rlogin, False, message="tech login failed")
                 return
-            self.token_tech = rlogin.json()["data"]["token"]
             # get signing data
             g = self._get(f"/reports/{self.report_id}/signing-data", token=self.token_tech)
             if not self._ok(g):
@@ -434,6 +916,7 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("signed_pdf",))
     def step_verify_signed_path(self):
         name = "verify_signed_path"
         try:
@@ -450,15 +933,16 @@ class BackendTester:
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("signed_pdf",))
     def step_download_report_signed(self):
         name = "download_report_signed"
         try:
-            r = self._get(f"/reports/{self.report_id}/download", token=self.token_admin, params={"signed": "true"})
-            ok = r.status_code == 200 and r.headers.get('Content-Type','').startswith('application/pdf')
-            self._record(name, r, ok)
+            r, dl = self.download(f"/reports/{self.report_id}/download", token=self.token_admin, params={"signed": "true"})
+            self._record(name, r, self._pdf_download_ok(dl), data={"bytes": dl.bytes, "sha256": dl.sha256})
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    @step_deps(needs=("signed_pdf",))
     def step_public_qr(self):
         name = "public_qr"
         try:
@@ -467,12 +951,14 @@ class BackendTester:
             if not self._ok(rrep):
                 self._record(name, rrep, False, message="report fetch failed")
                 return
-            qr = rrep.json()["data"].get("qr_token")
+            qr = self.qr_token = rrep.json()["data"].get("qr_token")
             g = self._get(f"/reports/public/{qr}")
             self._record(name, g, g.status_code == 200 and g.json().get("success") is True)
         except Exception as e:
             self._record(name, None, False, message=str(e))
 
+    # Approve/send the work order once its report is signed, as the serial flow does
+    @step_deps(needs=("work_order_completed", "signed_pdf"))
     def step_work_order_status_flow(self):
         name1 = "work_order_status_approved"
         name2 = "work_order_status_sent"
@@ -485,61 +971,335 @@ class BackendTester:
             self._record(name1, None, False, message=str(e))
 
     # ---------- Runner ----------
+    def steps(self) -> List[Callable[[], None]]:
+        """The offer → work order → inspection → report → sign flow, in execution order."""
+        return [
+            self.step_health,
+            self.step_login_admin,
+            self.step_profile,
+            self.step_create_customer,
+            self.step_create_equipment_with_template,
+            self.step_create_offer,
+            self.step_approve_offer,
+            self.step_send_offer,
+            self.step_public_offer_accept,
+            self.step_convert_to_work_order,
+            self.step_list_inspections,
+            self.step_upload_inspection_photo,
+            self.step_update_inspection_data,
+            self.step_save_inspection,
+            self.step_complete_inspection,
+            self.step_work_order_status_completed,
+            self.step_prepare_report_async,
+            self.step_verify_unsigned_path,
+            self.step_verify_signing_data_pdf,
+            self.step_download_report_unsigned,
+            self.step_sign_report_with_technician,
+            self.step_verify_signed_path,
+            self.step_download_report_signed,
+            self.step_public_qr,
+            self.step_work_order_status_flow,
+        ]
+
+    def run_step(self, step: Callable[[], None]) -> List[StepResult]:
+        """Run one step and return the results it recorded."""
+        before = len(self.results)
+        self._mark = time.perf_counter()
+        step()
+        return self.results[before:]
+
     def run(self):
-        self.step_health()
-        self.step_login_admin()
-        self.step_profile()
-        self.step_create_customer()
-        self.step_create_equipment_with_template()
-        self.step_create_offer()
-        self.step_approve_offer()
-        self.step_send_offer()
-        self.step_public_offer_accept()
-        self.step_convert_to_work_order()
-        self.step_list_inspections()
-        self.step_upload_inspection_photo()
-        self.step_update_inspection_data()
-        self.step_save_inspection()
-        self.step_complete_inspection()
-        self.step_work_order_status_completed()
-        self.step_prepare_report_async()
-        self.step_verify_unsigned_path()
-        self.step_verify_signing_data_pdf()
-        self.step_download_report_unsigned()
-        self.step_sign_report_with_technician()
-        self.step_verify_signed_path()
-        self.step_download_report_signed()
-        self.step_public_qr()
-        self.step_work_order_status_flow()
-
-    def summary(self) -> Dict[str, Any]:
-        total = len(self.results)
-        passed = sum(1 for r in self.results if r.success)
+        for step in self.steps():
+            self.run_step(step)
+
+    def step_graph(self) -> List[List[int]]:
+        """For each step (by index in steps()), the indices of the earlier steps it must wait for."""
+        steps = self.steps()
+        producers: Dict[str, List[int]] = {}
+        barrier: Optional[int] = None
+        graph = []
+        for i, step in enumerate(steps):
+            if not hasattr(step, "needs"):
+                # Undeclared steps keep sequential semantics
+                graph.append(list(range(i)))
+                barrier = i
+                continue
+            deps = {j for name in step.needs for j in producers.get(name, [])}
+            if barrier is not None:
+                deps.add(barrier)
+            graph.append(sorted(deps))
+            for name in step.produces:
+                producers.setdefault(name, []).append(i)
+        return graph
+
+    def _run_isolated(self, step: Callable[[], None]) -> List[StepResult]:
+        self._local.results = []
+        self._calls = []
+        self._mark = time.perf_counter()
+        try:
+            step()
+            return self._local.results
+        finally:
+            self._local.results = None
+
+    def run_parallel(self, max_workers: int = 8):
+        """Run the flow as a dependency graph, starting each step as soon as its inputs exist.
+
+        Like run(), every step runs even if an earlier one failed, and results end up in
+        steps() order, so summary() has the same shape. Step timings overlap, so compare
+        them against other parallel runs only.
+        """
+        steps = self.steps()
+        graph = self.step_graph()
+        waiting = {i: set(deps) for i, deps in enumerate(graph)}
+        recorded: Dict[int, List[StepResult]] = {}
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while waiting or running:
+                for i in [i for i, deps in waiting.items() if not deps]:
+                    del waiting[i]
+                    running[pool.submit(self._run_isolated, steps[i])] = i
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for f in done:
+                    i = running.pop(f)
+                    recorded[i] = f.result()
+                    for deps in waiting.values():
+                        deps.discard(i)
+        for i in range(len(steps)):
+            self.results.extend(recorded[i])
+
+    def run_through(self, last: Callable[[], None], start: Optional[Callable[[], None]] = None) -> bool:
+        """Run the flow up to and including ``last``, stopping at the first failure.
+
+        With ``start`` the steps before it are skipped (their IDs must already be set).
+        Benchmarks use this to build fresh fixtures (e.g. a saved inspection with a report).
+        """
+        steps = self.steps()
+        if start is not None:
+            steps = steps[steps.index(start):]
+        for step in steps:
+            if not all(r.success for r in self.run_step(step)):
+                return False
+            if step == last:
+                return True
+        return True
+
+    def summary(self, results: Optional[List[StepResult]] = None) -> Dict[str, Any]:
+        """Pass/fail counts and step details of ``results`` (default: this tester's own)."""
+        results = self.results if results is None else results
+        total = len(results)
+        passed = sum(1 for r in results if r.success)
         failed = total - passed
         return {
             "total": total,
             "passed": passed,
             "failed": failed,
-            "details": [r.__dict__ for r in self.results],
+            "details": [asdict(r) for r in results],
         }
 
 
+# ---------- Export ----------
+CSV_FIELDS = ["step", "call", "method", "path", "status", "connect_ms", "ttfb_ms", "total_ms", "request_bytes", "response_bytes", "error",
+              "request_id", "server_timing"]
+
+
+def export_jsonl(results: List[StepResult], path: str):
+    """One JSON object per step: timings and byte counts, without response payloads."""
+    with open(path, "w", encoding="utf_8") as f:
+        for r in results:
+            f.write(json.dumps(r.metrics(), ensure_ascii=False) + "\n")
+
+
+def export_csv(results: List[StepResult], path: str):
+    """One row per HTTP call, keyed by step name and call index so runs can be diffed."""
+    with open(path, "w", encoding="utf_8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        w.writeheader()
+        for r in results:
+            for i, c in enumerate(r.calls):
+                row = asdict(c)
+                row["path"] = path_template(c.path)
+                for k in ("connect_ms", "ttfb_ms", "total_ms"):
+                    if row[k] is not None:
+                        row[k] = round(row[k], 3)
+                row["server_timing"] = " ".join(f"{name}={ms:g}" for name, ms in c.server_timing.items())
+                w.writerow({"step": r.name, "call": i, **row})
+
+
+SERVER_PHASES = ["app", "db", "db-wait", "render", "pdf"]
+
+
+def format_server_timing(results: List[StepResult]) -> str:
+    """Per-step table of client time vs. the server phases reported in Server-Timing."""
+    lines = [f"{'step':<34} {'client':>9} " + " ".join(f"{p:>9}" for p in SERVER_PHASES) + f" {'network':>9}"]
+    for r in results:
+        st = r.server_timing
+        if not st:
+            continue
+        client = sum(c.total_ms or 0.0 for c in r.calls)
+        cells = " ".join(f"{st[p]:>9.1f}" if p in st else f"{'-':>9}" for p in SERVER_PHASES)
+        # What the server did not account for: network, queueing before Express, body transfer
+        other = f"{client - st['app']:>9.1f}" if "app" in st else f"{'-':>9}"
+        lines.append(f"{r.name:<34} {client:>9.1f} {cells} {other}")
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+QR_ENDPOINTS = {"view": "/reports/public/{qr}", "download": "/reports/public/{qr}/download"}
+
+
+def _pct(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))], 2)
+
+
+def qr_scan_replay(base_url: str, qr_token: str, clients: int, scans: int) -> Dict[str, Dict[str, Any]]:
+    """Repeated QR scans of one report: plain GETs vs. GETs revalidated with the client's last ETag.
+
+    Every client (a phone or a browser) scans ``scans`` times. In the conditional run its first
+    scan is a plain GET and later ones send If-None-Match, so the hit rate is 304s / revalidations.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, template in QR_ENDPOINTS.items():
+        path = template.format(qr=qr_token)
+        runs: Dict[str, List[Tuple[RequestTiming, bool]]] = {}
+        for mode in ("plain", "conditional"):
+            def client(_):
+                t = BackendTester(base_url, "", "")
+                etag = None
+                calls = []
+                for _ in range(scans):
+                    headers = {"If-None-Match": etag} if mode == "conditional" and etag else None
+                    r = t.request("GET", path, headers=headers)
+                    if r.status_code == 200:
+                        etag = r.headers.get("ETag") or etag
+                    calls.append((t.drain_calls()[-1], headers is not None))
+                return calls
+
+            with futures.ThreadPoolExecutor(max_workers=clients) as pool:
+                runs[mode] = [c for calls in pool.map(client, range(clients)) for c in calls]
+        plain = [c for c, _ in runs["plain"]]
+        cond = [c for c, _ in runs["conditional"]]
+        revalidations = [c for c, revalidated in runs["conditional"] if revalidated]
+        hits = [c for c in revalidations if c.status == 304]
+        full = [c for c in cond if c.status == 200]
+        plain_bytes = sum(c.response_bytes or 0 for c in plain)
+        cond_bytes = sum(c.response_bytes or 0 for c in cond)
+        out[name] = {
+            "requests": len(cond),
+            "errors": sum(1 for c in plain + cond if c.status not in (200, 304)),
+            "revalidations": len(revalidations),
+            "not_modified": len(hits),
+            "hit_rate": round(len(hits) / len(revalidations), 3) if revalidations else None,
+            "etag": bool(revalidations),
+            "bytes_plain": plain_bytes,
+            "bytes_conditional": cond_bytes,
+            "bytes_saved": plain_bytes - cond_bytes,
+            "plain_p50_ms": _pct([c.total_ms for c in plain if c.total_ms is not None], 50),
+            "plain_p95_ms": _pct([c.total_ms for c in plain if c.total_ms is not None], 95),
+            "full_p50_ms": _pct([c.total_ms for c in full if c.total_ms is not None], 50),
+            "not_modified_p50_ms": _pct([c.total_ms for c in hits if c.total_ms is not None], 50),
+            "not_modified_p95_ms": _pct([c.total_ms for c in hits if c.total_ms is not None], 95),
+        }
+    return out
+
+
+def format_qr_replay(result: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'endpoint':<9} {'reqs':>6} {'304':>6} {'hit %':>6} {'saved KB':>9} {'plain p50':>9} {'304 p50':>8} {'304 p95':>8} {'plain p95':>9}"]
+    for name, r in result.items():
+        lines.append(f"{name:<9} {r['requests']:>6} {r['not_modified']:>6} {(r['hit_rate'] or 0) * 100:>6.1f} "
+                     f"{r['bytes_saved'] / 1024:>9.1f} {r['plain_p50_ms'] or 0:>9} {r['not_modified_p50_ms'] or 0:>8} "
+                     f"{r['not_modified_p95_ms'] or 0:>8} {r['plain_p95_ms'] or 0:>9}")
+        if not r["etag"]:
+            lines.append(f"  {name}: no ETag in the responses, nothing was revalidated")
+    return "\n".join(lines)
+
+
 def main():
-    base = os.environ.get("BASE", "http://localhost:3000/api")
-    email = os.environ.get("EMAIL", "admin@abc.com")
-    password = os.environ.get("PASS", "password")
-
-    print(f"Testing backend at {base} as {email}")
-    t = BackendTester(base, email, password)
-    t.run()
-    report = t.summary()
+    parser = argparse.ArgumentParser(description="End-to-end test of the backend API")
+    parser.add_argument("--api", default=os.environ.get("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.environ.get("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.environ.get("PASS", "password"))
+    parser.add_argument("--report", default="a.txt", help="Full JSON report (with response bodies)")
+    parser.add_argument("--jsonl", default=os.environ.get("EXPORT_JSONL"), help="Write per-step timings as JSONL")
+    parser.add_argument("--csv", default=os.environ.get("EXPORT_CSV"), help="Write per-request timings as CSV")
+    parser.add_argument("--job-timeout", type=float, default=float(os.environ.get("REPORT_JOB_TIMEOUT", "60")), help="Seconds to wait for a prepare-async job")
+    parser.add_argument("--sync-fallback", action="store_true", default=os.environ.get("REPORT_SYNC_FALLBACK") == "true", help="Fall back to /prepare when the job times out (hides worker latency)")
+    parser.add_argument("--task-date", default=os.environ.get("TASK_DATE"), help="Fixed work order start date (YYYY-MM-DD) for a fresh database, see db_fixture.py")
+    parser.add_argument("--qr-scans", type=int, default=0, help="After the flow, replay this many QR scans per client of the signed report, plain vs. If-None-Match")
+    parser.add_argument("--qr-clients", type=int, default=4, help="Concurrent scanning clients for --qr-scans")
+    parser.add_argument("--qr-token", help="Only replay QR scans of this existing report token (skips the flow)")
+    parser.add_argument("--parallel", type=int, default=int(os.environ.get("TEST_PARALLEL", "0")), help="Run independent steps concurrently with this many threads (0 = sequential)")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the flow this many times; baselines use the median")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store this run as a named performance baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare this run against a stored baseline and exit 2 on regression")
+    parser.add_argument("--baseline-dir", default=baseline.DEFAULT_DIR)
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("REGRESSION_THRESHOLD", "0.2")), help="Allowed relative growth (0.2 = +20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="Ignore regressions smaller than this many ms")
+    parser.add_argument("--gate-steps", help="Comma-separated steps to gate on (default: all), e.g. prepare_report_async,download_report_signed,public_qr")
+    args = parser.parse_args()
+
+    if args.qr_token:
+        result = qr_scan_replay(args.api, args.qr_token, args.qr_clients, max(2, args.qr_scans or 20))
+        print(format_qr_replay(result))
+        sys.exit(0 if all(r["errors"] == 0 for r in result.values()) else 1)
+
+    print(f"Testing backend at {args.api} as {args.email}")
+    runs: List[List[StepResult]] = []
+    qr_token = None
+    for _ in range(max(1, args.repeat)):
+        t = BackendTester(args.api, args.email, args.password, job_timeout=args.job_timeout, sync_fallback=args.sync_fallback,
+                          task_date=args.task_date)
+        if args.parallel > 0:
+            t.run_parallel(args.parallel)
+        else:
+            t.run()
+        runs.append(t.results)
+        qr_token = t.qr_token or qr_token
+    # One report over every run, so the file agrees with the exit status
+    all_results = [r for results in runs for r in results]
+    report = t.summary(all_results)
+    if len(runs) > 1:
+        report["runs"] = [{k: v for k, v in t.summary(results).items() if k != "details"} for results in runs]
     ok = report["failed"] == 0
     print("\n===== TEST REPORT =====")
-    with open("a.txt", "w", encoding="utf_8") as f:
+    with open(args.report, "w", encoding="utf_8") as f:
         f.write(json.dumps(report, indent=2, ensure_ascii=False))
     print(json.dumps(report, indent=2, ensure_ascii=False))
     print("=======================\n")
-    sys.exit(0 if ok else 1)
+    for i, results in enumerate(runs, 1):
+        breakdown = format_server_timing(results)
+        if breakdown:
+            print("Server-Timing (ms)" + (f", run {i} of {len(runs)}:" if len(runs) > 1 else ":"))
+            print(breakdown + "\n")
+    if args.jsonl:
+        export_jsonl(all_results, args.jsonl)
+    if args.csv:
+        export_csv(all_results, args.csv)
+    if args.qr_scans and qr_token:
+        print(f"QR scan replay ({args.qr_clients} clients x {args.qr_scans} scans):")
+        print(format_qr_replay(qr_scan_replay(args.api, qr_token, args.qr_clients, args.qr_scans)) + "\n")
+
+    if not ok:
+        sys.exit(1)
+
+    if args.save_baseline or args.compare:
+        current = baseline.snapshot(runs, args.save_baseline or "current", args.api)
+        if args.save_baseline:
+            path = baseline.save_baseline(current, args.baseline_dir)
+            print(f"Baseline saved: {path}")
+        if args.compare:
+            ref = baseline.load_baseline(args.compare, args.baseline_dir)
+            print(baseline.format_comparison(current, ref))
+            steps = args.gate_steps.split(",") if args.gate_steps else None
+            regressions = baseline.compare(current, ref, args.threshold, args.min_delta_ms, steps=steps)
+            if regressions:
+                print("\n===== PERFORMANCE REGRESSIONS =====")
+                for reg in regressions:
+                    print(reg)
+                sys.exit(2)
+    sys.exit(0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Inspection photo upload benchmark with large, streamed images.
+
+Each worker builds its own inspection (customer → offer → work order) on
+equipment whose template has a photos section with maxCount = --max-count,
+then uploads photos to it one request at a time until maxCount is reached.
+Photos are streamed from disk as multipart bodies with a known length, so a
+large image never sits in client memory, and every worker keeps its own
+pooled keep-alive session. Every upload is recorded with the number of
+photos the inspection already had: uploadInspectionPhotos re-reads and
+rewrites the whole photo_urls array and inspection_data on each call, so
+latency against that count is the interesting curve.
+
+With --contend all workers upload to one shared inspection instead; the
+final photo_urls length is compared with the number of accepted uploads to
+expose lost updates from the read-modify-write.
+
+Images come from --images (a directory of .jpg/.png files) or are generated
+once into --work-dir at the --sizes-mb targets. The API rejects files over
+5 MB (multer limit in middleware/upload.js). Larger images are reported up
+front. Their uploads are kept in the results with their status, and any
+rejected upload makes the run exit 1, so the medians never silently cover
+only the smaller sizes.
+
+Usage:
+  python scripts/upload_bench.py --workers 4 --max-count 24 --sizes-mb 2,4 --plot uploads
+  python scripts/upload_bench.py --images ~/photos --contend --workers 8 --max-count 40
+
+Requires: pip install requests (matplotlib optional, for --plot)
+"""
+
+import argparse
+import csv
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pdf_bench import PHOTO_FIELD, bench_template
+from test_backend import BackendTester, synthetic_png
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+# multer fileSize limit of uploadInspectionPhotos (middleware/upload.js)
+API_PHOTO_LIMIT = 5 * 2**20
+CONTENT_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+
+class MultipartStream:
+    """multipart/form-data body that reads its files from disk while it is being sent."""
+
+    def __init__(self, fields: Dict[str, str], files: List[Tuple[str, str]], chunk_size: int = 64 * 1024):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        parts: List[Any] = []
+        for name, value in fields.items():
+            parts.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8"))
+        for name, path in files:
+            ctype = CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+            parts.append((f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                          f'filename="{os.path.basename(path)}"\r\nContent-Type: {ctype}\r\n\r\n').encode("utf-8"))
+            parts.append(path)
+            parts.append(b"\r\n")
+        parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._parts = parts
+        self._length = sum(len(p) if isinstance(p, bytes) else os.path.getsize(p) for p in parts)
+        self._index = 0
+        self._buf = b""
+        self._file = None
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _next_piece(self, size: int) -> bytes:
+        while self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                self._index += 1
+                return part
+            if self._file is None:
+                self._file = open(part, "rb")
+            data = self._file.read(size)
+            if data:
+                return data
+            self._file.close()
+            self._file = None
+            self._index += 1
+        return b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length
+        out = [self._buf]
+        have = len(self._buf)
+        while have < size:
+            piece = self._next_piece(size - have)
+            if not piece:
+                break
+            out.append(piece)
+            have += len(piece)
+        data = b"".join(out)
+        self._buf = data[size:]
+        return data[:size]
+
+
+@dataclass
+class Sample:
+    worker: int
+    inspection_id: int
+    existing_photos: int
+    file_bytes: int
+    status: Optional[int]
+    total_ms: float
+    ttfb_ms: Optional[float]
+    connect_ms: Optional[float]
+    error: Optional[str] = None
+
+
+def prepare_images(args) -> List[str]:
+    if args.images:
+        files = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+                       if os.path.splitext(f)[1].lower() in CONTENT_TYPES)
+        if not files:
+            raise SystemExit(f"no images in {args.images}")
+        return files
+    os.makedirs(args.work_dir, exist_ok=True)
+    files = []
+    for mb in [float(x) for x in args.sizes_mb.split(",") if x]:
+        path = os.path.join(args.work_dir, f"bench_{mb:g}mb.png")
+        if not os.path.exists(path):
+            # Noise PNGs barely compress: ~3 bytes per pixel at 4:3
+            pixels = mb * 2**20 / 3
+            w = int(math.sqrt(pixels * 4 / 3))
+            with open(path, "wb") as f:
+                f.write(synthetic_png(w, int(pixels / w)))
+        files.append(path)
+    return files
+
+
+def build_inspection(args, seed: int) -> Optional[int]:
+    """Fresh inspection on equipment whose photos section allows --max-count photos."""
+    t = BackendTester(args.api, args.email, args.password)
+    if not t.run_through(t.step_create_equipment_with_template):
+        return None
+    r = t.request("PUT", f"/equipment/{t.equipment_id}/template", token=t.token_admin,
+                  json={"template": bench_template("small", args.max_count, seed)})
+    if r.status_code != 200:
+        print(f"template update failed: HTTP {r.status_code}", file=sys.stderr)
+        return None
+    if not t.run_through(t.step_list_inspections, start=t.step_create_offer) or not t.inspection_id:
+        return None
+    return t.inspection_id
+
+
+class UploadBench:
+    def __init__(self, args, token: str, images: List[str]):
+        self.args = args
+        self.token = token
+        self.images = images
+        self.samples: List[Sample] = []
+        self._lock = threading.Lock()
+        # Per inspection: photos attempted (capped at max_count) and photos accepted so far
+        self._attempted: Dict[int, int] = {}
+        self._accepted: Dict[int, int] = {}
+
+    def _claim(self, inspection_id: int) -> Optional[int]:
+        """Reserve the next upload; returns how many photos the inspection has (None when done)."""
+        with self._lock:
+            n = self._attempted.get(inspection_id, 0)
+            if n + self.args.per_request > self.args.max_count:
+                return None
+            self._attempted[inspection_id] = n + self.args.per_request
+            return self._accepted.get(inspection_id, 0)
+
+    def worker(self, index: int, inspection_id: int):
+        t = BackendTester(self.args.api, "", "")
+        k = index
+        while True:
+            existing = self._claim(inspection_id)
+            if existing is None:
+                return
+            paths = [self.images[(k + i) % len(self.images)] for i in range(self.args.per_request)]
+            k += self.args.per_request
+            body = MultipartStream({"fieldName": PHOTO_FIELD}, [("photos", p) for p in paths])
+            status = error = None
+            try:
+                r = t.request("POST", f"/inspections/{inspection_id}/photos", token=self.token,
+                              headers={"Content-Type": body.content_type}, data=body)
+                status = r.status_code
+                if status != 200:
+                    error = (r.json().get("error") or {}).get("code") if r.headers.get("Content-Type", "").startswith("application/json") else None
+            except Exception as e:
+                error = str(e)
+            call = t.drain_calls()[-1]
+            with self._lock:
+                self.samples.append(Sample(
+                    worker=index, inspection_id=inspection_id, existing_photos=existing, file_bytes=len(body),
+                    status=status, total_ms=call.total_ms, ttfb_ms=call.ttfb_ms, connect_ms=call.connect_ms, error=error,
+                ))
+                if status == 200:
+                    self._accepted[inspection_id] = self._accepted.get(inspection_id, 0) + self.args.per_request
+
+    def photo_count(self, inspection_id: int) -> Optional[int]:
+        t = BackendTester(self.args.api, "", "")
+        r = t.request("GET", f"/inspections/{inspection_id}", token=self.token)
+        if r.status_code != 200:
+            return None
+        return len(r.json()["data"].get("photo_urls") or [])
+
+
+def summarize(bench: UploadBench, wall_s: float, inspections: List[int]) -> Dict[str, Any]:
+    ok = [s for s in bench.samples if s.status == 200]
+    by_count: Dict[int, List[float]] = {}
+    for s in ok:
+        by_count.setdefault(s.existing_photos, []).append(s.total_ms)
+    slope = None
+    pts = [(x, statistics.median(v)) for x, v in by_count.items()]
+    if len(pts) >= 2:
+        mx = sum(x for x, _ in pts) / len(pts)
+        my = sum(y for _, y in pts) / len(pts)
+        var = sum((x - mx) ** 2 for x, _ in pts)
+        slope = sum((x - mx) * (y - my) for x, y in pts) / var if var else 0.0
+    uploaded = sum(s.file_bytes for s in ok)
+    rejected: Dict[str, int] = {}
+    for s in bench.samples:
+        if s.status != 200:
+            key = s.error or f"http_{s.status}"
+            rejected[key] = rejected.get(key, 0) + 1
+    return {
+        "uploads": len(bench.samples),
+        "accepted": len(ok),
+        "rejected": rejected,
+        "wall_s": round(wall_s, 3),
+        "mb_per_s": round(uploaded / 2**20 / wall_s, 2) if wall_s > 0 else None,
+        "median_ms": round(statistics.median([s.total_ms for s in ok]), 2) if ok else None,
+        "ms_per_existing_photo": round(slope, 3) if slope is not None else None,
+        # connect_ms > 0 means the call opened a new connection instead of reusing one
+        "connections_opened": sum(1 for s in bench.samples if s.connect_ms),
+        "median_ms_by_existing": {x: round(statistics.median(v), 2) for x, v in sorted(by_count.items())},
+        "photo_urls_final": {i: bench.photo_count(i) for i in inspections},
+        "accepted_per_inspection": {i: sum(bench.args.per_request for s in ok if s.inspection_id == i) for i in inspections},
+    }
+
+
+def write_csv(samples: List[Sample], path: str):
+    with open(path, "w", encoding="utf_8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(Sample.__dataclass_fields__))
+        w.writeheader()
+        for s in samples:
+            w.writerow(asdict(s))
+
+
+def plot(samples: List[Sample], prefix: str):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sizes = sorted({s.file_bytes for s in samples})
+    for size in sizes:
+        pts = sorted((s.existing_photos, s.total_ms) for s in samples if s.file_bytes == size and s.status == 200)
+        if pts:
+            ax.scatter([x for x, _ in pts], [y for _, y in pts], s=12, label=f"{size / 2**20:.1f} MB")
+    ax.set_title("Photo upload latency vs photos already on the inspection")
+    ax.set_xlabel("existing photos")
+    ax.set_ylabel("upload latency (ms)")
+    ax.legend(fontsize="small")
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(f"{prefix}_latency.png")
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent streamed photo uploads vs photos per inspection")
+    parser.add_argument("--api", default=os.getenv("BASE", "http://localhost:3000/api"), help="API base url, e.g. http://localhost:3000/api")
+    parser.add_argument("--email", default=os.getenv("EMAIL", "admin@abc.com"))
+    parser.add_argument("--password", default=os.getenv("PASS", "password"))
+    parser.add_argument("--images", help="Directory of .jpg/.png/.webp files to upload (default: generate)")
+    parser.add_argument("--sizes-mb", default="2,4", help="Sizes of generated images in MB (the API limit is 5)")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "upload_bench"), help="Where generated images are kept")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent uploaders (each with its own keep-alive session)")
+    parser.add_argument("--max-count", type=int, default=24, help="Template maxCount; uploads stop there")
+    parser.add_argument("--per-request", type=int, default=1, help="Photos per upload request (API allows 10)")
+    parser.add_argument("--contend", action="store_true", help="All workers upload to one shared inspection")
+    parser.add_argument("--out", default="uploads.csv", help="CSV of every upload")
+    parser.add_argument("--plot", metavar="PREFIX", help="Write PREFIX_latency.png (needs matplotlib)")
+    args = parser.parse_args()
+
+    images = prepare_images(args)
+    too_large = [p for p in images if os.path.getsize(p) > API_PHOTO_LIMIT]
+    if too_large:
+        print(f"warning: {len(too_large)} of {len(images)} images exceed the {API_PHOTO_LIMIT / 2**20:g} MB API limit "
+              f"and will be rejected (400 FILE_TOO_LARGE): {', '.join(os.path.basename(p) for p in too_large)}", file=sys.stderr)
+    admin = BackendTester(args.api, args.email, args.password)
+    admin.step_login_admin()
+    if not admin.token_admin:
+        print("Login failed", file=sys.stderr)
+        sys.exit(1)
+
+    n_inspections = 1 if args.contend else args.workers
+    print(f"Building {n_inspections} inspection(s) with maxCount={args.max_count}...", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=min(n_inspections, 4)) as pool:
+        inspections = [i for i in pool.map(lambda k: build_inspection(args, k), range(n_inspections)) if i]
+    if len(inspections) < n_inspections:
+        print("Fixture build failed", file=sys.stderr)
+        sys.exit(1)
+
+    bench = UploadBench(args, admin.token_admin, images)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(bench.worker, w, inspections[0 if args.contend else w]) for w in range(args.workers)]
+        for f in futures:
+            f.result()
+    summary = summarize(bench, time.perf_counter() - t0, inspections)
+
+    write_csv(bench.samples, args.out)
+    for k, v in summary.items():
+        print(f"{k}: {v}")
+    lost = {i: summary["accepted_per_inspection"][i] - n for i, n in summary["photo_urls_final"].items()
+            if n is not None and n < summary["accepted_per_inspection"][i]}
+    if lost:
+        print(f"LOST UPDATES (accepted but missing from photo_urls): {lost}")
+    if summary["rejected"]:
+        print(f"REJECTED UPLOADS (not in the latency figures): {summary['rejected']}")
+    if args.plot:
+        if plt is None:
+            print("matplotlib is not installed; skipping charts (pip install matplotlib)", file=sys.stderr)
+        else:
+            plot(bench.samples, args.plot)
+    sys.exit(1 if lost or summary["rejected"] else 0)
+
+
+if __name__ == "__main__":
+    main()